@@ -44,8 +44,9 @@ CREATE TABLE IF NOT EXISTS `directories` (
   `collection` varchar(7) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL,
   `path` varchar(127) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL,
   `name` varchar(31) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL,
+  `mtime` bigint(20) unsigned DEFAULT NULL COMMENT 'Nanoseconds, as of the last complete index run',
   PRIMARY KEY (`id`),
-  KEY `directories_collection_IDX` (`collection`,`path`) USING BTREE,
+  UNIQUE KEY `directories_collection_IDX` (`collection`,`path`) USING BTREE,
   KEY `directories_parent_id_IDX` (`parent_id`) USING BTREE
 ) ENGINE=InnoDB AUTO_INCREMENT=294 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
@@ -63,6 +64,9 @@ CREATE TABLE IF NOT EXISTS `entry` (
   `directory_id` int(10) unsigned DEFAULT NULL,
   `file_modified` int(10) unsigned NOT NULL,
   `file_size` int(10) unsigned NOT NULL,
+  `file_hash` binary(16) DEFAULT NULL,
+  `index_time` int(10) unsigned DEFAULT NULL COMMENT 'Milliseconds',
+  `index_memory` int(10) unsigned DEFAULT NULL COMMENT 'Peak resident set size in kilobytes',
   `entry_created` int(10) unsigned NOT NULL,
   `entry_updated` int(10) unsigned NOT NULL,
   `title` varchar(255) DEFAULT NULL,
@@ -85,7 +89,7 @@ CREATE TABLE IF NOT EXISTS `entry` (
   KEY `entry_is_cooperative_IDX` (`is_cooperative`) USING BTREE,
   KEY `entry_is_deathmatch_IDX` (`is_deathmatch`) USING BTREE,
   KEY `entry_directory_id_IDX` (`directory_id`) USING BTREE,
-  KEY `entry_collection_IDX` (`collection`,`path`) USING BTREE,
+  UNIQUE KEY `entry_collection_IDX` (`collection`,`path`) USING BTREE,
   KEY `entry_entry_created_IDX` (`entry_created`) USING BTREE,
   KEY `entry_file_modified_IDX` (`file_modified`) USING BTREE,
   FULLTEXT KEY `entry_path_ft_IDX` (`path`),
@@ -200,7 +204,7 @@ CREATE TABLE IF NOT EXISTS `maps` (
   `enemy_count_coop` int(10) unsigned DEFAULT NULL,
   `enemy_count_dm` int(10) unsigned DEFAULT NULL,
   PRIMARY KEY (`id`),
-  KEY `maps_entry_id_IDX` (`entry_id`,`name`) USING BTREE
+  UNIQUE KEY `maps_entry_id_IDX` (`entry_id`,`name`) USING BTREE
 ) ENGINE=InnoDB AUTO_INCREMENT=59441 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
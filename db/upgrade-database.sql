@@ -0,0 +1,72 @@
+-- Upgrades a database created by an older version of init-database.sql.
+--
+-- Adds the columns used to skip unchanged files and directories, and makes the keys that the indexer stores rows by
+-- unique. Duplicate rows that older versions could store are removed first, keeping the most recent entry or map and
+-- the oldest directory. Safe to run more than once.
+
+/*!40101 SET NAMES utf8mb4 */;
+
+--
+-- New columns
+--
+
+ALTER TABLE `entry`
+  ADD COLUMN IF NOT EXISTS `file_hash` binary(16) DEFAULT NULL AFTER `file_size`,
+  ADD COLUMN IF NOT EXISTS `index_time` int(10) unsigned DEFAULT NULL COMMENT 'Milliseconds' AFTER `file_hash`,
+  ADD COLUMN IF NOT EXISTS `index_memory` int(10) unsigned DEFAULT NULL COMMENT 'Peak resident set size in kilobytes' AFTER `index_time`;
+
+ALTER TABLE `directories`
+  ADD COLUMN IF NOT EXISTS `mtime` bigint(20) unsigned DEFAULT NULL COMMENT 'Nanoseconds, as of the last complete index run' AFTER `name`;
+
+--
+-- Duplicate entries, and the rows that belong to them
+--
+
+DELETE `e` FROM `entry` `e`
+  JOIN `entry` `newer` ON `newer`.`collection` = `e`.`collection` AND `newer`.`path` = `e`.`path` AND `newer`.`id` > `e`.`id`;
+
+DELETE FROM `entry_authors` WHERE `entry_id` NOT IN (SELECT `id` FROM `entry`);
+DELETE FROM `entry_images` WHERE `entry_id` NOT IN (SELECT `id` FROM `entry`);
+DELETE FROM `entry_music` WHERE `entry_id` NOT IN (SELECT `id` FROM `entry`);
+DELETE FROM `entry_textfile` WHERE `entry_id` NOT IN (SELECT `id` FROM `entry`);
+DELETE FROM `maps` WHERE `entry_id` NOT IN (SELECT `id` FROM `entry`);
+
+--
+-- Duplicate maps
+--
+
+DELETE `m` FROM `maps` `m`
+  JOIN `maps` `newer` ON `newer`.`entry_id` = `m`.`entry_id` AND `newer`.`name` = `m`.`name` AND `newer`.`id` > `m`.`id`;
+
+DELETE FROM `map_authors` WHERE `map_id` NOT IN (SELECT `id` FROM `maps`);
+
+--
+-- Duplicate directories. Entries and subdirectories are moved to the directory that is kept.
+--
+
+CREATE TEMPORARY TABLE `directory_duplicates` AS
+  SELECT `d`.`id` AS `id`, MIN(`kept`.`id`) AS `kept_id` FROM `directories` `d`
+  JOIN `directories` `kept` ON `kept`.`collection` = `d`.`collection` AND `kept`.`path` = `d`.`path` AND `kept`.`id` < `d`.`id`
+  GROUP BY `d`.`id`;
+
+UPDATE `entry` `e` JOIN `directory_duplicates` `dd` ON `dd`.`id` = `e`.`directory_id` SET `e`.`directory_id` = `dd`.`kept_id`;
+UPDATE `directories` `d` JOIN `directory_duplicates` `dd` ON `dd`.`id` = `d`.`parent_id` SET `d`.`parent_id` = `dd`.`kept_id`;
+DELETE `d` FROM `directories` `d` JOIN `directory_duplicates` `dd` ON `dd`.`id` = `d`.`id`;
+
+DROP TEMPORARY TABLE `directory_duplicates`;
+
+--
+-- Unique keys
+--
+
+ALTER TABLE `entry`
+  DROP INDEX IF EXISTS `entry_collection_IDX`,
+  ADD UNIQUE KEY `entry_collection_IDX` (`collection`,`path`) USING BTREE;
+
+ALTER TABLE `directories`
+  DROP INDEX IF EXISTS `directories_collection_IDX`,
+  ADD UNIQUE KEY `directories_collection_IDX` (`collection`,`path`) USING BTREE;
+
+ALTER TABLE `maps`
+  DROP INDEX IF EXISTS `maps_entry_id_IDX`,
+  ADD UNIQUE KEY `maps_entry_id_IDX` (`entry_id`,`name`) USING BTREE;
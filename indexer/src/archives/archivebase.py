@@ -1,10 +1,12 @@
-import re
+import threading
+from bisect import bisect_left
 from os.path import basename, splitext
-from re import RegexFlag
-from typing import List, Optional, IO
+from typing import Dict, Iterable, List, Optional, IO
 
 from archives.archivefilebase import ArchiveFileBase
+from archives.lumpcache import LumpCache
 from utils.logger import Logger
+from utils.regexp import compile_regexp
 
 
 class ArchiveBase:
@@ -17,6 +19,21 @@ class ArchiveBase:
         self.file: IO[bytes] = file
         self.is_main: bool = False
 
+        # Files by their lowercase name without path and extension, in the order they were added.
+        self.files_by_basename: Dict[str, List[ArchiveFileBase]] = {}
+
+        # Lowercase names of files with ASCII names in sorted order, with the indexes of those files. Files with other
+        # names are always tested by regular expression lookups. Built when first needed.
+        self.names_sorted: Optional[List[str]] = None
+        self.names_sorted_indexes: List[int] = []
+        self.names_unsorted_indexes: List[int] = []
+
+        # Data of files that were read. Archives of the same entry can share a cache, see set_cache.
+        self.cache: LumpCache = LumpCache()
+
+        # Extractors can run in multiple threads, which must not read from the archive file at the same time.
+        self.lock: threading.Lock = threading.Lock()
+
         self.logger: Logger = logger
 
         self.read(file)
@@ -29,33 +46,108 @@ class ArchiveBase:
     def read(self, file: IO[bytes]):
         pass
 
+    def reopen(self, logger: Logger):
+        """
+        Opens the file of an archive that was opened from a path again, in a process forked from the one that opened
+        it. The inherited file shares its position with other processes, so reading from it is not safe.
+
+        :param logger: The logger of the current process.
+        :return:
+        """
+
+        self.file.close()
+        self.file = open(self.name, 'rb')
+        self.lock = threading.Lock()
+        self.logger = logger
+
+    def set_cache(self, cache: LumpCache):
+        self.cache = cache
+
+    @property
+    def is_mapped(self) -> bool:
+        """
+        Whether the archive's contents are mapped into memory, or held in memory as a whole. The data of its files is
+        then available without reading, and can be viewed without copying.
+        """
+
+        return False
+
+    @staticmethod
+    def get_file_basename(name: str) -> str:
+        return basename(splitext(name)[0]).lower()
+
     def file_add(self, file: ArchiveFileBase):
         self.files.append(file)
+        self.names_sorted = None
 
-    def file_find_basename(self, file_basename: str) -> Optional[ArchiveFileBase]:
-        file_basename = file_basename.lower()
+        file_basename = ArchiveBase.get_file_basename(file.name)
+        files = self.files_by_basename.get(file_basename)
+        if files is None:
+            self.files_by_basename[file_basename] = [file]
+        else:
+            files.append(file)
 
-        for file in reversed(self.files):
-            filename = basename(splitext(file.name)[0]).lower()
-            if file_basename == filename:
-                return file
+    def file_find_basename(self, file_basename: str) -> Optional[ArchiveFileBase]:
+        files = self.files_by_basename.get(file_basename.lower())
+        if files is None:
+            return None
 
-        return None
+        return files[-1]
 
     def file_find_all_basename(self, file_basename: str) -> List[ArchiveFileBase]:
-        files: List[ArchiveFileBase] = []
+        files = self.files_by_basename.get(file_basename.lower())
+        if files is None:
+            return []
 
-        file_basename = file_basename.lower()
-        for file in reversed(self.files):
-            filename = basename(splitext(file.name)[0]).lower()
-            if file_basename == filename:
-                files.append(file)
+        return files[::-1]
 
-        return files
+    def build_names_sorted(self):
+
+        # Extractor threads may build this at the same time, so the sorted names are assigned last.
+        sorted_indexes: List[int] = []
+        unsorted_indexes: List[int] = []
+        for index, file in enumerate(self.files):
+            if file.name.isascii():
+                sorted_indexes.append(index)
+            else:
+                unsorted_indexes.append(index)
+
+        sorted_indexes.sort(key=lambda index: self.files[index].name.lower())
+
+        self.names_sorted_indexes = sorted_indexes
+        self.names_unsorted_indexes = unsorted_indexes
+        self.names_sorted = [self.files[index].name.lower() for index in sorted_indexes]
+
+    def get_regexp_candidates(self, prefix: str) -> Iterable[int]:
+        """
+        Returns the indexes of the files that may match a regular expression with a literal prefix, from last to first.
+        Only files whose name starts with the prefix can match, and those are found in the sorted names.
+
+        :param prefix:
+        :return:
+        """
+
+        if not prefix:
+            return range(len(self.files) - 1, -1, -1)
+
+        if self.names_sorted is None:
+            self.build_names_sorted()
+
+        start = bisect_left(self.names_sorted, prefix)
+        end = start
+        while end < len(self.names_sorted) and self.names_sorted[end].startswith(prefix):
+            end += 1
+
+        candidates = self.names_sorted_indexes[start:end]
+        candidates.extend(self.names_unsorted_indexes)
+        candidates.sort(reverse=True)
+        return candidates
 
     def file_find_regexp(self, regexp: str) -> Optional[ArchiveFileBase]:
-        for file in reversed(self.files):
-            if re.match(regexp, file.name, RegexFlag.IGNORECASE):
+        pattern, prefix = compile_regexp(regexp)
+        for index in self.get_regexp_candidates(prefix):
+            file = self.files[index]
+            if pattern.match(file.name):
                 return file
 
         return None
@@ -63,15 +155,55 @@ class ArchiveBase:
     def file_find_all_regexp(self, regexp: str) -> List[ArchiveFileBase]:
         files: List[ArchiveFileBase] = []
 
-        for file in reversed(self.files):
-            if re.match(regexp, file.name, RegexFlag.IGNORECASE):
+        pattern, prefix = compile_regexp(regexp)
+        for index in self.get_regexp_candidates(prefix):
+            file = self.files[index]
+            if pattern.match(file.name):
                 files.append(file)
 
         return files
 
+    def file_find_regexps(self, regexps: Iterable[str]) -> Dict[str, Optional[ArchiveFileBase]]:
+        """
+        Finds the last file matching each of several regular expressions.
+
+        Expressions with a literal prefix are looked up in the sorted names. The others are all tested in a single pass
+        over the files, which stops once each of them found a file.
+
+        :param regexps:
+        :return: The file found for each expression, or None if no file matches it.
+        """
+
+        found: Dict[str, Optional[ArchiveFileBase]] = {}
+        remaining = {}
+        for regexp in regexps:
+            pattern, prefix = compile_regexp(regexp)
+            if prefix:
+                found[regexp] = self.file_find_regexp(regexp)
+            else:
+                found[regexp] = None
+                remaining[regexp] = pattern
+
+        for file in reversed(self.files):
+            if not len(remaining):
+                break
+
+            for regexp, pattern in list(remaining.items()):
+                if pattern.match(file.name):
+                    found[regexp] = file
+                    del remaining[regexp]
+
+        return found
+
     def close(self):
         self.logger.debug('Closing "{}"'.format(self.name))
         self.file.close()
 
     def get_file_data(self, file: ArchiveFileBase) -> bytes:
         pass
+
+    def get_file_view(self, file: ArchiveFileBase) -> memoryview:
+        return memoryview(self.get_file_data(file))
+
+    def get_file_start(self, file: ArchiveFileBase, size: int) -> bytes:
+        return self.get_file_data(file)[:size]
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Union
 
 
 class ArchiveFileBase:
@@ -9,11 +9,65 @@ class ArchiveFileBase:
         self.owner = owner
 
         self.type: Optional[str] = None
-        self.data: Optional[bytes] = None
 
     def get_data(self) -> bytes:
-        if self.data is None:
-            self.owner.logger.debug('Reading "{}" from "{}"'.format(self.name, self.owner.name))
-            self.data = self.owner.get_file_data(self)
 
-        return self.data
+        # A mapped archive already holds its data in memory, which may be shared with other processes. Copies of it
+        # are not kept.
+        if self.owner.is_mapped:
+            return self.owner.get_file_data(self)
+
+        data = self.owner.cache.get(self)
+        if data is None:
+            with self.owner.lock:
+                data = self.owner.cache.get(self)
+                if data is None:
+                    self.owner.logger.debug('Reading "{}" from "{}"'.format(self.name, self.owner.name))
+                    data = self.owner.get_file_data(self)
+                    self.owner.cache.put(self, data)
+
+        return data
+
+    def pin(self):
+        """
+        Keeps the data of this file cached until it is unpinned, for data that is read several times in a row. Every
+        call must be matched by a call to unpin.
+
+        :return:
+        """
+
+        self.owner.cache.pin(self)
+
+    def unpin(self):
+        self.owner.cache.unpin(self)
+
+    def get_view(self) -> memoryview:
+        """
+        Returns the data of this file without copying it, if its archive is mapped into memory. Use this over get_data
+        where the data is only unpacked, hashed or decoded, so that lumps of large WADs are not duplicated in memory.
+
+        :return:
+        """
+
+        if self.owner.is_mapped:
+            return self.owner.get_file_view(self)
+
+        return memoryview(self.get_data())
+
+    def peek(self, size: int) -> Union[bytes, memoryview]:
+        """
+        Returns up to size bytes from the start of this file, without reading the rest of it.
+
+        :param size:
+        :return:
+        """
+
+        if self.owner.is_mapped:
+            return self.owner.get_file_view(self)[:size]
+
+        data = self.owner.cache.get(self)
+        if data is not None:
+            return memoryview(data)[:size]
+
+        with self.owner.lock:
+            return self.owner.get_file_start(self, size)
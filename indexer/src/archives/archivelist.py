@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 
 from archives.archivebase import ArchiveBase
 from archives.archivefilebase import ArchiveFileBase
@@ -9,32 +9,54 @@ class ArchiveList:
     def __init__(self):
         self.archives: List[ArchiveBase] = []
 
+        # Indexes of the files found by basename, with and without main archives. Built when first needed.
+        self.basename_indexes: Dict[bool, Dict[str, List[ArchiveFileBase]]] = {}
+
     def append(self, archive: ArchiveBase):
         self.archives.append(archive)
+        self.basename_indexes.clear()
 
-    def file_find_basename(self, file_basename: str, include_main: bool = True) -> Optional[ArchiveFileBase]:
+    def get_basename_index(self, include_main: bool) -> Dict[str, List[ArchiveFileBase]]:
+        """
+        Returns the files that a basename lookup finds in each archive, by basename. Files of later archives come
+        first, as those take precedence over earlier ones.
+
+        :param include_main:
+        :return:
+        """
+
+        index = self.basename_indexes.get(include_main)
+        if index is not None:
+            return index
+
+        index = {}
         for archive in reversed(self.archives):
             if not include_main and archive.is_main:
                 continue
 
-            file = archive.file_find_basename(file_basename)
-            if file is not None:
-                return file
+            for file_basename, files in archive.files_by_basename.items():
+                found = index.get(file_basename)
+                if found is None:
+                    index[file_basename] = [files[-1]]
+                else:
+                    found.append(files[-1])
 
-        return None
+        self.basename_indexes[include_main] = index
+        return index
 
-    def file_find_all_basename(self, file_basename: str, include_main: bool = True) -> List[ArchiveFileBase]:
-        files: List[ArchiveFileBase] = []
+    def file_find_basename(self, file_basename: str, include_main: bool = True) -> Optional[ArchiveFileBase]:
+        files = self.get_basename_index(include_main).get(file_basename.lower())
+        if files is None:
+            return None
 
-        for archive in reversed(self.archives):
-            if not include_main and archive.is_main:
-                continue
+        return files[0]
 
-            file = archive.file_find_basename(file_basename)
-            if file is not None:
-                files.append(file)
+    def file_find_all_basename(self, file_basename: str, include_main: bool = True) -> List[ArchiveFileBase]:
+        files = self.get_basename_index(include_main).get(file_basename.lower())
+        if files is None:
+            return []
 
-        return files
+        return list(files)
 
     def file_find_regexp(self, regexp: str, include_main: bool = True) -> Optional[ArchiveFileBase]:
         for archive in reversed(self.archives):
@@ -47,6 +69,31 @@ class ArchiveList:
 
         return None
 
+    def file_find_regexps(self, regexps: Iterable[str], include_main: bool = True) -> Dict[str, Optional[ArchiveFileBase]]:
+        """
+        Finds the file matching each of several regular expressions, like file_find_regexp would for each of them.
+
+        :param regexps:
+        :param include_main:
+        :return:
+        """
+
+        found: Dict[str, Optional[ArchiveFileBase]] = {regexp: None for regexp in regexps}
+
+        remaining = list(found.keys())
+        for archive in reversed(self.archives):
+            if not len(remaining):
+                break
+            if not include_main and archive.is_main:
+                continue
+
+            for regexp, file in archive.file_find_regexps(remaining).items():
+                if file is not None:
+                    found[regexp] = file
+            remaining = [regexp for regexp in remaining if found[regexp] is None]
+
+        return found
+
     def file_find_all_regexp(self, regexp: str, include_main: bool = True) -> List[ArchiveFileBase]:
         files = []
 
@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from archives.archivefilebase import ArchiveFileBase
+
+
+# Default total size in bytes of the data that a cache keeps.
+LUMP_CACHE_SIZE_DEFAULT: int = 64 * 1024 * 1024
+
+
+class LumpCache:
+    """
+    Keeps the data of archive files that were read recently, up to a total size.
+
+    When the total size is exceeded, the data of the files that were used least recently is dropped until it fits
+    again. Pinned files are never dropped, so that data that is used many times in a row does not need to be read
+    again. Files larger than the total size are not kept at all, unless they are pinned.
+    """
+
+    def __init__(self, size_limit: int = LUMP_CACHE_SIZE_DEFAULT):
+        self.size_limit: int = size_limit
+        self.size: int = 0
+
+        # Cached data by file, from least to most recently used.
+        self.entries: Dict[ArchiveFileBase, bytes] = OrderedDict()
+        self.pins: Dict[ArchiveFileBase, int] = {}
+
+        # Extractors can run in multiple threads.
+        self.lock: threading.Lock = threading.Lock()
+
+    def get(self, file: ArchiveFileBase) -> Optional[bytes]:
+        with self.lock:
+            data = self.entries.get(file)
+            if data is not None:
+                self.entries.move_to_end(file)
+
+        return data
+
+    def put(self, file: ArchiveFileBase, data: bytes):
+        with self.lock:
+            if file in self.entries:
+                return
+            if len(data) > self.size_limit and file not in self.pins:
+                return
+
+            self.entries[file] = data
+            self.size += len(data)
+            self._evict()
+
+    def pin(self, file: ArchiveFileBase):
+        """
+        Keeps the data of a file cached until it is unpinned. A file can be pinned several times, and is then only
+        unpinned once it is unpinned as often.
+
+        :param file:
+        :return:
+        """
+
+        with self.lock:
+            self.pins[file] = self.pins.get(file, 0) + 1
+
+    def unpin(self, file: ArchiveFileBase):
+        with self.lock:
+            count = self.pins.get(file, 0)
+            if count <= 1:
+                self.pins.pop(file, None)
+            else:
+                self.pins[file] = count - 1
+
+            self._evict()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.pins.clear()
+            self.size = 0
+
+    def _evict(self):
+        if self.size <= self.size_limit:
+            return
+
+        for file in list(self.entries.keys()):
+            if file in self.pins:
+                continue
+
+            self.size -= len(self.entries.pop(file))
+            if self.size <= self.size_limit:
+                break
@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+from os.path import dirname, splitext
+from pathlib import Path
+from typing import IO, List, Optional
+
+from archives.archivebase import ArchiveBase
+from archives.lumpcache import LumpCache
+from archives.sevenziparchivefile import SevenZipArchiveFile
+from archives.wadarchive import WADArchive
+from utils.logger import Logger
+from utils.sevenzip import SZArchive
+
+
+class SevenZipArchive(ArchiveBase):
+    """
+    A 7zip archive, such as a pk7 file.
+
+    Python cannot read 7zip archives by itself, so the archive is listed and then extracted completely into a temporary
+    directory by 7zip processes. Two processes are started for each archive, no matter how many files it contains.
+    The temporary directory is removed when the archive is closed.
+    """
+
+    def __init__(self, name: str, file: IO[bytes], logger: Logger):
+        self.directory: Optional[str] = None
+        self.child_wads: List[WADArchive] = []
+
+        super().__init__(name, file, logger)
+
+    def read(self, file: IO[bytes]):
+        self.file = file
+        self.directory = tempfile.mkdtemp(prefix='indexer-7z-')
+
+        try:
+            self.read_files(file)
+        except BaseException:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+            raise
+
+    def read_files(self, file: IO[bytes]):
+        # 7zip reads archives from a path, so the archive is written to the temporary directory first.
+        path_archive = Path(self.directory) / 'archive.7z'
+        with open(path_archive, 'wb') as f:
+            file.seek(0)
+            shutil.copyfileobj(file, f)
+
+        path_files = Path(self.directory) / 'files'
+        archive_7z = SZArchive(path_archive)
+        if not archive_7z.extract(path_files):
+            self.logger.warn('7zip reported errors while extracting {}.'.format(self.name))
+        os.unlink(path_archive)
+
+        path_files_real = os.path.realpath(path_files)
+        for file_7z in archive_7z.files:
+            if file_7z.is_dir:
+                continue
+
+            # Do not follow paths that lead outside of the extracted files.
+            path = os.path.realpath(path_files / file_7z.path)
+            if not path.startswith(path_files_real + os.sep) or not os.path.isfile(path):
+                self.logger.warn('Cannot find extracted file {} in {}.'.format(file_7z.path, self.name))
+                continue
+
+            file_base_path = dirname(file_7z.path)
+            ext = splitext(file_7z.path)[1]
+
+            # Extract contents of WAD files in the archive root into our own list of files, like ZIPArchive does.
+            if ext == '.wad' and len(file_base_path) == 0:
+                self.logger.debug('Adding files from {}.'.format(file_7z.path))
+
+                wad_archive = WADArchive.from_file_mapped('{}/{}'.format(self.name, file_7z.path), open(path, 'rb'), self.logger)
+                self.child_wads.append(wad_archive)
+
+                for wad_file in wad_archive.files:
+                    self.file_add(wad_file)
+
+            else:
+                self.file_add(SevenZipArchiveFile(self, file_7z.path, os.path.getsize(path), path))
+
+    def set_cache(self, cache: LumpCache):
+        super().set_cache(cache)
+
+        for child_wad in self.child_wads:
+            child_wad.set_cache(cache)
+
+    def get_file_data(self, file: SevenZipArchiveFile) -> bytes:
+        with open(file.path, 'rb') as f:
+            return f.read()
+
+    def get_file_start(self, file: SevenZipArchiveFile, size: int) -> bytes:
+        with open(file.path, 'rb') as f:
+            return f.read(size)
+
+    def close(self):
+        super().close()
+
+        for child_wad in self.child_wads:
+            child_wad.close()
+
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
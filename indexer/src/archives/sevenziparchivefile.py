@@ -0,0 +1,11 @@
+from archives.archivebase import ArchiveBase
+from archives.archivefilebase import ArchiveFileBase
+
+
+class SevenZipArchiveFile(ArchiveFileBase):
+
+    def __init__(self, owner: ArchiveBase, name: str, size: int, path: str):
+        super().__init__(owner, name, size)
+
+        # Path of the file after it was extracted.
+        self.path: str = path
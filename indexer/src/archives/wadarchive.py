@@ -1,6 +1,11 @@
+import io
+import mmap
 import os
+import threading
 from struct import Struct
-from typing import IO
+from typing import IO, Optional, Union
+
+from utils.logger import Logger
 
 from archives.archivebase import ArchiveBase
 from archives.wadarchivefile import WADArchiveFile
@@ -13,14 +18,77 @@ class WADArchive(ArchiveBase):
     S_HEADER: Struct = Struct("<4sII")
     S_LUMP: Struct = Struct("<II8s")
 
-    def read(self, file: IO[bytes]):
+    @classmethod
+    def from_path_mapped(cls, path: str, logger: Logger):
+        """
+        Opens a WAD file and maps it into memory read-only. Lumps are served as views of the mapping, so all processes
+        that use the archive share one physical copy of its data, including processes forked after it was opened.
+
+        :param path:
+        :param logger:
+        :return:
+        """
+
+        with open(path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return cls(path, mapping, logger)
+
+    @classmethod
+    def from_file_mapped(cls, name: str, file: IO[bytes], logger: Logger):
+        """
+        Opens a WAD from a file object, mapping its contents where possible. Files backed by a file descriptor, such as
+        files on disk and temporary files that data was decompressed into, are mapped into memory. The contents of
+        in-memory files are used directly. Other files, such as streams read from ZIP archives, are read as usual.
+
+        :param name:
+        :param file:
+        :param logger:
+        :return:
+        """
+
+        if isinstance(file, io.BytesIO):
+            return cls(name, file.getvalue(), logger)
+
+        try:
+            fileno = file.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            return cls(name, file, logger)
+
+        # The mapping keeps its own reference to the file, so the file object is no longer needed.
+        mapping = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+        file.close()
+
+        return cls(name, mapping, logger)
+
+    @property
+    def is_mapped(self) -> bool:
+        return self.view is not None
+
+    def reopen(self, logger: Logger):
+
+        # A mapping has no file position to share, so it can be used from forked processes as is.
+        if self.is_mapped:
+            self.lock = threading.Lock()
+            self.logger = logger
+            return
+
+        super().reopen(logger)
+
+    def read(self, file: Union[IO[bytes], mmap.mmap, bytes, memoryview]):
         self.file = file
 
-        file.seek(0, os.SEEK_END)
-        file_size = file.tell()
-        file.seek(0)
+        # Memory mappings and in-memory data are read through a view, which slices them without copying.
+        self.view: Optional[memoryview] = None
+        if isinstance(file, (mmap.mmap, bytes, memoryview)):
+            self.view = memoryview(file)
+            file_size = len(self.view)
+        else:
+            file.seek(0, os.SEEK_END)
+            file_size = file.tell()
+            file.seek(0)
 
-        header = file.read(WADArchive.S_HEADER.size)
+        header = self.read_at(0, WADArchive.S_HEADER.size)
         wad_type, entry_count, dir_offset = WADArchive.S_HEADER.unpack(header)
         if dir_offset >= file_size:
             return
@@ -29,12 +97,9 @@ class WADArchive(ArchiveBase):
         if wad_type != WADArchive.TYPE_IWAD and wad_type != WADArchive.TYPE_PWAD:
             return
 
-        file.seek(dir_offset)
-        for _ in range(entry_count):
-            entry = file.read(WADArchive.S_LUMP.size)
-            if len(entry) < WADArchive.S_LUMP.size:
-                continue
-            offset, size, name = WADArchive.S_LUMP.unpack(entry)
+        directory = self.read_at(dir_offset, entry_count * WADArchive.S_LUMP.size)
+        for entry_offset in range(0, len(directory) - WADArchive.S_LUMP.size + 1, WADArchive.S_LUMP.size):
+            offset, size, name = WADArchive.S_LUMP.unpack_from(directory, entry_offset)
 
             # Keep name before first null character.
             try:
@@ -47,6 +112,41 @@ class WADArchive(ArchiveBase):
 
         self.is_main = (wad_type == WADArchive.TYPE_IWAD)
 
+    def read_at(self, offset: int, size: int) -> Union[bytes, memoryview]:
+        if self.view is not None:
+            return self.view[offset:offset + size]
+
+        self.file.seek(offset)
+        return self.file.read(size)
+
     def get_file_data(self, file: WADArchiveFile) -> bytes:
+        if self.view is not None:
+            return self.view[file.offset:file.offset + file.size].tobytes()
+
         self.file.seek(file.offset)
         return self.file.read(file.size)
+
+    def get_file_start(self, file: WADArchiveFile, size: int) -> bytes:
+        self.file.seek(file.offset)
+        return self.file.read(min(size, file.size))
+
+    def get_file_view(self, file: WADArchiveFile) -> memoryview:
+        if self.view is not None:
+            return self.view[file.offset:file.offset + file.size]
+
+        return super().get_file_view(file)
+
+    def close(self):
+        if self.view is None:
+            super().close()
+            return
+
+        self.logger.debug('Closing "{}"'.format(self.name))
+
+        # Views of lumps that are still referenced keep the mapping alive. It is then unmapped once those are gone.
+        self.view.release()
+        if isinstance(self.file, mmap.mmap):
+            try:
+                self.file.close()
+            except BufferError:
+                pass
@@ -4,17 +4,22 @@ from typing import IO, List, Optional
 from zipfile import ZipFile, BadZipFile
 
 from archives.archivebase import ArchiveBase
+from archives.lumpcache import LumpCache
 from archives.wadarchive import WADArchive
 from archives.ziparchivefile import ZIPArchiveFile
+from utils.inflate import MEMORY_LIMIT_DEFAULT, inflate_zip_file
 from utils.logger import Logger
 
 
 class ZIPArchive(ArchiveBase):
 
-    def __init__(self, name: str, file: IO[bytes], logger: Logger):
+    def __init__(self, name: str, file: IO[bytes], logger: Logger, memory_limit: int = MEMORY_LIMIT_DEFAULT):
         self.zip_file: Optional[ZipFile] = None
         self.child_wads: List[WADArchive] = []
 
+        # Size up to which WAD files in the archive root are decompressed into memory. See utils.inflate.
+        self.memory_limit: int = memory_limit
+
         super().__init__(name, file, logger)
 
     def read(self, file: IO[bytes]):
@@ -30,8 +35,8 @@ class ZIPArchive(ArchiveBase):
             if ext == '.wad' and len(file_base_path) == 0:
                 self.logger.debug('Adding files from {}.'.format(file_info.filename))
 
-                wad_archive_file = self.zip_file.open(file_info.filename, 'r')
-                wad_archive = WADArchive('{}/{}'.format(self.name, file_info.filename), wad_archive_file, self.logger)
+                wad_archive_file = inflate_zip_file(self.zip_file, file_info, self.memory_limit)
+                wad_archive = WADArchive.from_file_mapped('{}/{}'.format(self.name, file_info.filename), wad_archive_file, self.logger)
                 self.child_wads.append(wad_archive)
 
                 for wad_file in wad_archive.files:
@@ -40,6 +45,12 @@ class ZIPArchive(ArchiveBase):
             else:
                 self.file_add(ZIPArchiveFile(self, file_info.filename, file_info.file_size))
 
+    def set_cache(self, cache: LumpCache):
+        super().set_cache(cache)
+
+        for child_wad in self.child_wads:
+            child_wad.set_cache(cache)
+
     def get_file_data(self, file: ZIPArchiveFile) -> bytes:
         try:
             return self.zip_file.read(file.name)
@@ -47,6 +58,16 @@ class ZIPArchive(ArchiveBase):
             self.logger.warn('Cannot get data for Zip file entry. Returning no data. {}'.format(e))
             return bytes()
 
+    def get_file_start(self, file: ZIPArchiveFile, size: int) -> bytes:
+
+        # Only the start of the file is decompressed.
+        try:
+            with self.zip_file.open(file.name) as f:
+                return f.read(size)
+        except BadZipFile as e:
+            self.logger.warn('Cannot get data for Zip file entry. Returning no data. {}'.format(e))
+            return bytes()
+
     def close(self):
         super().close()
 
@@ -0,0 +1,104 @@
+import re
+import sys
+import tempfile
+from optparse import OptionParser
+from pathlib import Path
+from typing import List
+
+from benchmarks.cases import create_indexer, parser_benchmarks, stage_benchmarks
+from benchmarks.corpus import CorpusGenerator
+from benchmarks.harness import Benchmark, BenchmarkResult, find_regressions, load_results, save_results
+from utils.config import Config
+from utils.logger import Logger
+
+
+def benchmark(options) -> int:
+    config = Config()
+    logger = Logger(config.get('paths.logs'), verbosity=options.verbosity)
+
+    with tempfile.TemporaryDirectory(prefix='wadindex-benchmark-') as temp_dir:
+        corpus_path = Path(temp_dir)
+
+        logger.info('Generating corpus with seed {} and map size {}...'.format(options.seed, options.size))
+        corpus = CorpusGenerator(options.seed).write_corpus(corpus_path, options.size)
+        indexer = create_indexer(config, logger, corpus_path, corpus)
+
+        benchmarks: List[Benchmark] = []
+        benchmarks.extend(parser_benchmarks(CorpusGenerator(options.seed), options.size, logger))
+        benchmarks.extend(stage_benchmarks(indexer, corpus))
+
+        if options.filter:
+            pattern = re.compile(options.filter)
+            benchmarks = [item for item in benchmarks if pattern.search(item.name)]
+
+        results: List[BenchmarkResult] = []
+        for item in benchmarks:
+            result = BenchmarkResult(item.name, item.group, item.measure(options.repeat))
+            results.append(result)
+            logger.info('{:<48} median {:>10.3f} ms, min {:>10.3f} ms'.format(
+                item.name, result.median * 1000, result.min * 1000
+            ))
+
+        indexer.close()
+
+    if options.output:
+        save_results(Path(options.output), results, {
+            'seed': options.seed,
+            'size': options.size,
+            'repeat': options.repeat,
+        })
+        logger.info('Wrote results to "{}".'.format(options.output))
+
+    if options.baseline:
+        baseline = load_results(Path(options.baseline))
+        parameters = baseline.get('parameters', {})
+        if parameters.get('seed') != options.seed or parameters.get('size') != options.size:
+            logger.warn('Baseline was generated with a different corpus, comparison is not meaningful.')
+
+        regressions = find_regressions(results, baseline, options.threshold)
+        for regression in regressions:
+            logger.error('{} regressed from {:.3f} ms to {:.3f} ms ({:+.0%}).'.format(
+                regression.name, regression.baseline * 1000, regression.current * 1000, regression.ratio - 1.0
+            ))
+
+        if len(regressions):
+            return 1
+
+        logger.info('No regressions against "{}".'.format(options.baseline))
+
+    return 0
+
+
+def run():
+    parser = OptionParser('Usage: benchmark.py [options]')
+
+    parser.add_option("--verbosity", dest="verbosity",
+                      default=Logger.VERBOSITY_INFO, type='int',
+                      help="Set visible logging verbosity level. From 0 for least to 4 for most verbose.")
+    parser.add_option("--seed", dest="seed",
+                      default=1, type='int',
+                      help="Seed for generating the synthetic corpus.")
+    parser.add_option("--size", dest="size",
+                      default=32, type='int',
+                      help="Width and height in vertices of the grid that generated maps are made of.")
+    parser.add_option("--repeat", dest="repeat",
+                      default=5, type='int',
+                      help="Number of timed runs of each benchmark.")
+    parser.add_option("--filter", dest="filter",
+                      help="Only run benchmarks whose name matches this regular expression.")
+    parser.add_option("--output", dest="output",
+                      help="Write results to this JSON file, for use as a later baseline.")
+    parser.add_option("--baseline", dest="baseline",
+                      help="Compare results against a JSON file written with --output.")
+    parser.add_option("--threshold", dest="threshold",
+                      default=0.1, type='float',
+                      help="Fraction that a median time may exceed the baseline by before counting as a regression.")
+
+    (options, args) = parser.parse_args()
+    if options.repeat < 1:
+        parser.error('--repeat must be at least 1.')
+
+    sys.exit(benchmark(options))
+
+
+run()
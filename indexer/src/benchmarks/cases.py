@@ -0,0 +1,211 @@
+from io import BytesIO, StringIO
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from archives.archivebase import ArchiveBase
+from archives.wadarchive import WADArchive
+from archives.ziparchive import ZIPArchive
+from benchmarks.corpus import CorpusGenerator, wad
+from benchmarks.harness import Benchmark
+from doom.doom_image import DoomImage
+from doom.language_parser import LanguageParser
+from doom.map.binary_map_reader import BinaryMapReader
+from doom.map.map_data_finder import MapDataFinder, MapData
+from doom.map.udmf_map_reader import UDMFMapReader
+from doom.mapinfo.zmapinfo_parser import ZMapInfoParser
+from doom.nodes.nodes_finder import NodesFinder
+from doom.palette import Palette
+from extractors.extractedinfo import ExtractedInfo
+from extractors.extractorbase import ExtractorBase
+from indexer.game import Game
+from indexer.indexer import EXTRACTORS, Indexer
+from textparser.textparser import TextParser
+from utils.config import Config
+from utils.file_hash import file_hash
+from utils.logger import Logger
+from writers.writerbase import WriterBase
+
+
+CorpusPaths = Dict[str, Path]
+
+
+def _find_map_data(archive: ArchiveBase) -> List[MapData]:
+    map_data_finder = MapDataFinder()
+    map_data_finder.add_from_archive(archive)
+    return list(map_data_finder.map_data.values())
+
+
+def _create_info(path_local: Path, path_collection: Path) -> ExtractedInfo:
+    stat = path_local.stat()
+    return ExtractedInfo(
+        path_local,
+        path_local.parents[0] / path_local.stem,
+        path_collection,
+        path_collection.parents[0] / path_collection.stem,
+        path_local.stem,
+        stat.st_size,
+        int(stat.st_mtime),
+        file_hash(path_local),
+    )
+
+
+def parser_benchmarks(generator: CorpusGenerator, map_size: int, logger: Logger) -> List[Benchmark]:
+    """
+    Returns benchmarks for archive readers and parsers, run against in-memory data.
+
+    :param generator:
+    :param map_size:
+    :param logger:
+    :return:
+    """
+
+    vanilla_data = generator.vanilla_wad(map_size)
+    hexen_data = generator.hexen_wad(map_size)
+    pk3_data = generator.pk3(map_size)
+    udmf_data = wad(generator.udmf_map_lumps('MAP01', map_size))
+
+    vanilla_wad = WADArchive('vanilla.wad', BytesIO(vanilla_data), logger)
+    hexen_wad = WADArchive('hexen.wad', BytesIO(hexen_data), logger)
+    udmf_wad = WADArchive('udmf.wad', BytesIO(udmf_data), logger)
+    pk3 = ZIPArchive('udmf.pk3', BytesIO(pk3_data), logger)
+
+    vanilla_map_data = _find_map_data(vanilla_wad)
+    hexen_map_data = _find_map_data(hexen_wad)
+    udmf_map_data = _find_map_data(udmf_wad)
+
+    vanilla_maps = [BinaryMapReader(Game.DOOM2, logger).read(map_data) for map_data in vanilla_map_data]
+
+    playpal_data = generator.playpal()
+    palette = Palette.from_playpal_data(playpal_data)
+    patch_data = generator.patch(320, 200)
+    text = generator.text_file('Benchmark', 'benchmark')
+    language = generator.language(1024)
+    zmapinfo_file = pk3.file_find_basename('zmapinfo')
+
+    def read_maps(reader_class, map_data_list: List[MapData]):
+        reader = reader_class(Game.DOOM2, logger)
+        for map_data in map_data_list:
+            reader.read(map_data)
+
+    def find_nodes(_):
+        for map, map_data in zip(vanilla_maps, vanilla_map_data):
+            reader = NodesFinder(map, map_data, logger, 'benchmark').get_reader()
+            if reader is not None:
+                reader.read()
+
+    def parse_text(_):
+        TextParser(logger).parse(StringIO(text))
+
+    return [
+        Benchmark('archive.wad.read', 'parsers', lambda data: WADArchive('vanilla.wad', data, logger), lambda: BytesIO(vanilla_data)),
+        Benchmark('archive.zip.read', 'parsers', lambda data: ZIPArchive('udmf.pk3', data, logger), lambda: BytesIO(pk3_data)),
+        Benchmark('map.binary.doom', 'parsers', lambda _: read_maps(BinaryMapReader, vanilla_map_data)),
+        Benchmark('map.binary.hexen', 'parsers', lambda _: read_maps(BinaryMapReader, hexen_map_data)),
+        Benchmark('map.udmf', 'parsers', lambda _: read_maps(UDMFMapReader, udmf_map_data)),
+        Benchmark('map.nodes', 'parsers', find_nodes),
+        Benchmark('image.doom', 'parsers', lambda _: DoomImage.from_data(patch_data, palette)),
+        Benchmark('image.palette', 'parsers', lambda _: Palette.from_playpal_data(playpal_data)),
+        Benchmark('text.parse', 'parsers', parse_text),
+        Benchmark('language.parse', 'parsers', lambda _: LanguageParser(language).parse_locale_strings(Game.DOOM2)),
+        Benchmark('mapinfo.zmapinfo', 'parsers', lambda _: ZMapInfoParser(zmapinfo_file).parse()),
+    ]
+
+
+class ExtractorStage:
+    """
+    Benchmarks a single extractor or writer against one corpus file. Setup runs all extractors that precede it, so
+    that only the stage itself is timed.
+    """
+
+    def __init__(self, indexer: Indexer, path_local: Path, path_collection: Path, extractor_count: int,
+                 writer: Optional[WriterBase] = None):
+        self.indexer: Indexer = indexer
+        self.path_local: Path = path_local
+        self.path_collection: Path = path_collection
+        self.extractor_count: int = extractor_count
+        self.writer: Optional[WriterBase] = writer
+
+    @property
+    def extractors(self) -> List[ExtractorBase]:
+        return self.indexer.extractors[:self.extractor_count]
+
+    def setup(self) -> ExtractedInfo:
+        info = _create_info(self.path_local, self.path_collection)
+
+        # Writers run after all extractors, so only run the preceding ones for an extractor stage.
+        extractors = self.extractors if self.writer is not None else self.extractors[:-1]
+        for extractor in extractors:
+            extractor.extract(info)
+
+        return info
+
+    def run(self, info: ExtractedInfo):
+        if self.writer is not None:
+            self.writer.write(info)
+        else:
+            self.extractors[-1].extract(info)
+
+    def teardown(self, info: ExtractedInfo):
+        for extractor in reversed(self.extractors):
+            extractor.cleanup(info)
+
+
+def stage_benchmarks(indexer: Indexer, corpus: CorpusPaths) -> List[Benchmark]:
+    """
+    Returns benchmarks for every extractor, every writer and the complete indexing process of each corpus file.
+
+    :param indexer:
+    :param corpus:
+    :return:
+    """
+
+    benchmarks: List[Benchmark] = []
+
+    files: List[Tuple[str, Path, Path]] = []
+    for key, path in corpus.items():
+        if key == 'iwads':
+            continue
+        files.append((key, path, path.relative_to(corpus['iwads'].parent / 'collection')))
+
+    for key, path_local, path_collection in files:
+        for index, extractor_class in enumerate(EXTRACTORS):
+            stage = ExtractorStage(indexer, path_local, path_collection, index + 1)
+            benchmarks.append(Benchmark(
+                'extractor.{}.{}'.format(extractor_class.__name__, key), 'extractors',
+                stage.run, stage.setup, stage.teardown
+            ))
+
+        for writer in indexer.writers:
+            stage = ExtractorStage(indexer, path_local, path_collection, len(EXTRACTORS), writer)
+            benchmarks.append(Benchmark(
+                'writer.{}.{}'.format(type(writer).__name__, key), 'writers',
+                stage.run, stage.setup, stage.teardown
+            ))
+
+        benchmarks.append(Benchmark(
+            'index.{}'.format(key), 'index',
+            lambda _, path_local=path_local, path_collection=path_collection: indexer.index_file(path_local, path_collection)
+        ))
+
+    return benchmarks
+
+
+def create_indexer(config: Config, logger: Logger, corpus_path: Path, corpus: CorpusPaths) -> Indexer:
+    """
+    Returns an indexer that reads IWADs from the corpus and writes output below it.
+
+    :param config:
+    :param logger:
+    :param corpus_path:
+    :param corpus:
+    :return:
+    """
+
+    config.values['paths']['iwads'] = str(corpus['iwads'])
+    for writer_key, writer_config in config.values['writers'].items():
+        output_path = corpus_path / 'output' / writer_key
+        output_path.mkdir(parents=True, exist_ok=True)
+        writer_config['output_path'] = str(output_path)
+
+    return Indexer(config, logger)
+
@@ -0,0 +1,586 @@
+import io
+import zlib
+from pathlib import Path
+from random import Random
+from struct import Struct
+from typing import Dict, List, Tuple
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED, ZIP_STORED
+
+
+Lump = Tuple[str, bytes]
+
+S_WAD_HEADER: Struct = Struct('<4sII')
+S_WAD_LUMP: Struct = Struct('<II8s')
+
+S_VERTEX: Struct = Struct('<hh')
+S_LINE_DOOM: Struct = Struct('<HHHHHHH')
+S_LINE_HEXEN: Struct = Struct('<HHHBBBBBBHH')
+S_SIDE: Struct = Struct('<hh8s8s8sh')
+S_SECTOR: Struct = Struct('<hh8s8shhh')
+S_THING_DOOM: Struct = Struct('<hhHHH')
+S_THING_HEXEN: Struct = Struct('<HhhhHHHBBBBBB')
+
+S_SEG: Struct = Struct('<HHhHhh')
+S_SUB_SECTOR: Struct = Struct('<hh')
+S_NODE: Struct = Struct('<hhhhhhhhhhhhHH')
+
+S_GL_VERTEX: Struct = Struct('<II')
+S_GL_SEG: Struct = Struct('<HHHHH')
+S_GL_SUB_SECTOR: Struct = Struct('<HH')
+
+S_EXTENDED_SEG: Struct = Struct('<IIHB')
+S_EXTENDED_NODE: Struct = Struct('<hhhhhhhhhhhhII')
+
+S_PATCH_HEADER: Struct = Struct('<HHhh')
+
+THING_TYPES: List[int] = [1, 2, 3, 4, 11, 9, 3001, 3002, 3004, 3005, 2001, 2002, 2007, 2008, 2011, 2014, 2015]
+FLAT_NAMES: List[bytes] = [b'FLOOR4_8', b'CEIL3_5', b'FLAT1', b'NUKAGE1', b'RROCK19']
+TEXTURE_NAMES: List[bytes] = [b'STARTAN2', b'BROWN1', b'METAL', b'SUPPORT2', b'-']
+
+GRID_SPACING: int = 128
+
+ZIP_TIMESTAMP: Tuple[int, int, int, int, int, int] = (2000, 1, 1, 0, 0, 0)
+
+
+def wad(lumps: List[Lump], wad_type: str = 'PWAD') -> bytes:
+    """
+    Returns the contents of a WAD file containing the given lumps, with the directory at the end.
+
+    :param lumps:
+    :param wad_type:
+    :return:
+    """
+
+    output = io.BytesIO()
+    output.write(bytes(S_WAD_HEADER.size))
+
+    directory: List[Tuple[int, int, bytes]] = []
+    for name, data in lumps:
+        directory.append((output.tell(), len(data), name.encode('latin1')))
+        output.write(data)
+
+    directory_offset = output.tell()
+    for offset, size, name in directory:
+        output.write(S_WAD_LUMP.pack(offset, size, name))
+
+    output.seek(0)
+    output.write(S_WAD_HEADER.pack(wad_type.encode('latin1'), len(directory), directory_offset))
+
+    return output.getvalue()
+
+
+def zip_archive(files: Dict[str, bytes], compress: bool = True) -> bytes:
+    output = io.BytesIO()
+    with ZipFile(output, 'w', ZIP_DEFLATED if compress else ZIP_STORED) as zip_file:
+        for name, data in files.items():
+
+            # Use a fixed timestamp so that the output does not depend on when it was generated.
+            zip_file.writestr(ZipInfo(name, ZIP_TIMESTAMP), data, zip_file.compression)
+
+    return output.getvalue()
+
+
+class CorpusGenerator:
+    """
+    Generates deterministic synthetic Doom data for benchmarking.
+
+    Map geometry is a grid of square sectors with size x size vertices. All output depends only on the seed, so the
+    same corpus is generated for every run.
+    """
+
+    def __init__(self, seed: int = 0):
+        self.random: Random = Random(seed)
+
+    def playpal(self) -> bytes:
+        return bytes(self.random.randrange(256) for _ in range(768 * 14))
+
+    def colormap(self) -> bytes:
+        return bytes(self.random.randrange(256) for _ in range(256 * 34))
+
+    def patch(self, width: int, height: int) -> bytes:
+        """
+        Returns a Doom format picture with every column made up of posts of at most 128 pixels.
+
+        :param width:
+        :param height:
+        :return:
+        """
+
+        columns = io.BytesIO()
+        offsets: List[int] = []
+        columns_offset = S_PATCH_HEADER.size + width * 4
+
+        for _ in range(width):
+            offsets.append(columns_offset + columns.tell())
+
+            top = 0
+            while top < height:
+                length = min(128, height - top)
+                columns.write(bytes([top if top < 255 else 254, length, 0]))
+                columns.write(bytes(self.random.randrange(256) for _ in range(length)))
+                columns.write(b'\x00')
+                top += length
+            columns.write(b'\xFF')
+
+        header = S_PATCH_HEADER.pack(width, height, 0, 0)
+        offset_data = Struct('<' + 'I' * width).pack(*offsets)
+
+        return header + offset_data + columns.getvalue()
+
+    def raw_graphic(self, width: int, height: int) -> bytes:
+        return bytes(self.random.randrange(256) for _ in range(width * height))
+
+    def midi(self, note_count: int = 256) -> bytes:
+        track = io.BytesIO()
+
+        # Tempo.
+        track.write(b'\x00\xFF\x51\x03\x07\xA1\x20')
+        for _ in range(note_count):
+            note = self.random.randrange(36, 96)
+            track.write(bytes([0x00, 0x90, note, 0x64]))
+            track.write(bytes([0x60, 0x80, note, 0x40]))
+        track.write(b'\x00\xFF\x2F\x00')
+
+        track_data = track.getvalue()
+        header = b'MThd' + Struct('>IHHH').pack(6, 0, 1, 96)
+        return header + b'MTrk' + Struct('>I').pack(len(track_data)) + track_data
+
+    def mus(self, note_count: int = 256) -> bytes:
+        score = io.BytesIO()
+        for _ in range(note_count):
+            note = self.random.randrange(36, 96)
+
+            # Play note with volume, then release it after a delay.
+            score.write(bytes([0x10, 0x80 | note, 0x64]))
+            score.write(bytes([0x80, note, 0x10]))
+        score.write(b'\x60')
+
+        score_data = score.getvalue()
+        instruments = [0]
+        header_size = 16 + len(instruments) * 2
+        header = b'MUS\x1A' + Struct('<HHHHHH').pack(len(score_data), header_size, 1, 0, len(instruments), 0)
+        header += Struct('<' + 'H' * len(instruments)).pack(*instruments)
+
+        return header + score_data
+
+    def _grid(self, size: int):
+        """
+        Returns vertices, lines as (v1, v2, two-sided) and sector indices per line side for a grid of sectors.
+
+        :param size:
+        :return:
+        """
+
+        vertices: List[Tuple[int, int]] = []
+        for y in range(size):
+            for x in range(size):
+                vertices.append((x * GRID_SPACING - 16384, y * GRID_SPACING - 16384))
+
+        cells = size - 1
+
+        def cell(x: int, y: int) -> int:
+            if x < 0 or y < 0 or x >= cells or y >= cells:
+                return -1
+            return y * cells + x
+
+        lines: List[Tuple[int, int, int, int]] = []
+        for y in range(size):
+            for x in range(size):
+                index = y * size + x
+                if x < cells:
+                    lines.append((index, index + 1, cell(x, y), cell(x, y - 1)))
+                if y < cells:
+                    lines.append((index + size, index, cell(x, y), cell(x - 1, y)))
+
+        return vertices, lines, cells * cells
+
+    def binary_map(self, name: str, size: int, hexen: bool = False) -> List[Lump]:
+        """
+        Returns the lumps of a Doom or Hexen format map.
+
+        :param name:
+        :param size:
+        :param hexen:
+        :return:
+        """
+
+        vertices, grid_lines, sector_count = self._grid(size)
+        random = self.random
+
+        vertex_data = io.BytesIO()
+        for x, y in vertices:
+            vertex_data.write(S_VERTEX.pack(x, y))
+
+        sectors = io.BytesIO()
+        for _ in range(sector_count):
+            floor = random.randrange(-64, 64, 8)
+            sectors.write(S_SECTOR.pack(
+                floor, floor + random.randrange(64, 256, 8),
+                random.choice(FLAT_NAMES), random.choice(FLAT_NAMES),
+                random.randrange(96, 256, 16), 0, random.randrange(0, 10),
+            ))
+
+        sides = io.BytesIO()
+        lines = io.BytesIO()
+        side_count = 0
+        for v1, v2, sector_front, sector_back in grid_lines:
+            side_front = 0xFFFF
+            side_back = 0xFFFF
+            flags = 0x0001
+            if sector_front < 0:
+                sector_front, sector_back = sector_back, -1
+                v1, v2 = v2, v1
+
+            sides.write(S_SIDE.pack(0, 0, b'-', b'-', random.choice(TEXTURE_NAMES), sector_front))
+            side_front = side_count
+            side_count += 1
+
+            if sector_back >= 0:
+                sides.write(S_SIDE.pack(0, 0, random.choice(TEXTURE_NAMES), random.choice(TEXTURE_NAMES), b'-', sector_back))
+                side_back = side_count
+                side_count += 1
+                flags = 0x0004
+
+            if hexen:
+                lines.write(S_LINE_HEXEN.pack(v1, v2, flags, 0, 0, 0, 0, 0, 0, side_front, side_back))
+            else:
+                lines.write(S_LINE_DOOM.pack(v1, v2, flags, 0, 0, side_front, side_back))
+
+        things = io.BytesIO()
+        extent = (size - 1) * GRID_SPACING
+        for index in range(max(sector_count // 2, 4)):
+            x = random.randrange(extent) - 16384
+            y = random.randrange(extent) - 16384
+            thing_type = THING_TYPES[index] if index < 4 else random.choice(THING_TYPES)
+            if hexen:
+                things.write(S_THING_HEXEN.pack(0, x, y, 0, 0, thing_type, 0x0707, 0, 0, 0, 0, 0, 0))
+            else:
+                things.write(S_THING_DOOM.pack(x, y, 0, thing_type, 0x0007))
+
+        line_count = len(grid_lines)
+        lumps: List[Lump] = [
+            (name, b''),
+            ('THINGS', things.getvalue()),
+            ('LINEDEFS', lines.getvalue()),
+            ('SIDEDEFS', sides.getvalue()),
+            ('VERTEXES', vertex_data.getvalue()),
+            ('SEGS', b''.join(S_SEG.pack(index, index + 1, 0, index % line_count, 0, 0) for index in range(line_count))),
+            ('SSECTORS', b''.join(S_SUB_SECTOR.pack(1, index) for index in range(line_count))),
+            ('NODES', b''.join(S_NODE.pack(*([0] * 12), 0x8000, 0x8000) for _ in range(max(line_count - 1, 1)))),
+            ('SECTORS', sectors.getvalue()),
+            ('REJECT', bytes((sector_count * sector_count + 7) // 8)),
+            ('BLOCKMAP', bytes(8)),
+        ]
+        if hexen:
+            lumps.append(('BEHAVIOR', b'ACS\x00' + bytes(12)))
+
+        return lumps
+
+    def gl_nodes(self, name: str, vertex_count: int, segment_count: int) -> List[Lump]:
+        """
+        Returns version 2 GLBSP node lumps for a map.
+
+        :param name:
+        :param vertex_count:
+        :param segment_count:
+        :return:
+        """
+
+        random = self.random
+
+        vertices = b'gNd2' + b''.join(
+            S_GL_VERTEX.pack(random.randrange(1 << 24), random.randrange(1 << 24)) for _ in range(vertex_count)
+        )
+        segments = b''.join(
+            S_GL_SEG.pack(index % vertex_count, (index + 1) % vertex_count | 0x8000, index, 0, 0)
+            for index in range(segment_count)
+        )
+        sub_sectors = b''.join(S_GL_SUB_SECTOR.pack(1, index) for index in range(segment_count))
+        nodes = b''.join(S_NODE.pack(*([0] * 12), 0x8000, 0x8000) for _ in range(max(segment_count - 1, 1)))
+
+        return [
+            ('GL_{}'.format(name) if len(name) <= 5 else 'GL_LEVEL', b''),
+            ('GL_VERT', vertices),
+            ('GL_SEGS', segments),
+            ('GL_SSECT', sub_sectors),
+            ('GL_NODES', nodes),
+        ]
+
+    def extended_nodes(self, vertex_count: int, segment_count: int, compressed: bool = False) -> bytes:
+        """
+        Returns a ZDoom extended NODES lump.
+
+        :param vertex_count:
+        :param segment_count:
+        :param compressed:
+        :return:
+        """
+
+        random = self.random
+
+        data = io.BytesIO()
+        data.write(Struct('<II').pack(vertex_count, segment_count))
+        for _ in range(segment_count):
+            data.write(Struct('<II').pack(random.randrange(1 << 24), random.randrange(1 << 24)))
+
+        data.write(Struct('<I').pack(segment_count))
+        for _ in range(segment_count):
+            data.write(Struct('<I').pack(1))
+
+        data.write(Struct('<I').pack(segment_count))
+        for index in range(segment_count):
+            data.write(S_EXTENDED_SEG.pack(index % vertex_count, (index + 1) % vertex_count, index, 0))
+
+        node_count = max(segment_count - 1, 1)
+        data.write(Struct('<I').pack(node_count))
+        for _ in range(node_count):
+            data.write(S_EXTENDED_NODE.pack(*([0] * 12), 0x80000000, 0x80000000))
+
+        if compressed:
+            return b'ZNOD' + zlib.compress(data.getvalue())
+
+        return b'XNOD' + data.getvalue()
+
+    def udmf_map(self, size: int, namespace: str = 'zdoom') -> str:
+        vertices, grid_lines, sector_count = self._grid(size)
+        random = self.random
+
+        blocks: List[str] = ['namespace = "{}";\n'.format(namespace)]
+        for x, y in vertices:
+            blocks.append('vertex\n{{\nx = {:.3f};\ny = {:.3f};\n}}\n'.format(x, y))
+
+        side_index = 0
+        sides: List[str] = []
+        for v1, v2, sector_front, sector_back in grid_lines:
+            if sector_front < 0:
+                sector_front, sector_back = sector_back, -1
+                v1, v2 = v2, v1
+
+            line = 'linedef\n{{\nv1 = {};\nv2 = {};\nsidefront = {};\n'.format(v1, v2, side_index)
+            sides.append('sidedef\n{{\nsector = {};\ntexturemiddle = "{}";\n}}\n'.format(
+                sector_front, random.choice(TEXTURE_NAMES).decode('latin1')
+            ))
+            side_index += 1
+
+            if sector_back >= 0:
+                line += 'sideback = {};\ntwosided = true;\n'.format(side_index)
+                sides.append('sidedef\n{{\nsector = {};\ntexturetop = "{}";\n}}\n'.format(
+                    sector_back, random.choice(TEXTURE_NAMES).decode('latin1')
+                ))
+                side_index += 1
+            else:
+                line += 'blocking = true;\n'
+
+            blocks.append(line + '}\n')
+
+        blocks.extend(sides)
+
+        for _ in range(sector_count):
+            floor = random.randrange(-64, 64, 8)
+            blocks.append('sector\n{{\nheightfloor = {};\nheightceiling = {};\ntexturefloor = "{}";\ntextureceiling = "{}";\nlightlevel = {};\n}}\n'.format(
+                floor, floor + random.randrange(64, 256, 8),
+                random.choice(FLAT_NAMES).decode('latin1'), random.choice(FLAT_NAMES).decode('latin1'),
+                random.randrange(96, 256, 16),
+            ))
+
+        extent = (size - 1) * GRID_SPACING
+        for index in range(max(sector_count // 2, 4)):
+            thing_type = THING_TYPES[index] if index < 4 else random.choice(THING_TYPES)
+            blocks.append('thing\n{{\nx = {:.3f};\ny = {:.3f};\ntype = {};\nskill1 = true;\nskill2 = true;\nskill3 = true;\nskill4 = true;\nskill5 = true;\nsingle = true;\n}}\n'.format(
+                float(random.randrange(extent) - 16384), float(random.randrange(extent) - 16384), thing_type,
+            ))
+
+        return ''.join(blocks)
+
+    def udmf_map_lumps(self, name: str, size: int) -> List[Lump]:
+        return [
+            (name, b''),
+            ('TEXTMAP', self.udmf_map(size).encode('latin1')),
+            ('ENDMAP', b''),
+        ]
+
+    def text_file(self, title: str, filename: str) -> str:
+        description = ' '.join(self.random.choice(['a', 'synthetic', 'map', 'with', 'lots', 'of', 'rooms', 'and', 'monsters']) for _ in range(80))
+
+        return '\n'.join([
+            '===========================================================================',
+            'Archive Maintainer      : Benchmark',
+            'Update to               : none',
+            'Advanced engine needed  : None',
+            'Primary purpose         : Single+Coop play',
+            '===========================================================================',
+            'Title                   : {}'.format(title),
+            'Filenames               : {}.wad'.format(filename),
+            'Release date            : January 2024',
+            'Author                  : Benchmark Author',
+            'Email Address           : benchmark@example.com',
+            'Other Files By Author   : None',
+            'Misc. Author Info       : None',
+            '',
+            'Description             : {}'.format(description),
+            '',
+            'Additional Credits to   : Everyone',
+            '===========================================================================',
+            '* What is included *',
+            '',
+            'New levels              : 2',
+            'Sounds                  : No',
+            'Music                   : Yes',
+            'Graphics                : Yes',
+            'Dehacked/BEX Patch      : No',
+            'Demos                   : No',
+            'Other                   : No',
+            'Other files required    : None',
+            '',
+            '* Play Information *',
+            '',
+            'Game                    : DOOM2',
+            'Map #                   : MAP01-MAP02',
+            'Single Player           : Designed for',
+            'Cooperative 2-4 Player  : Yes',
+            'Deathmatch 2-4 Player   : No',
+            'Difficulty Settings     : Yes',
+            '',
+            '* Construction *',
+            '',
+            'Base                    : New from scratch',
+            'Build Time              : A few milliseconds',
+            'Editor(s) used          : A random number generator',
+            'Known Bugs              : None',
+            'May Not Run With        : Nothing known',
+            'Tested With             : Nothing',
+            '',
+        ])
+
+    def zmapinfo(self, map_names: List[str]) -> str:
+        blocks: List[str] = []
+        for index, map_name in enumerate(map_names):
+            blocks.append('map {} "Synthetic map {}"\n{{\n    music = "D_RUNNIN"\n    par = {}\n}}\n'.format(
+                map_name, index + 1, 30 + index * 15,
+            ))
+
+        return '\n'.join(blocks)
+
+    def language(self, string_count: int = 64) -> str:
+        lines = ['[enu default]']
+        for index in range(string_count):
+            lines.append('BENCH_STRING_{} = "Synthetic string {}";'.format(index, index))
+
+        return '\n'.join(lines) + '\n'
+
+    def iwad(self, map_name: str) -> bytes:
+        """
+        Returns a minimal IWAD with the lumps that the indexer reads from an IWAD.
+
+        :param map_name:
+        :return:
+        """
+
+        return wad([
+            ('PLAYPAL', self.playpal()),
+            ('COLORMAP', self.colormap()),
+            ('TITLEPIC', self.patch(320, 200)),
+            ('D_RUNNIN', self.mus(64)),
+            ('HELP', self.patch(320, 200)),
+        ] + self.binary_map(map_name, 4), 'IWAD')
+
+    def vanilla_wad(self, map_size: int, map_count: int = 2) -> bytes:
+        lumps: List[Lump] = []
+        for index in range(map_count):
+            map_name = 'MAP{:02}'.format(index + 1)
+            map_lumps = self.binary_map(map_name, map_size)
+            lumps.extend(map_lumps)
+
+            # Alternate between GLBSP and extended nodes.
+            line_count = len(map_lumps[2][1]) // S_LINE_DOOM.size
+            if index % 2 == 0:
+                lumps.extend(self.gl_nodes(map_name, map_size * 2, line_count))
+            else:
+                nodes_index = [name for name, _ in lumps].index('NODES', len(lumps) - len(map_lumps))
+                lumps[nodes_index] = ('NODES', self.extended_nodes(map_size * 2, line_count, compressed=(index % 4 == 3)))
+
+        lumps.extend([
+            ('TITLEPIC', self.patch(320, 200)),
+            ('INTERPIC', self.raw_graphic(320, 200)),
+            ('CREDIT', self.patch(320, 200)),
+            ('D_RUNNIN', self.mus()),
+            ('D_STALKS', self.midi()),
+        ])
+
+        return wad(lumps)
+
+    def hexen_wad(self, map_size: int, map_count: int = 2) -> bytes:
+        lumps: List[Lump] = []
+        for index in range(map_count):
+            lumps.extend(self.binary_map('MAP{:02}'.format(index + 1), map_size, hexen=True))
+
+        lumps.append(('TITLE', self.raw_graphic(320, 200)))
+
+        return wad(lumps)
+
+    def pk3(self, map_size: int, map_count: int = 2) -> bytes:
+        """
+        Returns a PK3 with UDMF maps in nested WADs, a root level WAD, graphics, music and text lumps.
+
+        :param map_size:
+        :param map_count:
+        :return:
+        """
+
+        files: Dict[str, bytes] = {}
+
+        map_names: List[str] = []
+        for index in range(map_count):
+            map_name = 'MAP{:02}'.format(index + 1)
+            map_names.append(map_name)
+            files['maps/{}.wad'.format(map_name)] = wad(self.udmf_map_lumps(map_name, map_size))
+
+        files['resources.wad'] = wad([
+            ('CREDIT', self.patch(320, 200)),
+            ('D_STALKS', self.mus()),
+        ])
+        files['graphics/titlepic.lmp'] = self.patch(320, 200)
+        files['music/d_runnin.mid'] = self.midi()
+        files['zmapinfo.txt'] = self.zmapinfo(map_names).encode('latin1')
+        files['language.enu'] = self.language().encode('latin1')
+
+        return zip_archive(files)
+
+    def write_corpus(self, path: Path, map_size: int) -> Dict[str, Path]:
+        """
+        Writes a collection of idgames style zip files and a directory of IWADs.
+
+        :param path:
+        :param map_size:
+        :return: A dictionary of named zip file paths, plus the IWAD directory as "iwads".
+        """
+
+        paths: Dict[str, Path] = {}
+
+        path_iwads = path / 'iwads'
+        path_iwads.mkdir(parents=True, exist_ok=True)
+        for filename in ['DOOM2.WAD', 'DOOM.WAD', 'HERETIC.WAD', 'HEXEN.WAD', 'TNT.WAD', 'PLUTONIA.WAD', 'STRIFE0.WAD', 'HACX.WAD', 'DOOM64.WAD']:
+            map_name = 'E1M1' if filename in {'DOOM.WAD', 'HERETIC.WAD'} else 'MAP01'
+            (path_iwads / filename).write_bytes(self.iwad(map_name))
+        paths['iwads'] = path_iwads
+
+        entries = {
+            'vanilla': ('levels/doom2/a-c/benchvan', self.vanilla_wad(map_size), 'wad'),
+            'hexen': ('levels/hexen/a-c/benchhex', self.hexen_wad(map_size), 'wad'),
+            'udmf': ('levels/doom2/Ports/a-c/benchpk3', self.pk3(map_size), 'pk3'),
+        }
+        for key, (path_base, data, extension) in entries.items():
+            path_zip = path / 'collection' / '{}.zip'.format(path_base)
+            path_zip.parent.mkdir(parents=True, exist_ok=True)
+
+            filename = Path(path_base).name
+            text = self.text_file('Benchmark {}'.format(key), filename)
+            path_zip.write_bytes(zip_archive({
+                '{}.{}'.format(filename, extension): data,
+                '{}.txt'.format(filename): text.encode('latin1'),
+            }))
+            path_zip.with_suffix('.txt').write_text(text, encoding='latin1')
+
+            paths[key] = path_zip
+
+        return paths
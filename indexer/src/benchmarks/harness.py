@@ -0,0 +1,152 @@
+import gc
+import json
+import platform
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+
+BenchmarkSetup = Callable[[], any]
+BenchmarkRun = Callable[[any], any]
+BenchmarkTeardown = Callable[[any], None]
+
+RESULTS_VERSION: int = 1
+
+
+class Benchmark:
+    """
+    A single named benchmark.
+
+    Setup is called before every run and teardown after it, neither of which are timed. The value returned by setup is
+    passed to run and teardown.
+    """
+
+    __slots__ = ['name', 'group', 'run', 'setup', 'teardown']
+
+    def __init__(self, name: str, group: str, run: BenchmarkRun, setup: Optional[BenchmarkSetup] = None,
+                 teardown: Optional[BenchmarkTeardown] = None):
+        self.name: str = name
+        self.group: str = group
+        self.run: BenchmarkRun = run
+        self.setup: Optional[BenchmarkSetup] = setup
+        self.teardown: Optional[BenchmarkTeardown] = teardown
+
+    def measure(self, repeat: int, warmup: int = 1) -> List[float]:
+        """
+        Runs the benchmark and returns the wall clock time of every timed run, in seconds.
+
+        :param repeat:
+        :param warmup: Number of untimed runs to do first.
+        :return:
+        """
+
+        times: List[float] = []
+
+        for index in range(warmup + repeat):
+            state = self.setup() if self.setup is not None else None
+
+            # Keep garbage collection of setup data out of the measured time.
+            gc.collect()
+            gc.disable()
+            try:
+                start = perf_counter()
+                self.run(state)
+                elapsed = perf_counter() - start
+            finally:
+                gc.enable()
+
+            if self.teardown is not None:
+                self.teardown(state)
+
+            if index >= warmup:
+                times.append(elapsed)
+
+        return times
+
+
+class BenchmarkResult:
+    __slots__ = ['name', 'group', 'times']
+
+    def __init__(self, name: str, group: str, times: List[float]):
+        self.name: str = name
+        self.group: str = group
+        self.times: List[float] = times
+
+    @property
+    def median(self) -> float:
+        return median(self.times)
+
+    @property
+    def min(self) -> float:
+        return min(self.times)
+
+    def to_dict(self) -> Dict[str, any]:
+        return {
+            'group': self.group,
+            'median': self.median,
+            'min': self.min,
+            'repeat': len(self.times),
+        }
+
+
+class Regression:
+    __slots__ = ['name', 'baseline', 'current']
+
+    def __init__(self, name: str, baseline: float, current: float):
+        self.name: str = name
+        self.baseline: float = baseline
+        self.current: float = current
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+
+def save_results(path: Path, results: List[BenchmarkResult], parameters: Dict[str, any]):
+    data = {
+        'version': RESULTS_VERSION,
+        'python': '{} {}'.format(platform.python_implementation(), platform.python_version()),
+        'parameters': parameters,
+        'results': {result.name: result.to_dict() for result in results},
+    }
+
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def load_results(path: Path) -> Dict[str, any]:
+    with open(path, 'r') as f:
+        data = json.load(f)
+
+    if data.get('version') != RESULTS_VERSION:
+        raise Exception('Unsupported benchmark results version in "{}".'.format(path))
+
+    return data
+
+
+def find_regressions(results: List[BenchmarkResult], baseline: Dict[str, any], threshold: float) -> List[Regression]:
+    """
+    Compares median times against a baseline.
+
+    :param results:
+    :param baseline: Data as returned by load_results.
+    :param threshold: Fraction that a median time may grow by before it counts as a regression.
+    :return:
+    """
+
+    regressions: List[Regression] = []
+
+    baseline_results = baseline['results']
+    for result in results:
+        if result.name not in baseline_results:
+            continue
+
+        baseline_median = baseline_results[result.name]['median']
+        if baseline_median <= 0:
+            continue
+
+        if result.median > baseline_median * (1.0 + threshold):
+            regressions.append(Regression(result.name, baseline_median, result.median))
+
+    return regressions
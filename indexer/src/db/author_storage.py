@@ -17,7 +17,8 @@ class AuthorStorage(StorageBase):
             if row is not None:
                 author_id = row['id']
             else:
-                self.db.cursor.execute('INSERT INTO authors (name, full_name, nickname, alias) VALUES (%s, %s, %s, %s)', (
+                # Another process may have added the same author since it was looked up.
+                self.db.cursor.execute('INSERT INTO authors (name, full_name, nickname, alias) VALUES (%s, %s, %s, %s) ON DUPLICATE KEY UPDATE id=LAST_INSERT_ID(id)', (
                     author.name[:255],
                     author.full_name[:255] if author.full_name else None,
                     author.nickname[:127] if author.nickname else None,
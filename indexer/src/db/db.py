@@ -23,6 +23,9 @@ class DB:
     def transaction_commit(self):
         self._db.commit()
 
+    def transaction_rollback(self):
+        self._db.rollback()
+
     def close(self):
         self._cursor.close()
         self._db.close()
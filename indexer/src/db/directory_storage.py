@@ -1,3 +1,5 @@
+from typing import Dict, Optional
+
 from db.storage_base import StorageBase
 
 
@@ -21,9 +23,41 @@ class DirectoryStorage(StorageBase):
         else:
             directory_parent_id = None
 
-        self.db.cursor.execute('INSERT INTO directories (parent_id, collection, path, name) VALUES (%s, %s, %s, %s)',
+        # Another process may have added the same directory since it was looked up.
+        self.db.cursor.execute('INSERT INTO directories (parent_id, collection, path, name) VALUES (%s, %s, %s, %s) ON DUPLICATE KEY UPDATE id=LAST_INSERT_ID(id)',
                             (directory_parent_id, collection, directory_path, directory_name,))
         return self.db.cursor.lastrowid
 
     def remove_orphans(self):
         self.db.cursor.execute('DELETE FROM directories WHERE id NOT IN (SELECT DISTINCT directory_id FROM entry) AND id NOT IN (SELECT parent_id FROM directories)')
+
+    def get_mtimes(self, collection: str) -> Dict[str, int]:
+        """
+        Returns the modification times of directories in a collection as of the last complete index run, in nanoseconds.
+
+        :param collection:
+        :return:
+        """
+
+        mtimes: Dict[str, int] = {}
+        self.db.cursor.execute('SELECT path, mtime FROM directories WHERE collection=%s AND mtime IS NOT NULL', (collection,))
+        for row in self.db.cursor:
+            mtimes[row['path']] = row['mtime']
+
+        return mtimes
+
+    def update_mtimes(self, collection: str, mtimes: Dict[str, Optional[int]]):
+        """
+        Stores the modification times of directories. Directories without entries have no row, and are skipped.
+
+        :param collection:
+        :param mtimes:
+        :return:
+        """
+
+        self.db.cursor.executemany('UPDATE directories SET mtime=%s WHERE collection=%s AND path=%s', [
+            (mtime, collection, path) for path, mtime in mtimes.items()
+        ])
+
+    def reset_mtimes(self):
+        self.db.cursor.execute('UPDATE directories SET mtime=NULL')
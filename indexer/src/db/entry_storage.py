@@ -1,6 +1,6 @@
 from pathlib import Path
 from random import randrange
-from typing import Optional, Set
+from typing import Dict, Optional, Set
 
 from db.author_storage import AuthorStorage
 from db.db import DB
@@ -8,6 +8,7 @@ from db.directory_storage import DirectoryStorage
 from db.map_storage import MapStorage
 from db.storage_base import StorageBase
 from indexer.entry import Entry
+from indexer.manifest import Manifest, ManifestEntry
 
 
 class EntryStorage(StorageBase):
@@ -37,6 +38,37 @@ class EntryStorage(StorageBase):
 
         return row['file_modified']
 
+    def get_manifest(self, collection: str) -> Manifest:
+        manifest: Manifest = {}
+
+        # Stream rows from the unbuffered cursor instead of fetching the entire result set at once.
+        self.db.cursor.execute('SELECT path, file_modified, file_size, file_hash, index_time, index_memory FROM entry WHERE collection=%s', (collection,))
+        for row in self.db.cursor:
+            manifest[row['path']] = ManifestEntry(
+                row['path'],
+                row['file_modified'],
+                row['file_size'],
+                row['file_hash'],
+                row['index_time'],
+                row['index_memory'],
+            )
+
+        return manifest
+
+    def get_duplicate_paths(self, collection: str) -> Dict[str, int]:
+        """
+        Returns the paths in a collection that more than one entry is stored for, with the number of entries.
+
+        :param collection:
+        :return:
+        """
+
+        self.db.cursor.execute('SELECT path, COUNT(*) AS count FROM entry WHERE collection=%s GROUP BY path HAVING count > 1', (collection,))
+        return {row['path']: row['count'] for row in self.db.cursor.fetchall()}
+
+    def update_file_modified(self, collection: str, path: Path, file_modified: int):
+        self.db.cursor.execute('UPDATE entry SET file_modified=%s WHERE collection=%s AND path=%s', (file_modified, collection, path.as_posix(),))
+
     def save(self, entry: Entry) -> int:
         (directory, _, _) = entry.path.rpartition('/')
         entry.directory_id = self._directories.get_or_create(directory, entry.collection)
@@ -49,9 +81,12 @@ class EntryStorage(StorageBase):
             set_stmt = ['{}=%s'.format(key) for key in row.keys()]
             query = 'UPDATE entry SET {} WHERE id=%s'.format(','.join(set_stmt))
         else:
+            # An entry for the same path may have been stored since it was looked up. Update that entry instead, but
+            # keep its creation time.
             col_names = row.keys()
             value_subs = ['%s'] * len(row)
-            query = 'INSERT INTO entry ({}) VALUES ({})'.format(','.join(col_names), ','.join(value_subs))
+            set_stmt = ['{0}=VALUES({0})'.format(key) for key in row.keys() if key != 'entry_created']
+            query = 'INSERT INTO entry ({}) VALUES ({}) ON DUPLICATE KEY UPDATE {},id=LAST_INSERT_ID(id)'.format(','.join(col_names), ','.join(value_subs), ','.join(set_stmt))
         self.db.cursor.execute(query, args)
 
         if entry.id is None:
@@ -75,8 +110,8 @@ class EntryStorage(StorageBase):
                 entry.id,
                 name,
                 graphic.index,
-                graphic.image.width,
-                graphic.image.height,
+                graphic.width,
+                graphic.height,
                 graphic.is_primary,
                 graphic.aspect_ratio,
                 randrange(0, 0xFFFFFFFF),
@@ -16,22 +16,13 @@ class MapStorage(StorageBase):
         row = map.to_row()
         args = list(row.values())
 
-        self.db.cursor.execute('SELECT id FROM maps WHERE entry_id=%s AND name=%s LIMIT 1', (row['entry_id'], row['name'],))
-        existing_row = self.db.cursor.fetchone()
-
-        if existing_row is not None:
-            set_stmt = ['{}=%s'.format(key) for key in row.keys()]
-            existing_id = existing_row['id']
-            query = 'UPDATE maps SET {} WHERE id={}'.format(','.join(set_stmt), existing_id)
-            self.db.cursor.execute(query, args)
-            map.id = existing_id
-
-        else:
-            col_names = row.keys()
-            value_subs = ['%s'] * len(row)
-            query = 'INSERT INTO maps ({}) VALUES ({})'.format(','.join(col_names), ','.join(value_subs))
-            self.db.cursor.execute(query, args)
-            map.id = self.db.cursor.lastrowid
+        # Insert or update in a single statement, so that storing the same map again is safe.
+        col_names = row.keys()
+        value_subs = ['%s'] * len(row)
+        set_stmt = ['{0}=VALUES({0})'.format(key) for key in row.keys()]
+        query = 'INSERT INTO maps ({}) VALUES ({}) ON DUPLICATE KEY UPDATE {},id=LAST_INSERT_ID(id)'.format(','.join(col_names), ','.join(value_subs), ','.join(set_stmt))
+        self.db.cursor.execute(query, args)
+        map.id = self.db.cursor.lastrowid
 
         # Re-add authors.
         self.db.cursor.execute('DELETE FROM map_authors WHERE map_id=%s', (map.id,))
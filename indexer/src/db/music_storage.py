@@ -8,22 +8,13 @@ class MusicStorage(StorageBase):
         row = music.to_row()
         args = list(row.values())
 
-        self.db.cursor.execute('SELECT id FROM music WHERE hash=%s LIMIT 1', (music.hash,))
-        existing_row = self.db.cursor.fetchone()
-
-        if existing_row is not None:
-            set_stmt = ['{}=%s'.format(key) for key in row.keys()]
-            existing_id = existing_row['id']
-            query = 'UPDATE music SET {} WHERE id={}'.format(','.join(set_stmt), existing_id)
-            self.db.cursor.execute(query, args)
-            music.id = existing_id
-
-        else:
-            col_names = row.keys()
-            value_subs = ['%s'] * len(row)
-            query = 'INSERT INTO music ({}) VALUES ({})'.format(','.join(col_names), ','.join(value_subs))
-            self.db.cursor.execute(query, args)
-            music.id = self.db.cursor.lastrowid
+        # Insert or update in a single statement, so that processes storing the same music cannot conflict.
+        col_names = row.keys()
+        value_subs = ['%s'] * len(row)
+        set_stmt = ['{0}=VALUES({0})'.format(key) for key in row.keys()]
+        query = 'INSERT INTO music ({}) VALUES ({}) ON DUPLICATE KEY UPDATE {},id=LAST_INSERT_ID(id)'.format(','.join(col_names), ','.join(value_subs), ','.join(set_stmt))
+        self.db.cursor.execute(query, args)
+        music.id = self.db.cursor.lastrowid
 
     def remove_orphans(self):
         self.db.cursor.execute('DELETE FROM music WHERE id NOT IN (SELECT entry_id FROM entry_music)')
\ No newline at end of file
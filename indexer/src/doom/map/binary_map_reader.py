@@ -237,7 +237,7 @@ class BinaryMapReader(MapReaderBase):
         file = map_data.files.get(file_name)
         if file is None:
             return []
-        data = file.get_data()
+        data = file.get_view()
 
         # Trim any extraneous data, iter_unpack will not accept it.
         if len(data) % data_struct.size != 0:
@@ -1,3 +1,4 @@
+import copy
 from dataclasses import dataclass
 from enum import Enum, Flag, auto
 from typing import List, Optional, Dict, Tuple
@@ -101,26 +102,14 @@ class LineFlags(Flag):
     REPEATS = auto()
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Vertex:
-    __slots__ = ['x', 'y']
-
     x: float
     y: float
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Line:
-    __slots__ = [
-        'vertex_start', 'vertex_end',
-        'side_front', 'side_back',
-        'flags',
-        'type',
-        'ids',
-        'arg0', 'arg1', 'arg2', 'arg3', 'arg4',
-        'arg0str',
-    ]
-
     vertex_start: int
     vertex_end: int
     side_front: int
@@ -136,10 +125,8 @@ class Line:
     arg0str: Optional[str]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Side:
-    __slots__ = ['sector', 'texture_upper', 'texture_mid', 'texture_lower', 'texture_x', 'texture_y']
-
     sector: int
     texture_upper: str
     texture_mid: str
@@ -148,10 +135,8 @@ class Side:
     texture_y: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Sector:
-    __slots__ = ['z_floor', 'z_ceiling', 'texture_floor', 'texture_ceiling', 'ids', 'type', 'light']
-
     z_floor: int
     z_ceiling: int
     texture_floor: str
@@ -161,19 +146,8 @@ class Sector:
     light: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Thing:
-    __slots__ = [
-        'x', 'y', 'z',
-        'angle',
-        'type',
-        'flags',
-        'id',
-        'special',
-        'arg0', 'arg1', 'arg2', 'arg3', 'arg4',
-        'arg0str',
-    ]
-
     x: float
     y: float
     z: float
@@ -230,6 +204,34 @@ class Map:
         self.enemy_count_dm: Optional[int] = None
 
         self._bounds: Optional[MapBounds] = None
+        self._geometry_counts: Optional[Tuple[int, int, int, int]] = None
+
+    def without_geometry(self) -> 'Map':
+        """
+        Returns a copy without vertices, lines, sides, sectors and things, for storing in the database. Their counts and
+        the bounds of the map are kept.
+        """
+
+        map = copy.copy(self)
+        map._bounds = self.get_bounds()
+        map._geometry_counts = self.get_geometry_counts()
+        map.vertices = []
+        map.lines = []
+        map.sides = []
+        map.sectors = []
+        map.things = []
+
+        return map
+
+    def get_geometry_counts(self) -> Tuple[int, int, int, int]:
+        """
+        Returns the number of lines, sides, things and sectors in this map.
+        """
+
+        if self._geometry_counts is not None:
+            return self._geometry_counts
+
+        return len(self.lines), len(self.sides), len(self.things), len(self.sectors)
 
     def get_bounds(self) -> MapBounds:
         if self._bounds is not None:
@@ -249,15 +251,17 @@ class Map:
         return self._bounds
 
     def to_row(self) -> Dict[str, any]:
+        line_count, side_count, thing_count, sector_count = self.get_geometry_counts()
+
         return {
             'entry_id': self.entry_id,
             'name': self.name[:8],
             'title': self.title[:1022] if self.title is not None else None,
             'format': self.format.value,
-            'line_count': len(self.lines),
-            'side_count': len(self.sides),
-            'thing_count': len(self.things),
-            'sector_count': len(self.sectors),
+            'line_count': line_count,
+            'side_count': side_count,
+            'thing_count': thing_count,
+            'sector_count': sector_count,
             'allow_jump': self.allow_jump,
             'allow_crouch': self.allow_crouch,
             'par_time': self.par_time & 0xFFFFFFFF if self.par_time is not None else None,
@@ -1,4 +1,5 @@
 from struct import Struct
+from typing import Union
 
 from doom.map.map import Map
 from doom.map.map_data_finder import MapData
@@ -19,9 +20,9 @@ class NodesReaderBase:
         if file is None:
             return []
 
-        return self.read_binary_data(file.get_data(), unpack_func, data_struct)
+        return self.read_binary_data(file.get_view(), unpack_func, data_struct)
 
-    def read_binary_data(self, data: bytes, unpack_func, data_struct: Struct):
+    def read_binary_data(self, data: Union[bytes, memoryview], unpack_func, data_struct: Struct):
 
         # Trim any extraneous data, iter_unpack will not accept it.
         if len(data) % data_struct.size != 0:
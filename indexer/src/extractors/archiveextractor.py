@@ -1,18 +1,28 @@
+import os
+import shutil
+import tempfile
 import zipfile
 from os.path import basename
-from typing import IO, Optional, Set, List
+from pathlib import Path
+from typing import IO, Dict, Optional, Set, List
 from zipfile import ZipFile, ZipInfo
 
 from archives.archivebase import ArchiveBase
+from archives.lumpcache import LumpCache
+from archives.sevenziparchive import SevenZipArchive
 from archives.wadarchive import WADArchive
 from archives.ziparchive import ZIPArchive
 from extractors.extractedinfo import ExtractedInfo
 from extractors.extractorbase import ExtractorBase
+from utils.inflate import inflate_zip_file
 from utils.sevenzip import SZArchive
 
 
 class ArchiveExtractor(ExtractorBase):
 
+    READS = frozenset({'path_local', 'filename_base', 'path_idgames'})
+    WRITES = frozenset({'main_archive', 'archives'})
+
     EXTENSIONS: Set[str] = [
         'wad',
         'pk3',
@@ -28,6 +38,9 @@ class ArchiveExtractor(ExtractorBase):
         main_fileinfo_list = []
         archives: List[ArchiveBase] = []
 
+        # All archives of the entry share a single budget for cached file data.
+        cache = LumpCache(self.config.get('indexer.lump_cache_size') * 1024 * 1024)
+
         try:
             self.logger.debug('Opening "{}"'.format(info.path_local))
             main_archive = ZipFile(info.path_local)
@@ -41,21 +54,19 @@ class ArchiveExtractor(ExtractorBase):
             file_list = ', '.join([f.filename for f in main_fileinfo_list])
             self.logger.decision('Using {} as the main data file(s).'.format(file_list))
 
+            # Some archives contain files with compression type "Imploded", which Python zipfile cannot
+            # decompress. We use the slower 7zip CLI fallback for those instead.
+            files_7z = self.extract_unsupported_files(info.path_local, main_fileinfo_list)
+            if files_7z is None:
+                return
+
             for main_fileinfo in main_fileinfo_list:
-                # Some archives contain files with compression type "Imploded", which Python zipfile cannot
-                # decompress. We use the slower 7zip CLI fallback here instead.
-                if not self.is_compression_type_supported(main_fileinfo.compress_type):
-                    self.logger.debug('Opening "{}" as using 7zip process'.format(main_fileinfo.filename))
-
-                    main_archive_7z = SZArchive(info.path_local)
-                    file_7z = main_archive_7z.get_file(main_fileinfo.filename)
-                    if not file_7z:
-                        self.logger.warn('Cannot find file {} in archive.'.format(main_fileinfo.filename))
-                        return
-                    file = file_7z.get_data()
+                if main_fileinfo.filename in files_7z:
+                    file = files_7z[main_fileinfo.filename]
 
+                # Decompress the file once, so that reading from it at any position is cheap.
                 else:
-                    file = main_archive.open(main_fileinfo.filename)
+                    file = inflate_zip_file(main_archive, main_fileinfo, self.get_memory_limit())
 
                 # We do not close the file, as it may be used to read data from later if needed. It is closed when
                 # the archive\archivelist is closed later anyway.
@@ -63,6 +74,7 @@ class ArchiveExtractor(ExtractorBase):
                 if not archive:
                     self.logger.warn('Unable to read archive.')
                     return
+                archive.set_cache(cache)
                 archives.append(archive)
 
         else:
@@ -80,6 +92,55 @@ class ArchiveExtractor(ExtractorBase):
         self.logger.debug('Closing "{}"'.format(info.main_archive.filename))
         info.main_archive.close()
 
+    def extract_unsupported_files(self, path: Path, fileinfo_list: List[ZipInfo]) -> Optional[Dict[str, IO[bytes]]]:
+        """
+        Extracts the files that Python zipfile cannot decompress with a single 7zip process.
+
+        The files are extracted into a temporary directory, which is removed again once they are opened. Open files
+        stay readable after that, and WAD files can still be mapped into memory.
+
+        :param path:
+        :param fileinfo_list:
+        :return: The opened files by their name in the archive, or None if any of them could not be extracted.
+        """
+
+        filenames = [fileinfo.filename for fileinfo in fileinfo_list if not self.is_compression_type_supported(fileinfo.compress_type)]
+        if not len(filenames):
+            return {}
+
+        self.logger.debug('Opening {} using 7zip process'.format(', '.join(filenames)))
+
+        archive_7z = SZArchive(path)
+        for filename in filenames:
+            if not archive_7z.get_file(filename):
+                self.logger.warn('Cannot find file {} in archive.'.format(filename))
+                return None
+
+        files: Dict[str, IO[bytes]] = {}
+        directory = tempfile.mkdtemp(prefix='indexer-7z-')
+        try:
+            if not archive_7z.extract(Path(directory), filenames):
+                self.logger.warn('7zip reported errors while extracting from {}.'.format(path))
+
+            directory_real = os.path.realpath(directory)
+            for filename in filenames:
+                path_file = os.path.realpath(os.path.join(directory, filename))
+                if not path_file.startswith(directory_real + os.sep) or not os.path.isfile(path_file):
+                    self.logger.warn('Cannot find extracted file {}.'.format(filename))
+                    for file in files.values():
+                        file.close()
+                    return None
+
+                files[filename] = open(path_file, 'rb')
+
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        return files
+
+    def get_memory_limit(self) -> int:
+        return self.config.get('indexer.inflate_memory_limit') * 1024 * 1024
+
     @staticmethod
     def is_compression_type_supported(method: int) -> bool:
         return (method == zipfile.ZIP_STORED or method == zipfile.ZIP_LZMA or
@@ -118,15 +179,13 @@ class ArchiveExtractor(ExtractorBase):
 
         archive = None
         if magic_bytes[0:2] == b'PK':
-            archive = ZIPArchive(path, file, self.logger)
+            archive = ZIPArchive(path, file, self.logger, self.get_memory_limit())
 
         elif magic_bytes[0:4] == b'PWAD' or magic_bytes[0:4] == b'IWAD':
-            archive = WADArchive(path, file, self.logger)
+            archive = WADArchive.from_file_mapped(path, file, self.logger)
 
         elif magic_bytes[0:2] == b'7z':
-            archive = None
-            self.logger.error('7zip is not yet supported for main archive.')
-            self.logger.stream('7zip_unsupported', '{} in {}'.format(path, archive_path))
+            archive = SevenZipArchive(path, file, self.logger)
 
         else:
             self.logger.error('Cannot determine type of archive.')
@@ -1,5 +1,5 @@
 import os
-from typing import Dict
+from typing import Dict, Tuple
 
 from archives.archivelist import ArchiveList
 from archives.wadarchive import WADArchive
@@ -11,22 +11,55 @@ from utils.config import Config
 from utils.logger import Logger
 
 
+IWADS: Tuple[Tuple[Game, str], ...] = (
+    (Game.DOOM2, 'DOOM2.WAD'),
+    (Game.DOOM, 'DOOM.WAD'),
+    (Game.HERETIC, 'HERETIC.WAD'),
+    (Game.HEXEN, 'HEXEN.WAD'),
+    (Game.TNT, 'TNT.WAD'),
+    (Game.PLUTONIA, 'PLUTONIA.WAD'),
+    (Game.STRIFE, 'STRIFE0.WAD'),
+    (Game.HACX, 'HACX.WAD'),
+    (Game.DOOM64, 'DOOM64.WAD'),
+)
+
+
 class ArchiveListExtractor(ExtractorBase):
 
+    READS = frozenset({'archives', 'game'})
+    WRITES = frozenset({'archive_list'})
+
+    # IWADs by the directory they were loaded from, shared by all instances, see preload. Also the process that opened
+    # each set of IWAD files.
+    _iwads: Dict[str, Dict[Game, WADArchive]] = {}
+    _iwads_pid: Dict[str, int] = {}
+
     def __init__(self, logger: Logger, config: Config):
         super().__init__(logger, config)
 
-        self.iwads: Dict[Game, WADArchive] = {}
+        self.preload(logger, config)
+
+        # IWADs are mapped into memory, see preload. Their mappings can be used as is from a forked process, but the
+        # archives still need to be made ready for use in this process.
+        iwads_path = config.get('paths.iwads')
+        self.iwads: Dict[Game, WADArchive] = ArchiveListExtractor._iwads[iwads_path]
+        if ArchiveListExtractor._iwads_pid[iwads_path] != os.getpid():
+            for iwad in self.iwads.values():
+                iwad.reopen(logger)
+            ArchiveListExtractor._iwads_pid[iwads_path] = os.getpid()
+
+    @classmethod
+    def preload(cls, logger: Logger, config: Config):
+        iwads_path = config.get('paths.iwads')
+        if iwads_path in ArchiveListExtractor._iwads:
+            return
+
+        iwads: Dict[Game, WADArchive] = {}
+        for game, filename in IWADS:
+            iwads[game] = WADArchive.from_path_mapped('{}/{}'.format(iwads_path, filename), logger)
 
-        self._add_iwad(Game.DOOM2, 'DOOM2.WAD')
-        self._add_iwad(Game.DOOM, 'DOOM.WAD')
-        self._add_iwad(Game.HERETIC, 'HERETIC.WAD')
-        self._add_iwad(Game.HEXEN, 'HEXEN.WAD')
-        self._add_iwad(Game.TNT, 'TNT.WAD')
-        self._add_iwad(Game.PLUTONIA, 'PLUTONIA.WAD')
-        self._add_iwad(Game.STRIFE, 'STRIFE0.WAD')
-        self._add_iwad(Game.HACX, 'HACX.WAD')
-        self._add_iwad(Game.DOOM64, 'DOOM64.WAD')
+        ArchiveListExtractor._iwads[iwads_path] = iwads
+        ArchiveListExtractor._iwads_pid[iwads_path] = os.getpid()
 
     def extract(self, info: ExtractedInfo):
         if not len(info.archives):
@@ -39,7 +72,7 @@ class ArchiveListExtractor(ExtractorBase):
 
         iwad = self.iwads[info.game]
 
-        self.logger.decision('Using "{}" as IWAD.'.format(os.path.basename(iwad.file.name)))
+        self.logger.decision('Using "{}" as IWAD.'.format(os.path.basename(iwad.name)))
 
         info.archive_list = ArchiveList()
         info.archive_list.append(iwad)
@@ -52,10 +85,7 @@ class ArchiveListExtractor(ExtractorBase):
 
         info.archive_list.close(iwads=False)
 
-    def _add_iwad(self, game: Game, filename: str):
-        wad_path = '{}/{}'.format(self.config.get('paths.iwads'), filename)
-        self.iwads[game] = WADArchive.from_path(wad_path, self.logger)
-
     def close(self):
-        for iwad in self.iwads.values():
-            iwad.close()
+
+        # IWADs are shared with other instances in the same process, and stay open for as long as the process runs.
+        pass
@@ -14,6 +14,10 @@ RE_DEHACKED_FILE = re.compile(r'(\.deh|\.bex)', re.IGNORECASE)
 
 class DehackedExtractor(ExtractorBase):
 
+    READS = frozenset({'maps', 'archive_list', 'main_archive', 'game'})
+    WRITES = frozenset({'maps'})
+    REQUIRES = frozenset({'maps', 'archive_list'})
+
     def extract(self, info: ExtractedInfo):
         if not len(info.maps):
             return
@@ -1,5 +1,5 @@
 import json
-from typing import Dict, Set, List
+from typing import Dict, Set, List, Optional
 
 from archives.archivelist import ArchiveList
 from doom.map.map import Map
@@ -19,29 +19,46 @@ DoomednumScores = Dict[int, Dict[Engine, float]]
 
 class EngineExtractor(ExtractorBase):
 
+    READS = frozenset({'text_keys', 'text_contents', 'maps', 'archive_list'})
+    WRITES = frozenset({'engine'})
+
+    # Shared by all instances, see preload.
+    _engine_lumps: Optional[EngineLumps] = None
+    _doomednum_scores: Optional[DoomednumScores] = None
+
     def __init__(self, logger: Logger, config: Config):
         super().__init__(logger, config)
 
-        self.engine_lumps: EngineLumps = self._load_engine_lumps()
-        self.doomednum_scores: DoomednumScores = self._load_doomednum_scores()
+        self.preload(logger, config)
+        self.engine_lumps: EngineLumps = EngineExtractor._engine_lumps
+        self.doomednum_scores: DoomednumScores = EngineExtractor._doomednum_scores
+
+    @classmethod
+    def preload(cls, logger: Logger, config: Config):
+        if EngineExtractor._engine_lumps is None:
+            EngineExtractor._engine_lumps = EngineExtractor._load_engine_lumps(config)
+        if EngineExtractor._doomednum_scores is None:
+            EngineExtractor._doomednum_scores = EngineExtractor._load_doomednum_scores(config)
 
-    def _load_engine_lumps(self) -> EngineLumps:
+    @staticmethod
+    def _load_engine_lumps(config: Config) -> EngineLumps:
         engine_lumps: EngineLumps = {}
 
-        with open(self.config.get('extractors.engine.lump_table'), 'r') as f:
+        with open(config.get('extractors.engine.lump_table'), 'r') as f:
             engines_data = json.load(f)
 
         for engine_key in engines_data.keys():
             engine = Engine[engine_key]
-            engine_lumps[engine] = self._get_engine_lumps(engines_data, engine_key)
+            engine_lumps[engine] = EngineExtractor._get_engine_lumps(engines_data, engine_key)
 
         return engine_lumps
 
-    def _get_engine_lumps(self, engines_data: Dict[str, any], engine_key: str) -> Set[str]:
+    @staticmethod
+    def _get_engine_lumps(engines_data: Dict[str, any], engine_key: str) -> Set[str]:
         engine_info = engines_data.get(engine_key)
         inherit = engine_info.get('inherits', None)
         if inherit is not None:
-            lumps = self._get_engine_lumps(engines_data, engine_key)
+            lumps = EngineExtractor._get_engine_lumps(engines_data, engine_key)
         else:
             lumps = set()
 
@@ -49,10 +66,11 @@ class EngineExtractor(ExtractorBase):
 
         return lumps
 
-    def _load_doomednum_scores(self) -> DoomednumScores:
+    @staticmethod
+    def _load_doomednum_scores(config: Config) -> DoomednumScores:
         scores: DoomednumScores = {}
 
-        with open(self.config.get('extractors.engine.doomednum_scores'), 'r') as f:
+        with open(config.get('extractors.engine.doomednum_scores'), 'r') as f:
             engines = json.load(f)
 
         for doomednum, engine_scores in engines.items():
@@ -1,4 +1,4 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from enum import Enum
 from pathlib import Path
 from typing import Dict, List, Optional
@@ -34,7 +34,7 @@ class MusicType(Enum):
 class MusicInfo:
     name: str
     type: MusicType
-    data: bytes
+    data: Optional[bytes]
     hash: bytes
     size: int
     duration: Optional[int] = None
@@ -48,16 +48,32 @@ class MusicInfo:
             'size': self.size,
         }
 
+    def without_data(self) -> 'MusicInfo':
+        """
+        Returns a copy without the music data, which only needs to be written to a file.
+        """
+
+        return replace(self, data=None)
+
 
 @dataclass
 class GraphicInfo:
-    image: Image
-    image_thumb: Image
+    image: Optional[Image]
+    image_thumb: Optional[Image]
     image_hash: bytes
     aspect_ratio: float
     index: int
+    width: int
+    height: int
     is_primary: bool = False
 
+    def without_images(self) -> 'GraphicInfo':
+        """
+        Returns a copy without the images, which only need to be written to files.
+        """
+
+        return replace(self, image=None, image_thumb=None)
+
 
 @dataclass
 class ExtractedInfo:
@@ -68,6 +84,7 @@ class ExtractedInfo:
     filename_base: str
     file_size: int
     file_modified: int
+    file_hash: bytes
 
     main_archive: Optional[ZipFile] = None
     archives: List[ArchiveBase] = field(default_factory=lambda: [])
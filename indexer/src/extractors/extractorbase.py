@@ -1,3 +1,5 @@
+from typing import FrozenSet
+
 from extractors.extractedinfo import ExtractedInfo
 from utils.config import Config
 from utils.logger import Logger
@@ -5,10 +7,34 @@ from utils.logger import Logger
 
 class ExtractorBase:
 
+    # Names of the ExtractedInfo fields that the extractor reads and writes. Extractors are ordered by these, see
+    # indexer.extractorgraph. Names that are not fields describe other state, like the types of archive files.
+    READS: FrozenSet[str] = frozenset()
+    WRITES: FrozenSet[str] = frozenset()
+
+    # Fields that must have a value for the extractor to do anything. The extractor is skipped otherwise.
+    REQUIRES: FrozenSet[str] = frozenset()
+
     def __init__(self, logger: Logger, config: Config):
         self.logger: Logger = logger
         self.config: Config = config
 
+    @classmethod
+    def preload(cls, logger: Logger, config: Config):
+        """
+        Loads data that does not change while indexing and that all instances of the extractor share.
+
+        Called before worker processes are forked, so that they share the memory of this data with the parent process
+        instead of each loading a copy of their own. Instances call it as well, in which case it only loads the data if
+        that was not done already.
+
+        :param logger:
+        :param config:
+        :return:
+        """
+
+        pass
+
     def extract(self, info: ExtractedInfo):
         pass
 
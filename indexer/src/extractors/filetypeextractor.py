@@ -1,12 +1,21 @@
-import gzip
+import zlib
 
 from extractors.extractedinfo import ExtractedInfo
 from extractors.extractorbase import ExtractorBase
 from utils.mp3_detect import mp3_detect
 
 
+# Number of bytes from the start of files that types are detected from. This covers the 4 KB that MP3 frame detection
+# scans, and tracker module signatures at offset 1080.
+PEEK_SIZE: int = 8192
+
+
 class FileTypeExtractor(ExtractorBase):
 
+    READS = frozenset({'archive_list'})
+    WRITES = frozenset({'file_types'})
+    REQUIRES = frozenset({'archive_list'})
+
     def extract(self, info: ExtractedInfo):
         if info.archive_list is None:
             self.logger.debug('Cannot extract file types without an archive list.')
@@ -24,11 +33,12 @@ class FileTypeExtractor(ExtractorBase):
                 if file.size < 4:
                     continue
 
-                data = file.get_data()
+                data = file.peek(PEEK_SIZE)
 
-                # Decompress GZipped data
+                # Decompress only the start of GZipped data.
                 if data[:3] == b'\x1F\x8B\x08' and data[4] & 0xE0 == 0:
-                    data = gzip.decompress(data)
+                    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+                    data = decompressor.decompress(file.get_view(), PEEK_SIZE)
 
                 data = memoryview(data)
 
@@ -1,6 +1,6 @@
 import json
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 from archives.archivelist import ArchiveList
 from extractors.extractedinfo import ExtractedInfo
@@ -17,15 +17,28 @@ LumpScores = Dict[str, Dict[Game, float]]
 
 class GameExtractor(ExtractorBase):
 
+    READS = frozenset({'text_keys', 'text_contents', 'path_idgames', 'archive_list'})
+    WRITES = frozenset({'game'})
+
+    # Shared by all instances, see preload.
+    _lump_scores: Optional[LumpScores] = None
+
     def __init__(self, logger: Logger, config: Config):
         super().__init__(logger, config)
 
-        self.lump_scores: LumpScores = self._load_lump_scores()
+        self.preload(logger, config)
+        self.lump_scores: LumpScores = GameExtractor._lump_scores
 
-    def _load_lump_scores(self) -> LumpScores:
+    @classmethod
+    def preload(cls, logger: Logger, config: Config):
+        if GameExtractor._lump_scores is None:
+            GameExtractor._lump_scores = GameExtractor._load_lump_scores(config)
+
+    @staticmethod
+    def _load_lump_scores(config: Config) -> LumpScores:
         lump_scores: LumpScores = {}
 
-        with open(self.config.get('extractors.game.lump_score_table'), 'r') as f:
+        with open(config.get('extractors.game.lump_score_table'), 'r') as f:
             scores = json.load(f)
 
         for file_name, scores in scores.items():
@@ -102,19 +115,20 @@ class GameExtractor(ExtractorBase):
     def detect_from_archive_list(self, archive_list: ArchiveList) -> Game:
 
         # TODO: is this still necessary or is the lump score method better?
-        if archive_list.file_find_basename('bossback', False) or archive_list.file_find_regexp('VILE', False) or archive_list.file_find_regexp('CPOS', False) or archive_list.file_find_basename('help', False):
+        found = archive_list.file_find_regexps(['VILE', 'CPOS', '^CWILV.*', '^WILV.*'], False)
+        if archive_list.file_find_basename('bossback', False) or found['VILE'] or found['CPOS'] or archive_list.file_find_basename('help', False):
             return Game.DOOM2
 
         elif archive_list.file_find_basename('rsky1', False) or archive_list.file_find_basename('rsky2', False) or archive_list.file_find_basename('rsky3', False) or archive_list.file_find_basename('rsky4', False):
             return Game.DOOM2
 
-        elif archive_list.file_find_basename('m_doom', False) or archive_list.file_find_regexp('^CWILV.*', False):
+        elif archive_list.file_find_basename('m_doom', False) or found['^CWILV.*']:
             return Game.DOOM2
 
         elif archive_list.file_find_basename('m_htic', False) or archive_list.file_find_basename('title', False):
             return Game.HERETIC
 
-        elif archive_list.file_find_basename('help1', False) and not archive_list.file_find_basename('help2', False) or archive_list.file_find_regexp('^WILV.*', False):
+        elif archive_list.file_find_basename('help1', False) and not archive_list.file_find_basename('help2', False) or found['^WILV.*']:
             return Game.DOOM
 
         # Attempt detection through lump scores.
@@ -43,6 +43,10 @@ THUMB_HEIGHT = 240
 
 class GraphicsExtractor(ExtractorBase):
 
+    READS = frozenset({'archive_list', 'main_archive'})
+    WRITES = frozenset({'graphics'})
+    REQUIRES = frozenset({'archive_list'})
+
     def extract(self, info: ExtractedInfo):
         if info.archive_list is None:
             self.logger.debug('Cannot extract graphics without an archive list.')
@@ -53,7 +57,7 @@ class GraphicsExtractor(ExtractorBase):
         if not playpal:
             self.logger.error('No PLAYPAL lump in archive list.')
             return
-        palette = Palette.from_playpal_data(playpal.get_data())
+        palette = Palette.from_playpal_data(playpal.get_view())
 
         for filename in GRAPHIC_LUMP_NAMES:
             file = archive_list.file_find_basename(filename, include_main=False)
@@ -89,7 +93,7 @@ class GraphicsExtractor(ExtractorBase):
                 thumb_height = THUMB_HEIGHT
             image_thumb = image.resize((thumb_width, thumb_height), Image.BICUBIC)
 
-            info.graphics[filename] = GraphicInfo(image, image_thumb, image_hash, aspect_ratio, len(info.graphics))
+            info.graphics[filename] = GraphicInfo(image, image_thumb, image_hash, aspect_ratio, len(info.graphics), image.width, image.height)
 
         # Determine primary graphic.
         for name in GRAPHIC_LUMP_NAMES_PRIMARY:
@@ -101,7 +105,7 @@ class GraphicsExtractor(ExtractorBase):
         image: Optional[Image.Image] = None
 
         # Attempt to identify the file looking for PNG or partial JPEG magic bytes.
-        data = file.get_data()
+        data = file.get_view()
         if data[0:8] == b'\x89\x50\x4E\x47\x0D\x0A\x1A\x0A' or data[0:3] == b'\xFF\xD8\xFF':
             try:
                 image = Image.open(BytesIO(data))
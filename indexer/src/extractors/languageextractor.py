@@ -7,6 +7,10 @@ from utils.lexer import LexerError
 
 class LanguageExtractor(ExtractorBase):
 
+    READS = frozenset({'archive_list', 'game'})
+    WRITES = frozenset({'locale_strings'})
+    REQUIRES = frozenset({'archive_list'})
+
     def extract(self, info: ExtractedInfo):
         if info.archive_list is None:
             return
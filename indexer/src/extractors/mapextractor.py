@@ -1,8 +1,7 @@
 import json
-from io import BytesIO
 from pathlib import Path
 from statistics import fmean
-from typing import Dict, Set
+from typing import Dict, Optional, Set
 
 from archives.archivelist import ArchiveList
 from archives.wadarchive import WADArchive
@@ -24,15 +23,29 @@ EnemeyDoomednums = Dict[int, Set[int]]
 
 class MapExtractor(ExtractorBase):
 
+    READS = frozenset({'archive_list', 'game', 'path_idgames'})
+    WRITES = frozenset({'maps'})
+    REQUIRES = frozenset({'archive_list'})
+
+    # Shared by all instances, see preload.
+    _enemy_doomednums: Optional[EnemeyDoomednums] = None
+
     def __init__(self, logger: Logger, config: Config):
         super().__init__(logger, config)
 
-        self.enemy_doomednums: EnemeyDoomednums = self._load_enemy_doomednums()
+        self.preload(logger, config)
+        self.enemy_doomednums: EnemeyDoomednums = MapExtractor._enemy_doomednums
 
-    def _load_enemy_doomednums(self) -> EnemeyDoomednums:
+    @classmethod
+    def preload(cls, logger: Logger, config: Config):
+        if MapExtractor._enemy_doomednums is None:
+            MapExtractor._enemy_doomednums = MapExtractor._load_enemy_doomednums(config)
+
+    @staticmethod
+    def _load_enemy_doomednums(config: Config) -> EnemeyDoomednums:
         doomednums: EnemeyDoomednums = {}
 
-        with open(self.config.get('extractors.game.enemy_doomednums'), 'r') as f:
+        with open(config.get('extractors.game.enemy_doomednums'), 'r') as f:
             scores = json.load(f)
 
         for game_name, nums in scores.items():
@@ -65,8 +78,7 @@ class MapExtractor(ExtractorBase):
             map_wads = archive.file_find_all_regexp(r'maps/.*\.wad')
             for wad in map_wads:
                 wad_base_name = Path(wad.name).stem
-                wad_data = BytesIO(wad.get_data())
-                wad_archive = WADArchive(wad.name, wad_data, self.logger)
+                wad_archive = WADArchive(wad.name, wad.get_view(), self.logger)
                 map_data_finder.add_from_archive(wad_archive, wad_base_name)
 
                 wad_archives.append(wad_archive)
@@ -81,15 +93,25 @@ class MapExtractor(ExtractorBase):
                 else:
                     reader = BinaryMapReader(info.game, self.logger)
 
-                map = reader.read(map_data)
-                if map is not None:
-                    self.extend_map_data(map, map_data, info)
-                    info.maps.append(map)
-
-                    self.logger.debug('Found {} ({}): {} vertices, {} lines, {} sides, {} sectors, {} things.'.format(
-                        map.name, map_data.format.name,
-                        len(map.vertices), len(map.lines), len(map.sides), len(map.sectors), len(map.things))
-                    )
+                # Map lumps are read more than once while reading the map and detecting its nodes.
+                map_files = list(map_data.files.values())
+                for file in map_files:
+                    file.pin()
+
+                try:
+                    map = reader.read(map_data)
+                    if map is not None:
+                        self.extend_map_data(map, map_data, info)
+                        info.maps.append(map)
+
+                        self.logger.debug('Found {} ({}): {} vertices, {} lines, {} sides, {} sectors, {} things.'.format(
+                            map.name, map_data.format.name,
+                            len(map.vertices), len(map.lines), len(map.sides), len(map.sectors), len(map.things))
+                        )
+
+                finally:
+                    for file in map_files:
+                        file.unpin()
 
 
         for archive in wad_archives:
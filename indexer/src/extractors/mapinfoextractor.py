@@ -26,6 +26,10 @@ FILE_ORDER = [
 
 class MapInfoExtractor(ExtractorBase):
 
+    READS = frozenset({'maps', 'archive_list', 'locale_strings'})
+    WRITES = frozenset({'maps'})
+    REQUIRES = frozenset({'maps', 'archive_list'})
+
     def extract(self, info: ExtractedInfo):
         if not len(info.maps):
             return
@@ -14,6 +14,10 @@ from indexer.game import Game
 
 class MusicExtractor(ExtractorBase):
 
+    READS = frozenset({'archive_list', 'file_types', 'game', 'maps'})
+    WRITES = frozenset({'music', 'maps'})
+    REQUIRES = frozenset({'archive_list'})
+
     def extract(self, info: ExtractedInfo):
         if info.archive_list is None:
             self.logger.debug('Cannot extract music without an archive list.')
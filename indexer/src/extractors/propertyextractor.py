@@ -5,6 +5,12 @@ from utils import author_parser
 
 class PropertyExtractor(ExtractorBase):
 
+    READS = frozenset({'text_keys', 'filename_base'})
+    WRITES = frozenset({
+        'title', 'is_singleplayer', 'is_cooperative', 'is_deathmatch', 'description', 'tools_used', 'build_time',
+        'known_bugs', 'credits', 'comments', 'authors'
+    })
+
     def extract(self, info: ExtractedInfo):
         info.title = info.text_keys.get('title', info.filename_base)
         if info.title is not None and len(info.title) > 255:
@@ -14,6 +14,9 @@ RE_EMAIL = re.compile(r'([a-zA-Z0-9_\-\.]+)@([a-zA-Z0-9_\-\.]+)\.([a-zA-Z]{2,5})
 
 class TextExtractor(ExtractorBase):
 
+    READS = frozenset({'main_archive', 'path_local_base', 'filename_base'})
+    WRITES = frozenset({'text_keys', 'text_contents'})
+
     def extract(self, info: ExtractedInfo):
         text_path = info.path_local_base.with_suffix('.txt')
         contents = None
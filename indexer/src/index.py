@@ -1,55 +1,108 @@
+import gc
+import json
 import multiprocessing
+import os
+import signal
+import socket
+import sys
 import time
+import traceback
 from math import ceil
-from multiprocessing import Process, Queue, Lock
+from multiprocessing.connection import Connection
 from pathlib import Path
-from typing import Set, Dict, List
+from typing import Set, Dict, Iterable, List, Optional, Tuple
 from optparse import OptionParser, OptionGroup
 
+from indexer.dbwriter import DBWriter
+from indexer.encoder import EncodePool, EncodeQueue, create_encode_job
 from indexer.entry import Entry
 from indexer.indexer import Indexer
+from indexer.instrumentation import Instrumentation, can_trace_memory
+from indexer.jobqueue import JobQueue, JobState
+from indexer.journal import JournalKey, RunJournal, RunState, TaskState
+from indexer.manifest import Manifest, ManifestEntry
+from indexer.scanner import DirectoryMtimes, scan_collection
+from indexer.scheduler import ScheduledTask, get_time_per_byte, order_longest_first
+from indexer.shard import Shard, get_shard_index
 from indexer.storage import Storage
+from indexer.watcher import CollectionWatcher
+from indexer.workerpool import WorkerPool, WorkerStreamQueue, worker_init, MESSAGE_ERROR, MESSAGE_RESULT, MESSAGE_STATS, MESSAGE_WAITING
 from utils.author_parser import Author
 from utils.config import Config
+from utils.file_hash import file_hash
 from indexer.ignorelist import must_ignore, must_skip_graphics
 from utils.logger import Logger
 from utils.logger_stream import LoggerStream
+from utils.process_memory import get_peak_rss, reset_peak_rss
 
 
-def index_process(verbosity: int, stream_queue: Queue, task_queue: Queue, db_lock: Lock) -> None:
-    config: Config = Config()
-    logger: Logger = Logger(config.get('paths.logs'), stream_queue, verbosity)
-    storage: Storage = Storage(config)
-
-    indexer = Indexer(config, logger)
+def index_process(verbosity: int, trace_allocations: bool, journal_path: Optional[str], encode_queue: Optional[EncodeQueue], connection: Connection) -> None:
+    worker_init()
 
-    for (collection, path_system, path_collection_file, start_time) in iter(task_queue.get, None):
+    config: Config = Config()
+    logger: Logger = Logger(config.get('paths.logs'), WorkerStreamQueue(connection), verbosity)
+    instrumentation: Instrumentation = Instrumentation(trace_allocations)
+    journal: Optional[RunJournal] = RunJournal(journal_path) if journal_path is not None else None
+    encode_queue_timeout: float = config.get('indexer.encode_queue_timeout')
+
+    indexer = Indexer(config, logger, instrumentation, encode_queue is None)
+
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+
+        collection, path_system, path_collection_file, start_time = task
         logger.info('Processing {}...'.format(path_collection_file))
+        if journal is not None:
+            journal.record(TaskState.STARTED, collection, path_collection_file.as_posix())
 
         skip_graphics_reason = must_skip_graphics(path_collection_file)
         if skip_graphics_reason is not None:
             logger.info('Skipping graphics for {} because {}.'.format(path_system, skip_graphics_reason))
 
-        info = indexer.index_file(path_system, path_collection_file, skip_graphics_reason is not None)
+        reset_peak_rss()
+        index_start = time.monotonic()
+        try:
+            with instrumentation.measure('total', process_time=True):
+                info = indexer.index_file(path_system, path_collection_file, skip_graphics_reason is not None)
+        except Exception as e:
+            logger.error('Unable to index {}: {}'.format(path_collection_file, e))
+            logger.stream('index_error', '{}\n{}'.format(path_collection_file, traceback.format_exc()))
+            connection.send((MESSAGE_ERROR, 'exception: {}'.format(e)))
+            continue
+
         if info is None:
-            return None
-
-        # Transfer indexed information to an entry.
-        entry = storage.entries.get_by_path(collection, path_collection_file)
-        if entry is None:
-            entry = Entry(
-                collection,
-                info.path_idgames.as_posix(),
-                info.file_modified,
-                info.file_size,
-                start_time,
-                start_time,
-            )
-        else:
-            entry.entry_updated = start_time
-            entry.file_modified = info.file_modified
-            entry.file_size = info.file_size
+            connection.send((MESSAGE_ERROR, 'no information was extracted'))
+            continue
+        index_time = time.monotonic() - index_start
+
+        # Hand assets off to be written. This waits while the encode queue is full, and must not be interrupted by the
+        # task timeout.
+        if encode_queue is not None:
+            connection.send((MESSAGE_WAITING, None))
+            with instrumentation.measure('EncodeQueue'):
+                is_queued = encode_queue.put(create_encode_job(info), encode_queue_timeout)
+            if not is_queued:
+                connection.send((MESSAGE_ERROR, 'encode queue stayed full for {} seconds'.format(encode_queue_timeout)))
+                continue
 
+        # Transfer indexed information to an entry. The database writer fills in details of existing entries.
+        entry = Entry(
+            collection,
+            info.path_idgames.as_posix(),
+            info.file_modified,
+            info.file_size,
+            start_time,
+            start_time,
+        )
+
+        entry.file_hash = info.file_hash
+        entry.index_time = int(index_time * 1000)
+        entry.index_memory = get_peak_rss()
         entry.title = info.title
         entry.game = info.game
         entry.engine = info.engine
@@ -62,10 +115,12 @@ def index_process(verbosity: int, stream_queue: Queue, task_queue: Queue, db_loc
         entry.credits = info.credits
         entry.build_time = info.build_time
         entry.comments = info.comments
-        entry.maps = info.maps
         entry.text_contents = info.text_contents
-        entry.graphics = info.graphics
-        entry.music = info.music
+
+        # Only send what is stored in the database. Maps, graphics and music were already handed to the writers.
+        entry.maps = [map.without_geometry() for map in info.maps]
+        entry.graphics = {name: graphic.without_images() for name, graphic in info.graphics.items()}
+        entry.music = {name: music.without_data() for name, music in info.music.items()}
 
         # Combine authors from the main entry and every map.
         author_set: Set[Author] = set(info.authors)
@@ -73,16 +128,156 @@ def index_process(verbosity: int, stream_queue: Queue, task_queue: Queue, db_loc
             author_set.update(map.authors)
         entry.authors = author_set
 
-        # Store or update entry.
-        with db_lock:
-            storage.transaction_commit()
-            storage.transaction_start()
-            for music in entry.music.values():
-                storage.music.save(music)
-            entry.id = storage.entries.save(entry)
-            storage.transaction_commit()
+        # Hand the entry off to be stored.
+        connection.send((MESSAGE_RESULT, entry))
 
     indexer.close()
+    if journal is not None:
+        journal.close()
+    connection.send((MESSAGE_STATS, instrumentation))
+
+
+def get_process_count(options, logger: Logger) -> int:
+    if options.processes > 0:
+        proc_count = options.processes
+    else:
+        proc_count = max(ceil(multiprocessing.cpu_count() * 0.6) - 1, 1)
+    logger.info('Using {} processes.'.format(proc_count))
+
+    return proc_count
+
+
+def start_encode_pool(options, config: Config, logger: Logger) -> Optional[EncodePool]:
+    """
+    Starts encode processes. Without any, workers run writers themselves.
+
+    :return: The started encode pool, or None if no encode processes are configured.
+    """
+
+    encode_count = config.get('indexer.encode_processes')
+    if encode_count < 1:
+        return None
+
+    logger.info('Using {} encode processes.'.format(encode_count))
+    encode_pool = EncodePool(
+        encode_count, config.get('indexer.encode_queue_size'), options.verbosity, logger,
+        config.get('indexer.task_timeout'), options.trace_allocations
+    )
+    encode_pool.start()
+
+    return encode_pool
+
+
+def preload_workers(config: Config, logger: Logger):
+    """
+    Loads the data that index workers share before they are forked, so that they share its memory with this process
+    instead of each loading a copy of their own. Existing objects are then hidden from the garbage collector where
+    supported, so that collections in the workers do not write to them and so copy their memory pages.
+
+    :param config:
+    :param logger:
+    :return:
+    """
+
+    logger.info('Preloading shared data...')
+    Indexer.preload(config, logger)
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+
+
+def write_stage_timings(logger: Logger, worker_stats: List[Instrumentation]):
+    """
+    Combines and outputs processing statistics from all workers.
+    """
+
+    instrumentation = Instrumentation()
+    for stats in worker_stats:
+        instrumentation.merge(stats)
+    logger.stream('stage_timings', json.dumps(instrumentation.summary()))
+
+
+def create_tasks(config: Config, logger: Logger, storage: Storage,
+                 paths_system: Dict[str, Iterable[Tuple[Path, os.stat_result]]], time_now: int, force: bool,
+                 shard: Optional[Shard], run_state: Optional[RunState]) -> List[Tuple]:
+    """
+    Generates tasks for each file that needs indexing, ordered with the most expensive tasks first.
+
+    :return:
+    """
+
+    scheduled_tasks: List[ScheduledTask] = []
+    manifest_entries: List[ManifestEntry] = []
+    for collection, path_collections in paths_system.items():
+        path_collection = config.get('paths.collections')[collection]
+
+        # Load the state of all known entries up front, so that skipping unchanged files needs no queries.
+        logger.info('Loading manifest for collection {}...'.format(collection))
+        manifest: Manifest = storage.entries.get_manifest(collection)
+        manifest_entries.extend(manifest.values())
+
+        for path_system, stat in path_collections:
+            path_collection_file = path_system.relative_to(path_collection)
+
+            # Leave files that belong to other shards to the nodes indexing those.
+            if shard is not None and not shard.contains(collection, path_collection_file.as_posix()):
+                continue
+
+            # Skip entries that were already stored by the run being resumed.
+            if run_state is not None and run_state.is_committed(collection, path_collection_file.as_posix()):
+                logger.decision('Skipping {}, already indexed by the resumed run.'.format(path_system))
+                continue
+
+            # Skip entries that do not need updating.
+            manifest_entry = manifest.get(path_collection_file.as_posix())
+            if not force and manifest_entry is not None and manifest_entry.file_size == stat.st_size:
+                if manifest_entry.file_modified >= int(stat.st_mtime):
+                    logger.decision('Skipping {}.'.format(path_system))
+                    continue
+
+                # The file was touched, but its contents may not have changed.
+                if manifest_entry.file_hash is not None and manifest_entry.file_hash == file_hash(path_system):
+                    logger.decision('Skipping {}, contents are unchanged.'.format(path_system))
+                    storage.entries.update_file_modified(collection, path_collection_file, int(stat.st_mtime))
+                    continue
+
+            # Ignore some files we'd rather not analyse.
+            ignore_reason = must_ignore(path_collection_file)
+            if ignore_reason is not None:
+                logger.decision('Ignoring {} because: {}'.format(path_system, ignore_reason))
+                continue
+
+            task = (collection, path_system, path_collection_file, time_now)
+            scheduled_tasks.append(ScheduledTask(task, stat.st_size, manifest_entry))
+
+    return order_longest_first(scheduled_tasks, get_time_per_byte(manifest_entries))
+
+
+def scan_collections(config: Config, storage: Optional[Storage] = None,
+                     scanned_mtimes: Optional[Dict[str, DirectoryMtimes]] = None) -> Dict[str, Iterable[Tuple[Path, os.stat_result]]]:
+    """
+    Returns generators that walk each collection while tasks are generated.
+
+    :param config:
+    :param storage: If given, files in directories that did not change since their modification time was stored are
+    skipped.
+    :param scanned_mtimes: Receives the modification times of the directories in each collection.
+    :return:
+    """
+
+    paths_system: Dict[str, Iterable[Tuple[Path, os.stat_result]]] = {}
+    for collection, path_collection in config.get('paths.collections').items():
+        known_mtimes: Optional[DirectoryMtimes] = None
+        if storage is not None:
+            known_mtimes = storage.directories.get_mtimes(collection)
+
+        collection_mtimes: Optional[DirectoryMtimes] = None
+        if scanned_mtimes is not None:
+            collection_mtimes = scanned_mtimes.setdefault(collection, {})
+
+        dir_entries = scan_collection(path_collection, '.zip', known_mtimes, collection_mtimes)
+        paths_system[collection] = ((Path(dir_entry.path), dir_entry.stat()) for dir_entry in dir_entries)
+
+    return paths_system
 
 
 def index(options):
@@ -95,9 +290,11 @@ def index(options):
     storage = Storage(config)
 
     time_now = int(time.time())
+    force = options.force
+    shard: Optional[Shard] = options.shard
 
     # Index a single file.
-    paths_system: Dict[str, List[Path]]
+    paths_system: Dict[str, Iterable[Tuple[Path, os.stat_result]]]
     if options.filename:
         collection = None
         path_file_local = Path(options.filename)
@@ -112,68 +309,341 @@ def index(options):
             return
 
         paths_system = {
-            collection: [path_file_local]
+            collection: [(path_file_local, path_file_local.stat())]
         }
 
-    # Get a list of files to index, per collection.
-    else:
-        paths_system = {}
-        for collection, path_collection in config.get('paths.collections').items():
-            collection_local_root = Path(path_collection)
-            paths_system[collection] = list(collection_local_root.rglob('*.zip'))
-            paths_system[collection].sort()
+        if shard is not None:
+            logger.warn('Ignoring --shard when indexing a single file.')
+            shard = None
+
+    # Track the progress of complete runs, so that an interrupted one can be resumed.
+    journal: Optional[RunJournal] = None
+    run_state: Optional[RunState] = None
+    if not options.filename and options.queue is None:
+        if shard is not None:
+            logger.info('Indexing shard {}.'.format(shard))
+            journal = RunJournal(shard.get_journal_path(config.get('paths.journal')))
+        else:
+            journal = RunJournal(config.get('paths.journal'))
+
+        if options.resume:
+            run_state = journal.read()
+            if run_state is None or run_state.is_complete:
+                logger.info('No interrupted run to resume, starting a new run.')
+                run_state = None
+            else:
+                time_now = run_state.start_time
+                force = run_state.force
+                logger.info('Resuming run with {} committed and {} unfinished entries.'.format(
+                    run_state.count(TaskState.COMMITTED),
+                    len(run_state.tasks) - run_state.count(TaskState.COMMITTED)
+                ))
+
+        if run_state is None:
+            journal.begin(time_now, force)
+
+    elif options.resume:
+        logger.warn('Ignoring --resume when indexing a single file or filling a job queue.')
+
+    # Unless all files must be indexed again, skip the files of directories that did not change since the last run.
+    # Only unsharded runs with a journal know which of the files they scanned were stored, and can remember
+    # directory modification times.
+    scanned_mtimes: Optional[Dict[str, DirectoryMtimes]] = None
+    if not options.filename:
+        if journal is not None and shard is None:
+            scanned_mtimes = {}
+        paths_system = scan_collections(config, storage if not force else None, scanned_mtimes)
+
+    tasks = create_tasks(config, logger, storage, paths_system, time_now, force, shard, run_state)
+
+    # Store the modification times updated for unchanged files now, instead of holding their rows locked for the whole
+    # run and losing the updates if it is interrupted.
+    storage.transaction_commit()
 
-    # Determine number of processes to spawn.
-    if options.processes > 0:
-        proc_count = options.processes
-    else:
-        proc_count = max(ceil(multiprocessing.cpu_count() * 0.6) - 1, 1)
-    logger.info('Using {} processes.'.format(proc_count))
+    # Leave the tasks to workers that take them from a job queue.
+    if options.queue is not None:
+        job_queue = JobQueue(options.queue, config.get('indexer.queue_lease_time'), config.get('indexer.queue_max_attempts'))
+        count = job_queue.enqueue((task[0], task[2].as_posix(), task[3]) for task in tasks)
+        logger.info('Added {} jobs to queue {}.'.format(count, options.queue))
+        job_queue.close()
+
+        logger_stream.stop()
+        logger_stream.join()
+        storage.transaction_commit()
+        return
+
+    proc_count = get_process_count(options, logger)
+
+    # Start database writer process.
+    journal_path = journal.path if journal is not None else None
+    db_writer = DBWriter(options.verbosity, logger_stream.queue, config.get('indexer.db_batch_size'), config.get('indexer.db_batch_interval'), journal_path)
+    db_writer.start()
+
+    encode_pool = start_encode_pool(options, config, logger)
+    encode_queue = encode_pool.queue if encode_pool is not None else None
+
+    # Indexed entries are passed on to be stored. Failed files are recorded so that they can be looked into.
+    def on_result(_, entry: Entry):
+        db_writer.queue.put(entry)
+
+    def on_failure(task: Tuple, reason: str):
+        task_collection, task_path_system, task_path_collection_file, _ = task
+        logger.error('Failed to index {}: {}'.format(task_path_collection_file, reason))
+        logger.stream('quarantine', '{}: {}'.format(task_path_system, reason))
+        if journal is not None:
+            journal.record(TaskState.FAILED, task_collection, task_path_collection_file.as_posix())
 
     # Start worker processes.
-    task_queue = Queue()
-    db_lock = Lock()
-    workers = []
-    for i in range(proc_count):
-        worker = Process(target=index_process, args=(options.verbosity, logger_stream.queue, task_queue, db_lock), name='index-{:02}'.format(i + 1))
-        workers.append(worker)
-        worker.start()
-
-    # Generate tasks for each file that needs indexing.
-    for collection, path_collections in paths_system.items():
-        path_collection = config.get('paths.collections')[collection]
+    preload_workers(config, logger)
+    pool = WorkerPool(
+        proc_count, index_process, (options.verbosity, options.trace_allocations, journal_path, encode_queue),
+        logger, config.get('indexer.task_timeout'), on_result, on_failure,
+        config.get('indexer.worker_max_tasks'), config.get('indexer.worker_max_memory') * 1024,
+        multiprocessing.get_context('fork')
+    )
+    pool.start()
+
+    logger.info('Queueing {} tasks.'.format(len(tasks)))
+    for task in tasks:
+        if journal is not None:
+            journal.record(TaskState.QUEUED, task[0], task[2].as_posix())
+        pool.submit(task)
+
+    # Supervise workers until all tasks are done, then stop them.
+    worker_stats = pool.stop()
+    if encode_pool is not None:
+        worker_stats.extend(encode_pool.stop())
+
+    # Wait for all indexed entries to be stored.
+    db_writer.stop()
+    db_writer.join()
+
+    # Remember directory modification times. Directories with files that were not stored must be scanned fully again.
+    if scanned_mtimes is not None:
+        unfinished_directories: Set[JournalKey] = set()
+        for (collection, path), state in journal.read().tasks.items():
+            if state != TaskState.COMMITTED:
+                unfinished_directories.add((collection, path.rpartition('/')[0]))
+
+        for collection, mtimes in scanned_mtimes.items():
+            directory_mtimes: Dict[str, Optional[int]] = {}
+            for path, mtime in mtimes.items():
+                directory_mtimes[path] = mtime if (collection, path) not in unfinished_directories else None
+            storage.directories.update_mtimes(collection, directory_mtimes)
+
+    if journal is not None:
+        journal.complete()
+        journal.close()
+
+    write_stage_timings(logger, worker_stats)
 
-        for path_system in path_collections:
-            path_collection_file = path_system.relative_to(path_collection)
+    # Stop logger stream.
+    logger_stream.stop()
+    logger_stream.join()
 
-            # Skip entries that do not need updating.
-            if not options.force:
-                timestamp = storage.entries.get_timestamp_by_path(collection, path_collection_file)
-                if timestamp is not None and timestamp >= int(path_system.stat().st_mtime):
-                    logger.decision('Skipping {}.'.format(path_system))
-                    continue
+    storage.transaction_commit()
+
+
+def watch(options):
+    """
+    Indexes files as soon as they change, until the process is interrupted or terminated.
+
+    :param options:
+    :return:
+    """
+
+    config = Config()
+
+    logger_stream = LoggerStream(config.get('paths.logs'))
+    logger = Logger(config.get('paths.logs'), logger_stream.queue, options.verbosity)
+    logger_stream.start()
+
+    storage = Storage(config)
+    shard: Optional[Shard] = options.shard
+
+    collections: Dict[str, str] = config.get('paths.collections')
+    watcher = CollectionWatcher(logger, collections, config.get('indexer.watch_debounce_time'))
+
+    proc_count = get_process_count(options, logger)
+
+    db_writer = DBWriter(options.verbosity, logger_stream.queue, config.get('indexer.db_batch_size'), config.get('indexer.db_batch_interval'))
+    db_writer.start()
+
+    encode_pool = start_encode_pool(options, config, logger)
+    encode_queue = encode_pool.queue if encode_pool is not None else None
+
+    def on_result(_, entry: Entry):
+        db_writer.queue.put(entry)
+
+    def on_failure(task: Tuple, reason: str):
+        _, task_path_system, task_path_collection_file, _ = task
+        logger.error('Failed to index {}: {}'.format(task_path_collection_file, reason))
+        logger.stream('quarantine', '{}: {}'.format(task_path_system, reason))
+
+    preload_workers(config, logger)
+    pool = WorkerPool(
+        proc_count, index_process, (options.verbosity, options.trace_allocations, None, encode_queue),
+        logger, config.get('indexer.task_timeout'), on_result, on_failure,
+        config.get('indexer.worker_max_tasks'), config.get('indexer.worker_max_memory') * 1024,
+        multiprocessing.get_context('fork')
+    )
+    pool.start()
+
+    # Finish the files that were already queued before exiting.
+    is_stopping = False
+
+    def on_signal(signum, _):
+        nonlocal is_stopping
+        logger.info('Received signal {}, stopping.'.format(signum))
+        is_stopping = True
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+
+    logger.info('Watching for changes.')
+    while not is_stopping:
+
+        # Only wait for changes while no worker needs supervising.
+        changed_files = watcher.poll(1.0 if pool.is_idle else 0.0)
+        time_now = int(time.time())
+
+        if watcher.needs_rescan:
+            watcher.needs_rescan = False
+            tasks = create_tasks(config, logger, storage, scan_collections(config), time_now, False, shard, None)
+            storage.transaction_commit()
+            logger.info('Queueing {} tasks after a full scan.'.format(len(tasks)))
+            for task in tasks:
+                pool.submit(task)
+
+        for collection, path_collection_file in changed_files:
+            path_system = Path(collections[collection]) / path_collection_file
+
+            # The file may have been removed or renamed again in the meantime.
+            if not path_system.is_file():
+                continue
+            if shard is not None and not shard.contains(collection, path_collection_file.as_posix()):
+                continue
 
-            # Ignore some files we'd rather not analyse.
             ignore_reason = must_ignore(path_collection_file)
             if ignore_reason is not None:
                 logger.decision('Ignoring {} because: {}'.format(path_system, ignore_reason))
                 continue
 
-            task_queue.put((collection, path_system, path_collection_file, time_now))
+            logger.info('{} changed, queueing it.'.format(path_collection_file))
+            pool.submit((collection, path_system, path_collection_file, time_now))
 
-    # Instruct processes to terminate.
-    for _ in range(proc_count):
-        task_queue.put(None)
+        if not pool.is_idle:
+            pool.poll(0.25)
 
-    # Wait for processes to complete.
-    for worker in workers:
-        worker.join()
+    watcher.close()
+
+    worker_stats = pool.stop()
+    if encode_pool is not None:
+        worker_stats.extend(encode_pool.stop())
+
+    db_writer.stop()
+    db_writer.join()
+
+    write_stage_timings(logger, worker_stats)
 
-    # Stop logger stream.
     logger_stream.stop()
     logger_stream.join()
 
-    storage.transaction_commit()
+    storage.close()
+
+
+def work(options):
+    """
+    Indexes files taken from a job queue until it is drained. Any number of hosts can work on the same queue at once.
+
+    :param options:
+    :return:
+    """
+
+    config = Config()
+
+    logger_stream = LoggerStream(config.get('paths.logs'))
+    logger = Logger(config.get('paths.logs'), logger_stream.queue, options.verbosity)
+    logger_stream.start()
+
+    lease_time = config.get('indexer.queue_lease_time')
+    job_queue = JobQueue(options.queue, lease_time, config.get('indexer.queue_max_attempts'))
+
+    # Jobs are leased by this process on behalf of all of its workers.
+    worker_name = '{}:{}'.format(socket.gethostname(), os.getpid())
+    logger.info('Working on queue {} as {}.'.format(options.queue, worker_name))
+
+    proc_count = get_process_count(options, logger)
+
+    # Jobs are completed once their entry is stored.
+    db_writer = DBWriter(options.verbosity, logger_stream.queue, config.get('indexer.db_batch_size'), config.get('indexer.db_batch_interval'), None, options.queue)
+    db_writer.start()
+
+    encode_pool = start_encode_pool(options, config, logger)
+    encode_queue = encode_pool.queue if encode_pool is not None else None
+
+    def on_result(_, entry: Entry):
+        db_writer.queue.put(entry)
+
+    def on_failure(task: Tuple, reason: str):
+        task_collection, task_path_system, task_path_collection_file, _ = task
+        logger.error('Failed to index {}: {}'.format(task_path_collection_file, reason))
+        logger.stream('quarantine', '{}: {}'.format(task_path_system, reason))
+        job_queue.fail(task_collection, task_path_collection_file.as_posix(), reason)
+
+    preload_workers(config, logger)
+    pool = WorkerPool(
+        proc_count, index_process, (options.verbosity, options.trace_allocations, None, encode_queue),
+        logger, config.get('indexer.task_timeout'), on_result, on_failure,
+        config.get('indexer.worker_max_tasks'), config.get('indexer.worker_max_memory') * 1024,
+        multiprocessing.get_context('fork')
+    )
+    pool.start()
+
+    collections: Dict[str, str] = config.get('paths.collections')
+    heartbeat_interval = lease_time / 3
+    next_heartbeat = 0.0
+    while True:
+        now = time.monotonic()
+        if now >= next_heartbeat:
+            job_queue.heartbeat(worker_name)
+            next_heartbeat = now + heartbeat_interval
+
+        # Claim only as many jobs as there are idle workers, so that other hosts can take the rest.
+        for _ in range(pool.free_count):
+            job = job_queue.claim(worker_name)
+            if job is None:
+                break
+
+            if job.collection not in collections:
+                job_queue.fail(job.collection, job.path, 'unknown collection')
+                continue
+
+            path_collection_file = Path(job.path)
+            path_system = Path(collections[job.collection]) / path_collection_file
+            pool.submit((job.collection, path_system, path_collection_file, job.start_time))
+
+        # Keep waiting while jobs leased by other hosts are unfinished, in case their lease expires.
+        if pool.is_idle and not job_queue.has_work(worker_name):
+            break
+
+        pool.poll(1.0)
+
+    worker_stats = pool.stop()
+    if encode_pool is not None:
+        worker_stats.extend(encode_pool.stop())
+
+    db_writer.stop()
+    db_writer.join()
+
+    counts = job_queue.counts()
+    logger.info('Queue has {} done and {} failed jobs.'.format(counts[JobState.DONE], counts[JobState.FAILED]))
+    job_queue.close()
+
+    write_stage_timings(logger, worker_stats)
+
+    logger_stream.stop()
+    logger_stream.join()
 
 
 def clean(options):
@@ -207,10 +677,89 @@ def clean(options):
     storage.authors.remove_orphans()
     logger.info('Removing empty directories...')
     storage.directories.remove_orphans()
+    logger.info('Resetting directory modification times...')
+    storage.directories.reset_mtimes()
 
     storage.transaction_commit()
 
 
+def verify(options) -> bool:
+    """
+    Verifies that every file in the collections is stored as exactly one up to date entry. If a shard count is given,
+    also verifies that the journals of a sharded run each completed, and that every file was stored by the shard it
+    belongs to and by no other.
+
+    :param options:
+    :return: True if no problems were found.
+    """
+
+    config = Config()
+    logger = Logger(config.get('paths.logs'), None, options.verbosity)
+    storage = Storage(config)
+
+    problem_count = 0
+    file_count = 0
+    for collection, path_collection in config.get('paths.collections').items():
+        logger.info('Verifying collection {}...'.format(collection))
+        manifest: Manifest = storage.entries.get_manifest(collection)
+        duplicate_paths: Dict[str, int] = storage.entries.get_duplicate_paths(collection)
+
+        for dir_entry in scan_collection(path_collection):
+            path_collection_file = Path(dir_entry.path).relative_to(path_collection)
+            if must_ignore(path_collection_file) is not None:
+                continue
+
+            file_count += 1
+            path = path_collection_file.as_posix()
+            stat = dir_entry.stat()
+            manifest_entry = manifest.get(path)
+            if manifest_entry is None:
+                logger.error('{} has no entry.'.format(path))
+                problem_count += 1
+            elif manifest_entry.file_size != stat.st_size or manifest_entry.file_modified < int(stat.st_mtime):
+                logger.error('{} has an outdated entry.'.format(path))
+                problem_count += 1
+
+            if path in duplicate_paths:
+                logger.error('{} has {} entries.'.format(path, duplicate_paths[path]))
+                problem_count += 1
+
+    storage.close()
+
+    if options.shard_count > 0:
+        logger.info('Verifying journals of {} shards...'.format(options.shard_count))
+
+        committed: Dict[JournalKey, List[int]] = {}
+        for number in range(1, options.shard_count + 1):
+            shard = Shard(number, options.shard_count)
+            journal = RunJournal(shard.get_journal_path(config.get('paths.journal')))
+            run_state = journal.read()
+            journal.close()
+
+            if run_state is None:
+                logger.error('Shard {} has no journal at {}.'.format(shard, journal.path))
+                problem_count += 1
+                continue
+            if not run_state.is_complete:
+                logger.error('Shard {} did not complete its run.'.format(shard))
+                problem_count += 1
+
+            for key, state in run_state.tasks.items():
+                if state == TaskState.COMMITTED:
+                    committed.setdefault(key, []).append(number)
+
+        for (collection, path), numbers in committed.items():
+            expected_number = get_shard_index(collection, path, options.shard_count) + 1
+            if numbers != [expected_number]:
+                logger.error('{} belongs to shard {}, but was stored by shards {}.'.format(
+                    path, expected_number, ', '.join(str(number) for number in numbers)
+                ))
+                problem_count += 1
+
+    logger.info('Verified {} files, found {} problems.'.format(file_count, problem_count))
+    return problem_count == 0
+
+
 def run():
     parser = OptionParser('Usage: index.py action [options]')
 
@@ -227,20 +776,66 @@ def run():
     group.add_option("--force", dest="force",
                       action="store_true", default=False,
                       help="Force indexing entries even if their files have not changed.")
+    group.add_option("--resume", dest="resume",
+                      action="store_true", default=False,
+                      help="Continue an interrupted run, skipping entries that it already stored.")
+    group.add_option("--watch", dest="watch",
+                      action="store_true", default=False,
+                      help="Keep running, and index files in the collections as soon as they are added or changed.")
+    group.add_option("--shard", dest="shard",
+                      help="Only index the files of one of a number of shards, given as number/count like 2/4. Every "
+                           "node of a sharded run must use the same count.")
+    group.add_option("--trace-allocations", dest="trace_allocations",
+                      action="store_true", default=False,
+                      help="Measure the memory growth of each processing stage. Slows down indexing considerably, and is not "
+                           "available on PyPy.")
+    parser.add_option_group(group)
+
+    group = OptionGroup(parser, '"work" action', 'Index files taken from a job queue, which can be shared between hosts.')
+    group.add_option("--queue", dest="queue",
+                      help="Path of the job queue file. With the index action, adds the files that need indexing to "
+                           "this queue instead of indexing them.")
     parser.add_option_group(group)
 
     group = OptionGroup(parser, '"clean" action', 'Clean database from deleted or orphaned data.')
     parser.add_option_group(group)
 
+    group = OptionGroup(parser, '"verify" action', 'Verify that every file is stored as exactly one up to date entry.')
+    group.add_option("--shards", dest="shard_count",
+                      default=0, type='int',
+                      help="Also verify the journals of a run that was sharded into this many shards.")
+    parser.add_option_group(group)
+
     (options, args) = parser.parse_args()
     if not len(args):
         parser.error('Missing action argument.')
 
+    if options.trace_allocations and not can_trace_memory():
+        parser.error('--trace-allocations requires tracemalloc, which this Python runtime does not provide.')
+
+    if options.shard is not None:
+        try:
+            options.shard = Shard.parse(options.shard)
+        except ValueError as e:
+            parser.error(str(e))
+
     action = args[0].lower()
     if action == 'index':
-        index(options)
+        if options.watch:
+            if options.filename or options.queue is not None or options.resume:
+                parser.error('--watch cannot be combined with --file, --queue or --resume.')
+            watch(options)
+        else:
+            index(options)
+    elif action == 'work':
+        if options.queue is None:
+            parser.error('The work action requires --queue.')
+        work(options)
     elif action == 'clean':
         clean(options)
+    elif action == 'verify':
+        if not verify(options):
+            sys.exit(1)
     else:
         parser.error('Unknown action argument "{}"'.format(action))
 
@@ -0,0 +1,167 @@
+import time
+from multiprocessing import Process, Queue
+from pathlib import Path
+from queue import Empty
+from typing import List, Optional, Tuple
+
+from indexer.entry import Entry
+from indexer.jobqueue import JobQueue
+from indexer.journal import RunJournal, TaskState
+from indexer.storage import Storage
+from utils.config import Config
+from utils.logger import Logger
+
+
+class DBWriter(Process):
+    """
+    Stores indexed entries in the database from a single process.
+
+    Entries are received over a queue and written in batched transactions, which are committed once enough entries
+    are collected or the oldest entry in the batch has been waiting for long enough. Remaining entries are always
+    written before the process exits. If a journal path is given, every entry is recorded as committed or failed. If a
+    job queue path is given, the job of every entry is completed or failed once it was written.
+    """
+
+    def __init__(self, verbosity: int, stream_queue: Queue, batch_size: int, batch_interval: float,
+                 journal_path: Optional[str] = None, job_queue_path: Optional[str] = None):
+        super().__init__(name='db-writer')
+
+        self.verbosity: int = verbosity
+        self.stream_queue: Queue = stream_queue
+        self.batch_size: int = max(batch_size, 1)
+        self.batch_interval: float = batch_interval
+        self.journal_path: Optional[str] = journal_path
+        self.job_queue_path: Optional[str] = job_queue_path
+
+        self.queue: Queue = Queue()
+
+    def run(self):
+        config = Config()
+        logger = Logger(config.get('paths.logs'), self.stream_queue, self.verbosity)
+        storage = Storage(config)
+        journal = RunJournal(self.journal_path) if self.journal_path is not None else None
+
+        job_queue: Optional[JobQueue] = None
+        if self.job_queue_path is not None:
+            job_queue = JobQueue(self.job_queue_path, config.get('indexer.queue_lease_time'), config.get('indexer.queue_max_attempts'))
+
+        batch: List[Entry] = []
+        batch_deadline: float = 0.0
+        while True:
+            timeout: Optional[float] = None
+            if len(batch):
+                timeout = max(batch_deadline - time.monotonic(), 0.0)
+
+            try:
+                entry = self.queue.get(timeout=timeout)
+            except Empty:
+                self._write_batch(batch, storage, logger, journal, job_queue)
+                batch = []
+                continue
+
+            if entry is None:
+                break
+
+            if not len(batch):
+                batch_deadline = time.monotonic() + self.batch_interval
+            batch.append(entry)
+
+            if len(batch) >= self.batch_size:
+                self._write_batch(batch, storage, logger, journal, job_queue)
+                batch = []
+
+        self._write_batch(batch, storage, logger, journal, job_queue)
+        storage.close()
+        if journal is not None:
+            journal.close()
+        if job_queue is not None:
+            job_queue.close()
+
+    def _write_batch(self, batch: List[Entry], storage: Storage, logger: Logger, journal: Optional[RunJournal],
+                     job_queue: Optional[JobQueue]):
+        if not len(batch):
+            return
+
+        logger.debug('Writing {} entries to the database.'.format(len(batch)))
+
+        # Writing an entry assigns database ids to it. A rolled back transaction leaves those pointing at rows that no
+        # longer exist, so entries are retried from the state they were received in.
+        received: List[Tuple[Optional[int], int]] = [(entry.id, entry.entry_created) for entry in batch]
+
+        try:
+            storage.transaction_commit()
+            storage.transaction_start()
+            for entry in batch:
+                self._write_entry(entry, storage)
+            storage.transaction_commit()
+
+            for entry in batch:
+                self._record(journal, job_queue, TaskState.COMMITTED, entry)
+            return
+
+        except Exception as e:
+            logger.warn('Unable to write batch of {} entries, retrying them one by one. {}'.format(len(batch), e))
+            self._rollback(storage, logger)
+
+        # Write each entry in its own transaction, so that a single bad entry cannot discard the rest of the batch.
+        for entry, (entry_id, entry_created) in zip(batch, received):
+            self._reset_entry(entry, entry_id, entry_created)
+            try:
+                storage.transaction_start()
+                self._write_entry(entry, storage)
+                storage.transaction_commit()
+                self._record(journal, job_queue, TaskState.COMMITTED, entry)
+            except Exception as e:
+                logger.error('Unable to write entry {}: {}'.format(entry.path, e))
+                logger.stream('db_write_error', '{}: {}'.format(entry.path, e))
+                self._rollback(storage, logger)
+                self._record(journal, job_queue, TaskState.FAILED, entry)
+
+    @staticmethod
+    def _rollback(storage: Storage, logger: Logger):
+
+        # A lost connection cannot be rolled back. Entries are then failed one by one like any other entry that cannot
+        # be written, instead of taking the process and all queued entries down with it.
+        try:
+            storage.transaction_rollback()
+        except Exception as e:
+            logger.error('Unable to roll back transaction: {}'.format(e))
+
+    @staticmethod
+    def _reset_entry(entry: Entry, entry_id: Optional[int], entry_created: int):
+        entry.id = entry_id
+        entry.entry_created = entry_created
+        entry.directory_id = None
+
+        for music in entry.music.values():
+            music.id = None
+        for map in entry.maps:
+            map.id = None
+            map.entry_id = None
+
+    @staticmethod
+    def _record(journal: Optional[RunJournal], job_queue: Optional[JobQueue], state: TaskState, entry: Entry):
+        if journal is not None:
+            journal.record(state, entry.collection, entry.path)
+
+        if job_queue is not None:
+            if state == TaskState.COMMITTED:
+                job_queue.complete(entry.collection, entry.path)
+            else:
+                job_queue.fail(entry.collection, entry.path, 'unable to write entry')
+
+    @staticmethod
+    def _write_entry(entry: Entry, storage: Storage):
+
+        # Keep the identity and creation time of an existing entry.
+        existing_entry = storage.entries.get_by_path(entry.collection, Path(entry.path))
+        if existing_entry is not None:
+            entry.id = existing_entry.id
+            entry.entry_created = existing_entry.entry_created
+
+        for music in entry.music.values():
+            storage.music.save(music)
+        entry.id = storage.entries.save(entry)
+
+    def stop(self):
+        self.queue.put(None)
@@ -15,6 +15,11 @@ class Downloader:
         self.mirror_list: List[str] = mirror_list
 
     def download(self, src_url: str, dest_path: Path):
+        # Download to a temporary file first, so that an interrupted download does not leave a partial file behind.
+        # Renaming the complete file also updates the modification time of its directory, which tells the indexer to
+        # scan that directory again.
+        temp_path = dest_path.with_name('.{}.download'.format(dest_path.name))
+
         try:
             modified_timestamp = None
 
@@ -23,10 +28,9 @@ class Downloader:
                 mirror_src_url = '{}/{}'.format(mirror_url, src_url)
                 self.logger.info('Downloading {}'.format(mirror_src_url))
 
-                with dest_path.open('wb') as file_dest:
+                with temp_path.open('wb') as file_dest:
 
                     # TODO: use ftplib if the source is ftp:// so we can use the primary Berlin FTP source
-                    # TODO: write to temp file first, and move when done to prevent script interruptions from leaving partial files behind
                     with request.urlopen(mirror_src_url) as request_src:
                         shutil.copyfileobj(request_src, file_dest)
 
@@ -36,7 +40,9 @@ class Downloader:
                         break
 
             if modified_timestamp is not None:
-                os.utime(dest_path, (modified_timestamp, modified_timestamp))
+                os.utime(temp_path, (modified_timestamp, modified_timestamp))
+            os.replace(temp_path, dest_path)
 
         except Exception as e:
             self.logger.error('Error while downloading {}: {}'.format(src_url, e))
+            temp_path.unlink(missing_ok=True)
@@ -0,0 +1,162 @@
+import dataclasses
+import threading
+import traceback
+from multiprocessing import Semaphore, SimpleQueue
+from multiprocessing.connection import Connection
+from typing import List, Optional, Tuple
+
+from extractors.extractedinfo import ExtractedInfo
+from indexer.indexer import WRITERS
+from indexer.instrumentation import Instrumentation
+from indexer.workerpool import WorkerPool, WorkerStreamQueue, worker_init, MESSAGE_RESULT, MESSAGE_STARTED, MESSAGE_STATS
+from utils.config import Config
+from utils.logger import Logger
+from writers.writerbase import WriterBase
+
+
+def create_encode_job(info: ExtractedInfo) -> ExtractedInfo:
+    """
+    Returns a copy of extracted information that can be sent to another process, without open archives.
+
+    :param info:
+    :return:
+    """
+
+    return dataclasses.replace(info, main_archive=None, archives=[], archive_list=None)
+
+
+class EncodeQueue:
+    """
+    A bounded queue of encode jobs shared between processes.
+
+    Putting a job blocks while the queue is full, which holds back the indexing workers until encoding catches up.
+    Unlike a multiprocessing.Queue, a job is written to the underlying pipe by the calling process itself before put
+    returns, so a job that was put is never lost when its process exits afterwards.
+
+    While putting a job, a process holds a free slot and the lock for writing to the pipe that all processes share.
+    Killing it then leaks the slot, or leaves the lock held so that every other process blocks forever. Index workers
+    therefore send MESSAGE_WAITING to their pool before putting a job, which exempts them from the task timeout. Put
+    gives up once no slot became free within its timeout instead, and the encode processes that free the slots are
+    supervised by a WorkerPool, so that neither can wait forever.
+    """
+
+    def __init__(self, size: int):
+        self.queue: SimpleQueue = SimpleQueue()
+        self.slots: Semaphore = Semaphore(max(size, 1))
+
+    def put(self, job: ExtractedInfo, timeout: float) -> bool:
+        """
+        Adds a job to the queue, waiting for a free slot if it is full.
+
+        :param job:
+        :param timeout: Maximum time to wait for a free slot, in seconds.
+        :return: Whether the job was added.
+        """
+
+        if not self.slots.acquire(timeout=timeout):
+            return False
+
+        self.queue.put(job)
+        return True
+
+    def get(self) -> Optional[ExtractedInfo]:
+        job = self.queue.get()
+        if job is not None:
+            self.slots.release()
+
+        return job
+
+    def stop(self):
+        self.queue.put(None)
+
+
+def encode_process(verbosity: int, trace_allocations: bool, encode_queue: EncodeQueue, connection: Connection) -> None:
+    """
+    Runs all writers for jobs taken from an encode queue, as a worker of the encode pool.
+
+    Each job is reported to the pool as a task, so that a writer that hangs is killed after the task timeout.
+
+    :return:
+    """
+
+    worker_init()
+
+    config = Config()
+    logger = Logger(config.get('paths.logs'), WorkerStreamQueue(connection), verbosity)
+    instrumentation = Instrumentation(trace_allocations)
+
+    writers: List[WriterBase] = []
+    for writer_class in WRITERS:
+        writers.append(writer_class(logger, config))
+
+    for info in iter(encode_queue.get, None):
+        connection.send((MESSAGE_STARTED, (info.path_idgames,)))
+        logger.debug('Encoding assets for {}.'.format(info.path_idgames))
+
+        for writer in writers:
+            try:
+                with instrumentation.measure(type(writer).__name__):
+                    writer.write(info)
+            except Exception as e:
+                logger.error('{} failed for {}: {}'.format(type(writer).__name__, info.path_idgames, e))
+                logger.stream('encode_error', '{}\n{}'.format(info.path_idgames, traceback.format_exc()))
+
+        connection.send((MESSAGE_RESULT, None))
+
+    for writer in reversed(writers):
+        writer.close()
+
+    connection.send((MESSAGE_STATS, instrumentation))
+
+
+class EncodePool:
+    """
+    A number of encode processes that share a single encode queue.
+
+    The encode processes are supervised by a WorkerPool, which is polled from a thread of its own so that the caller
+    does not need to. Encoding a job that takes longer than the task timeout fails it.
+    """
+
+    def __init__(self, size: int, queue_size: int, verbosity: int, logger: Logger, task_timeout: float,
+                 trace_allocations: bool):
+        self.logger: Logger = logger
+        self.queue: EncodeQueue = EncodeQueue(queue_size)
+        self.pool: WorkerPool = WorkerPool(
+            size, encode_process, (verbosity, trace_allocations, self.queue), logger, task_timeout,
+            self.on_result, self.on_failure, name='encode'
+        )
+
+        self.is_stopping: threading.Event = threading.Event()
+        self.supervisor: threading.Thread = threading.Thread(target=self.supervise, name='encode-supervisor')
+
+    def start(self):
+        self.pool.start()
+        self.supervisor.start()
+
+    def supervise(self):
+        while not self.is_stopping.is_set():
+            self.pool.poll(1.0)
+
+    def on_result(self, _, __):
+        pass
+
+    def on_failure(self, task: Tuple, reason: str):
+        self.logger.error('Failed to encode assets for {}: {}'.format(task[0], reason))
+        self.logger.stream('encode_error', '{}: {}'.format(task[0], reason))
+
+    def stop(self) -> List[Instrumentation]:
+        """
+        Waits for all queued jobs to be encoded, then stops the encode processes.
+
+        :return: The stage timings of each encode process.
+        """
+
+        self.is_stopping.set()
+        self.supervisor.join()
+
+        # Every encode process exits after taking one of these from the queue, once the jobs before them are done.
+        self.pool.is_stopping = True
+        for _ in range(self.pool.size):
+            self.queue.stop()
+
+        return self.pool.stop()
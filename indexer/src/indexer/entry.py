@@ -15,6 +15,9 @@ class Entry:
         self.path: str = path
         self.file_modified: int = file_modified
         self.file_size: int = file_size
+        self.file_hash: Optional[bytes] = None
+        self.index_time: Optional[int] = None
+        self.index_memory: Optional[int] = None
         self.entry_updated: int = entry_updated
         self.entry_created: int = entry_created
 
@@ -52,6 +55,9 @@ class Entry:
             'entry_updated': self.entry_updated,
             'entry_created': self.entry_created,
             'file_size': self.file_size,
+            'file_hash': self.file_hash,
+            'index_time': self.index_time,
+            'index_memory': self.index_memory,
             'title': self.title,
             'game': self.game.value if self.game is not None else None,
             'engine': self.engine.value if self.engine is not None else None,
@@ -85,6 +91,9 @@ class Entry:
         entry.engine = Engine(row['engine'])
         entry.directory_id = row['directory_id']
         entry.file_size = row['file_size']
+        entry.file_hash = row['file_hash']
+        entry.index_time = row['index_time']
+        entry.index_memory = row['index_memory']
         entry.is_singleplayer = row['is_singleplayer']
         entry.is_cooperative = row['is_cooperative']
         entry.is_deathmatch = row['is_deathmatch']
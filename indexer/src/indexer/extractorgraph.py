@@ -0,0 +1,109 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Set
+
+from extractors.extractedinfo import ExtractedInfo
+from extractors.extractorbase import ExtractorBase
+
+
+ExtractorRunner = Callable[[ExtractorBase, ExtractedInfo], None]
+
+
+def has_value(info: ExtractedInfo, field: str) -> bool:
+    value = getattr(info, field, None)
+    if value is None:
+        return False
+    if isinstance(value, (list, dict, set, str)):
+        return len(value) > 0
+
+    return True
+
+
+class ExtractorGraph:
+    """
+    Runs extractors in an order that respects the fields they read and write.
+
+    An extractor depends on every earlier extractor in the list that writes a field it reads or writes, or that reads
+    a field it writes. Running extractors in any order that satisfies these dependencies gives the same result as
+    running them in list order, so extractors without a path between them can run at the same time.
+    """
+
+    def __init__(self, extractors: List[ExtractorBase], thread_count: int = 1):
+        self.extractors: List[ExtractorBase] = extractors
+        self.dependencies: List[Set[int]] = []
+        self.dependents: List[Set[int]] = [set() for _ in extractors]
+
+        for index, extractor in enumerate(extractors):
+            dependencies: Set[int] = set()
+            for other_index in range(index):
+                other = extractors[other_index]
+                if other.WRITES & (extractor.READS | extractor.WRITES) or other.READS & extractor.WRITES:
+                    dependencies.add(other_index)
+                    self.dependents[other_index].add(index)
+            self.dependencies.append(dependencies)
+
+        self.executor: Optional[ThreadPoolExecutor] = None
+        if thread_count > 1:
+            self.executor = ThreadPoolExecutor(thread_count, 'extractor')
+
+    def run(self, info: ExtractedInfo, runner: ExtractorRunner, skip: Set[type]):
+        """
+        Runs all extractors on info. Extractors whose required fields have no value once they are due are skipped.
+
+        :param info:
+        :param runner: Called to run a single extractor.
+        :param skip: Extractor classes to skip.
+        :return:
+        """
+
+        if self.executor is None:
+            for index in range(len(self.extractors)):
+                self._run_extractor(index, info, runner, skip)
+            return
+
+        remaining: Dict[int, int] = {index: len(dependencies) for index, dependencies in enumerate(self.dependencies)}
+        running: Dict[Future, int] = {}
+        error: Optional[BaseException] = None
+
+        def start_ready():
+            for index in [index for index, count in remaining.items() if count == 0]:
+                del remaining[index]
+                running[self.executor.submit(self._run_extractor, index, info, runner, skip)] = index
+
+        start_ready()
+        while len(running):
+            done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                if future.exception() is not None:
+                    if error is None:
+                        error = future.exception()
+                    continue
+
+                for dependent in self.dependents[index]:
+                    if dependent in remaining:
+                        remaining[dependent] -= 1
+
+            # Let running extractors finish, but do not start new ones after a failure.
+            if error is None:
+                start_ready()
+
+        if error is not None:
+            raise error
+
+    def _run_extractor(self, index: int, info: ExtractedInfo, runner: ExtractorRunner, skip: Set[type]):
+        extractor = self.extractors[index]
+        if type(extractor) in skip:
+            return
+
+        for field in extractor.REQUIRES:
+            if not has_value(info, field):
+                return
+
+        runner(extractor, info)
+
+    def close(self):
+        if self.executor is None:
+            return
+
+        self.executor.shutdown()
+        self.executor = None
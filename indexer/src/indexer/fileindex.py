@@ -6,6 +6,8 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List
 
+from indexer.scanner import scan_collection
+
 
 class FileIndexEntry:
     __slots__ = ['path', 'size', 'date']
@@ -36,15 +38,14 @@ class FileIndex:
     def from_local_directory(path: Path, ignore_paths: List[str]) -> FileIndex:
         files: FileIndexEntryDict = {}
 
-        for file_path in path.glob('**/*'):
-            if file_path.is_dir():
-                continue
-
-            path_str = str(file_path.relative_to(path))
+        # Reuse the stat results cached on each directory entry.
+        path_prefix_length = len(str(path)) + 1
+        for dir_entry in scan_collection(str(path), ''):
+            path_str = dir_entry.path[path_prefix_length:]
             if FileIndex.must_ignore_path(path_str, ignore_paths):
                 continue
 
-            stat = file_path.stat()
+            stat = dir_entry.stat()
             date = datetime.fromtimestamp(stat.st_mtime)
             date = date.replace(hour=0, minute=0, second=0, microsecond=0)
             size = stat.st_size
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from extractors.archiveextractor import ArchiveExtractor
 from extractors.archivelistextractor import ArchiveListExtractor
@@ -16,8 +16,11 @@ from extractors.mapinfoextractor import MapInfoExtractor
 from extractors.musicextractor import MusicExtractor
 from extractors.propertyextractor import PropertyExtractor
 from extractors.textextractor import TextExtractor
+from indexer.extractorgraph import ExtractorGraph
+from indexer.instrumentation import Instrumentation
 
 from utils.config import Config
+from utils.file_hash import file_hash
 from utils.logger import Logger
 from writers.mapimagewriter import MapImageWriter
 from writers.mappreviewwriter import MapPreviewWriter
@@ -53,18 +56,36 @@ WRITERS = [
 
 class Indexer:
 
-    def __init__(self, config: Config, logger: Logger):
+    def __init__(self, config: Config, logger: Logger, instrumentation: Optional[Instrumentation] = None,
+                 run_writers: bool = True):
         self.config: Config = config
         self.logger: Logger = logger
+        self.instrumentation: Instrumentation = instrumentation if instrumentation is not None else Instrumentation()
 
         # Initialize processor instances.
         self.extractors: List[ExtractorBase] = []
         for extractor_class in EXTRACTORS:
             self.extractors.append(extractor_class(logger, config))
+        self.extractor_graph: ExtractorGraph = ExtractorGraph(self.extractors, config.get('indexer.extractor_threads'))
 
+        # Writers can also be run separately, see indexer.encoder.
         self.writers: List[WriterBase] = []
-        for writer_class in WRITERS:
-            self.writers.append(writer_class(logger, config))
+        if run_writers:
+            for writer_class in WRITERS:
+                self.writers.append(writer_class(logger, config))
+
+    @staticmethod
+    def preload(config: Config, logger: Logger):
+        """
+        Loads the data that extractors share, before worker processes that create indexers are forked.
+
+        :param config:
+        :param logger:
+        :return:
+        """
+
+        for extractor_class in EXTRACTORS:
+            extractor_class.preload(logger, config)
 
     def index_file(self, path_local: Path, path_collection: Path, skip_graphics: bool = False) -> ExtractedInfo:
         path_local_base = path_local.parents[0] / path_local.stem
@@ -80,24 +101,31 @@ class Indexer:
             filename_base,
             stat.st_size,
             int(stat.st_mtime),
+            file_hash(path_local),
         )
 
-        # Run all extractors and writers in sequence.
-        for extractor in self.extractors:
-            if skip_graphics and isinstance(extractor, GraphicsExtractor):
-                continue
-            extractor.extract(info)
+        # Run all extractors, then all writers in sequence.
+        try:
+            skip = {GraphicsExtractor} if skip_graphics else set()
+            self.extractor_graph.run(info, self._run_extractor, skip)
 
-        for writer in self.writers:
-            writer.write(info)
+            for writer in self.writers:
+                with self.instrumentation.measure(type(writer).__name__):
+                    writer.write(info)
 
-        # Clean up extractors.
-        for extractor in reversed(self.extractors):
-            extractor.cleanup(info)
+        # Clean up extractors, also if one of them failed so that no archives are left open.
+        finally:
+            for extractor in reversed(self.extractors):
+                extractor.cleanup(info)
 
         return info
 
+    def _run_extractor(self, extractor: ExtractorBase, info: ExtractedInfo):
+        with self.instrumentation.measure(type(extractor).__name__):
+            extractor.extract(info)
+
     def close(self):
+        self.extractor_graph.close()
 
         # Close extractor and writer classes.
         for writer in reversed(self.writers):
@@ -0,0 +1,165 @@
+import time
+from contextlib import contextmanager
+from math import floor, log10
+from typing import Dict, Iterator, Optional
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def can_trace_memory() -> bool:
+    """
+    Returns whether this Python runtime can trace memory, which PyPy cannot.
+    """
+
+    return tracemalloc is not None
+
+
+class Histogram:
+    """
+    Histogram with logarithmically sized buckets.
+
+    Histograms are small and can be merged, so that they can be collected in separate processes and combined
+    afterwards. Percentiles are accurate to within the size of a bucket, about 12% of the value.
+    """
+
+    BUCKETS_PER_DECADE: int = 20
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.zero_count: int = 0
+        self.count: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+        if value <= 0:
+            self.zero_count += 1
+            return
+
+        bucket = floor(log10(value) * Histogram.BUCKETS_PER_DECADE)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def merge(self, other: 'Histogram'):
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.zero_count += other.zero_count
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+
+    def percentile(self, percentile: float) -> float:
+        if not self.count:
+            return 0.0
+
+        rank = percentile / 100 * self.count
+        seen = self.zero_count
+        if seen >= rank:
+            return 0.0
+
+        for bucket in sorted(self.buckets.keys()):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(10 ** ((bucket + 1) / Histogram.BUCKETS_PER_DECADE), self.max)
+
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'total': self.total,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+
+class StageStats:
+
+    def __init__(self):
+        self.wall_time: Histogram = Histogram()
+        self.cpu_time: Histogram = Histogram()
+        self.memory_growth: Histogram = Histogram()
+
+    def merge(self, other: 'StageStats'):
+        self.wall_time.merge(other.wall_time)
+        self.cpu_time.merge(other.cpu_time)
+        self.memory_growth.merge(other.memory_growth)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        summary = {
+            'wall_time': self.wall_time.summary(),
+            'cpu_time': self.cpu_time.summary(),
+        }
+        if self.memory_growth.count:
+            summary['memory_growth'] = self.memory_growth.summary()
+
+        return summary
+
+
+class Instrumentation:
+    """
+    Records the wall time, CPU time and optionally memory growth of named processing stages.
+
+    Memory growth is the net change in memory traced by tracemalloc over a stage, so stages that free more than they
+    allocate count as zero in the percentiles. Tracing is process-wide, so growth caused by other threads running at
+    the same time is included. It is only measured if tracemalloc is available and tracing was started with
+    trace_allocations, as tracing slows down processing considerably.
+    """
+
+    def __init__(self, trace_allocations: bool = False):
+        self.stages: Dict[str, StageStats] = {}
+
+        self.trace_allocations: bool = trace_allocations and tracemalloc is not None
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def measure(self, stage: str, process_time: bool = False) -> Iterator[None]:
+        """
+        Measures a stage.
+
+        :param stage: the name of the stage to record the measurements under.
+        :param process_time: measure the CPU time of all threads in the process instead of only the current thread.
+        Use this for stages that hand work off to other threads.
+        """
+        memory_start: Optional[int] = None
+        if self.trace_allocations:
+            memory_start = tracemalloc.get_traced_memory()[0]
+
+        cpu_clock = time.process_time if process_time else time.thread_time
+        wall_start = time.perf_counter()
+        cpu_start = cpu_clock()
+        try:
+            yield
+        finally:
+            cpu_time = cpu_clock() - cpu_start
+            wall_time = time.perf_counter() - wall_start
+
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = StageStats()
+                self.stages[stage] = stats
+
+            stats.wall_time.add(wall_time)
+            stats.cpu_time.add(cpu_time)
+            if memory_start is not None:
+                stats.memory_growth.add(tracemalloc.get_traced_memory()[0] - memory_start)
+
+    def merge(self, other: 'Instrumentation'):
+        for stage, other_stats in other.stages.items():
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = StageStats()
+                self.stages[stage] = stats
+            stats.merge(other_stats)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        return dict((stage, stats.summary()) for stage, stats in self.stages.items())
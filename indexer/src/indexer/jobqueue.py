@@ -0,0 +1,180 @@
+import sqlite3
+import time
+from enum import Enum
+from typing import Dict, Iterable, Optional, Tuple
+
+
+class JobState(Enum):
+    QUEUED = 'queued'
+    LEASED = 'leased'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+class Job:
+    __slots__ = ['id', 'collection', 'path', 'start_time', 'attempts']
+
+    def __init__(self, id: int, collection: str, path: str, start_time: int, attempts: int):
+        self.id: int = id
+        self.collection: str = collection
+        self.path: str = path
+        self.start_time: int = start_time
+        self.attempts: int = attempts
+
+
+class JobQueue:
+    """
+    A queue of files to index, stored in a SQLite database file that workers on any number of hosts can share.
+
+    A worker claims a job by taking a lease on it, which expires unless the worker renews it with regular heartbeats.
+    Jobs whose lease expired, because their worker crashed or lost its connection, are handed out again to the next
+    worker that asks, up to a maximum number of attempts. Every change is a short transaction that locks the database
+    file, so the file must be on a filesystem with working locks.
+
+    Jobs are identified by their collection and their path inside that collection, so that hosts with the collections
+    mounted in different places can share a queue.
+    """
+
+    def __init__(self, path: str, lease_time: float, max_attempts: int):
+        self.path: str = path
+        self.lease_time: float = lease_time
+        self.max_attempts: int = max_attempts
+
+        self.db: sqlite3.Connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                collection TEXT NOT NULL,
+                path TEXT NOT NULL,
+                start_time INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_expires REAL,
+                error TEXT,
+                UNIQUE (collection, path)
+            )
+        ''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS jobs_state_IDX ON jobs (state, id)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS jobs_worker_IDX ON jobs (worker, state)')
+
+    def enqueue(self, jobs: Iterable[Tuple[str, str, int]]) -> int:
+        """
+        Adds jobs to the end of the queue, in order. Jobs that are done or have failed are queued again in their
+        original place, with their attempts reset. Jobs that are still queued or leased are left alone, so that a job
+        is never processed by two workers at once.
+
+        :param jobs: Tuples of collection, path and run start time.
+        :return: The number of jobs added or queued again.
+        """
+
+        count = 0
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            for collection, path, start_time in jobs:
+                cursor = self.db.execute(
+                    'INSERT INTO jobs (collection, path, start_time, state) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (collection, path) DO UPDATE SET '
+                    'start_time=excluded.start_time, state=excluded.state, attempts=0, worker=NULL, lease_expires=NULL, error=NULL '
+                    'WHERE state IN (?, ?)',
+                    (collection, path, start_time, JobState.QUEUED.value, JobState.DONE.value, JobState.FAILED.value)
+                )
+                count += cursor.rowcount
+            self.db.execute('COMMIT')
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+
+        return count
+
+    def claim(self, worker: str) -> Optional[Job]:
+        """
+        Leases the next available job to a worker.
+
+        :param worker: A name that is unique to the claiming worker across all hosts.
+        :return: The claimed job, or None if no job is available right now.
+        """
+
+        now = time.time()
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            while True:
+                row = self.db.execute(
+                    'SELECT id, collection, path, start_time, attempts FROM jobs WHERE state=? OR (state=? AND lease_expires<?) ORDER BY id LIMIT 1',
+                    (JobState.QUEUED.value, JobState.LEASED.value, now)
+                ).fetchone()
+                if row is None:
+                    self.db.execute('COMMIT')
+                    return None
+
+                job = Job(*row)
+
+                # Give up on jobs that keep taking their worker down with them.
+                if job.attempts >= self.max_attempts:
+                    self.db.execute(
+                        'UPDATE jobs SET state=?, worker=NULL, error=? WHERE id=?',
+                        (JobState.FAILED.value, 'lease expired {} times'.format(job.attempts), job.id)
+                    )
+                    continue
+
+                job.attempts += 1
+                self.db.execute(
+                    'UPDATE jobs SET state=?, attempts=?, worker=?, lease_expires=? WHERE id=?',
+                    (JobState.LEASED.value, job.attempts, worker, now + self.lease_time, job.id)
+                )
+                self.db.execute('COMMIT')
+                return job
+
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+
+    def heartbeat(self, worker: str):
+        """
+        Renews the leases of all jobs held by a worker.
+
+        :param worker:
+        :return:
+        """
+
+        self.db.execute(
+            'UPDATE jobs SET lease_expires=? WHERE worker=? AND state=?',
+            (time.time() + self.lease_time, worker, JobState.LEASED.value)
+        )
+
+    def complete(self, collection: str, path: str):
+        self.db.execute(
+            'UPDATE jobs SET state=?, worker=NULL, error=NULL WHERE collection=? AND path=?',
+            (JobState.DONE.value, collection, path)
+        )
+
+    def fail(self, collection: str, path: str, reason: str):
+        self.db.execute(
+            'UPDATE jobs SET state=?, worker=NULL, error=? WHERE collection=? AND path=?',
+            (JobState.FAILED.value, reason, collection, path)
+        )
+
+    def has_work(self, worker: str) -> bool:
+        """
+        Returns whether any job is queued, or leased by a worker other than the given one. Leases of other workers may
+        still expire, after which their jobs become available again.
+
+        :param worker:
+        :return:
+        """
+
+        row = self.db.execute(
+            'SELECT 1 FROM jobs WHERE state=? OR (state=? AND worker<>?) LIMIT 1',
+            (JobState.QUEUED.value, JobState.LEASED.value, worker)
+        ).fetchone()
+        return row is not None
+
+    def counts(self) -> Dict[JobState, int]:
+        counts: Dict[JobState, int] = {state: 0 for state in JobState}
+        for state, count in self.db.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state'):
+            counts[JobState(state)] = count
+
+        return counts
+
+    def close(self):
+        self.db.close()
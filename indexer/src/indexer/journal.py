@@ -0,0 +1,121 @@
+import json
+import os
+from enum import Enum
+from typing import Dict, Optional, Tuple
+
+
+class TaskState(Enum):
+    QUEUED = 'queued'
+    STARTED = 'started'
+    COMMITTED = 'committed'
+    FAILED = 'failed'
+
+
+JournalKey = Tuple[str, str]
+
+
+class RunState:
+    """
+    The state of a run as read back from a journal.
+    """
+
+    def __init__(self, start_time: int, force: bool):
+        self.start_time: int = start_time
+        self.force: bool = force
+        self.is_complete: bool = False
+        self.tasks: Dict[JournalKey, TaskState] = {}
+
+    def is_committed(self, collection: str, path: str) -> bool:
+        return self.tasks.get((collection, path)) == TaskState.COMMITTED
+
+    def count(self, state: TaskState) -> int:
+        return sum(1 for task_state in self.tasks.values() if task_state == state)
+
+
+class RunJournal:
+    """
+    Append-only record of the progress of an index run.
+
+    Every process that takes part in a run opens the journal by itself. Each record is a single JSON line written with
+    one unbuffered append, so records from different processes do not interleave and a record survives the process
+    being killed as soon as record returns. Committed tasks and run completion, which resuming relies on, are also
+    synced to disk so that they survive a host crash.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self.fd: Optional[int] = None
+
+    def begin(self, start_time: int, force: bool):
+        """
+        Starts a new run, discarding the records of any previous one.
+
+        :param start_time:
+        :param force:
+        :return:
+        """
+
+        self.close()
+        with open(self.path, 'w') as f:
+            f.write(json.dumps({'run': start_time, 'force': force}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def complete(self):
+        self._write({'complete': True}, True)
+
+    def record(self, state: TaskState, collection: str, path: str):
+        self._write({'state': state.value, 'collection': collection, 'path': path}, state == TaskState.COMMITTED)
+
+    def _write(self, record: dict, sync: bool = False):
+        self._write_raw(json.dumps(record) + '\n')
+        if sync:
+            os.fsync(self.fd)
+
+    def _write_raw(self, text: str):
+        if self.fd is None:
+            self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        os.write(self.fd, text.encode('utf8'))
+
+    def read(self) -> Optional[RunState]:
+        """
+        Returns the state of the last run recorded in the journal, or None if there is none.
+
+        A partially written last line, left behind if the run was interrupted while writing it, is ignored and
+        terminated so that records appended by a resumed run start on a line of their own.
+
+        :return:
+        """
+
+        if not os.path.exists(self.path):
+            return None
+
+        run_state: Optional[RunState] = None
+        line = '\n'
+        with open(self.path, 'r', encoding='utf8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+
+                if 'run' in record:
+                    run_state = RunState(record['run'], record['force'])
+                elif run_state is None:
+                    continue
+                elif 'complete' in record:
+                    run_state.is_complete = True
+                else:
+                    run_state.tasks[(record['collection'], record['path'])] = TaskState(record['state'])
+
+        if not line.endswith('\n'):
+            self._write_raw('\n')
+
+        return run_state
+
+    def close(self):
+        if self.fd is None:
+            return
+
+        os.close(self.fd)
+        self.fd = None
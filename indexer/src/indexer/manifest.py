@@ -0,0 +1,17 @@
+from typing import Dict, Optional
+
+
+class ManifestEntry:
+    __slots__ = ['path', 'file_modified', 'file_size', 'file_hash', 'index_time', 'index_memory']
+
+    def __init__(self, path: str, file_modified: int, file_size: int, file_hash: Optional[bytes],
+                 index_time: Optional[int], index_memory: Optional[int]):
+        self.path: str = path
+        self.file_modified: int = file_modified
+        self.file_size: int = file_size
+        self.file_hash: Optional[bytes] = file_hash
+        self.index_time: Optional[int] = index_time
+        self.index_memory: Optional[int] = index_memory
+
+
+Manifest = Dict[str, ManifestEntry]
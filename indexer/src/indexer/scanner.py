@@ -0,0 +1,79 @@
+import os
+from typing import Dict, Iterator, Optional
+
+
+# Modification times of directories in nanoseconds, by path relative to the collection.
+DirectoryMtimes = Dict[str, int]
+
+
+def scan_collection(path: str, extension: str = '.zip', known_mtimes: Optional[DirectoryMtimes] = None,
+                    scanned_mtimes: Optional[DirectoryMtimes] = None) -> Iterator[os.DirEntry]:
+    """
+    Recursively yields directory entries for files ending in extension, in sorted path order.
+
+    Uses os.scandir so that file type information comes from the directory listing itself and stat results are
+    cached on each returned DirEntry.
+
+    A directory's modification time only changes when entries are added to, removed from or renamed inside that
+    directory itself. If known_mtimes is given, the files of directories whose modification time equals the known one
+    are therefore not yielded. Their subdirectories are still visited, because those may have changed by themselves.
+
+    :param path:
+    :param extension:
+    :param known_mtimes: Modification times of directories from a previous scan.
+    :param scanned_mtimes: Receives the modification times of all directories below path as they are scanned.
+    :return:
+    """
+
+    yield from _scan_directory(path, '', extension, known_mtimes, scanned_mtimes)
+
+
+def _scan_directory(path: str, path_relative: str, extension: str, known_mtimes: Optional[DirectoryMtimes],
+                    scanned_mtimes: Optional[DirectoryMtimes]) -> Iterator[os.DirEntry]:
+    with os.scandir(path) as it:
+        dir_entries = sorted(it, key=lambda dir_entry: dir_entry.name)
+
+    for dir_entry in dir_entries:
+        if dir_entry.is_dir(follow_symlinks=False):
+            if path_relative:
+                dir_relative = '{}/{}'.format(path_relative, dir_entry.name)
+            else:
+                dir_relative = dir_entry.name
+
+            is_unchanged = False
+            if known_mtimes is not None or scanned_mtimes is not None:
+                mtime = dir_entry.stat(follow_symlinks=False).st_mtime_ns
+                if scanned_mtimes is not None:
+                    scanned_mtimes[dir_relative] = mtime
+                if known_mtimes is not None:
+                    is_unchanged = known_mtimes.get(dir_relative) == mtime
+
+            if is_unchanged:
+                yield from _scan_subdirectories(dir_entry.path, dir_relative, extension, known_mtimes, scanned_mtimes)
+            else:
+                yield from _scan_directory(dir_entry.path, dir_relative, extension, known_mtimes, scanned_mtimes)
+
+        elif dir_entry.name.endswith(extension) and dir_entry.is_file():
+            yield dir_entry
+
+
+def _scan_subdirectories(path: str, path_relative: str, extension: str, known_mtimes: Optional[DirectoryMtimes],
+                         scanned_mtimes: Optional[DirectoryMtimes]) -> Iterator[os.DirEntry]:
+    """
+    Scans only the subdirectories of an unchanged directory, without looking at its files.
+    """
+
+    with os.scandir(path) as it:
+        dir_entries = sorted((dir_entry for dir_entry in it if dir_entry.is_dir(follow_symlinks=False)), key=lambda dir_entry: dir_entry.name)
+
+    for dir_entry in dir_entries:
+        dir_relative = '{}/{}'.format(path_relative, dir_entry.name)
+
+        mtime = dir_entry.stat(follow_symlinks=False).st_mtime_ns
+        if scanned_mtimes is not None:
+            scanned_mtimes[dir_relative] = mtime
+
+        if known_mtimes.get(dir_relative) == mtime:
+            yield from _scan_subdirectories(dir_entry.path, dir_relative, extension, known_mtimes, scanned_mtimes)
+        else:
+            yield from _scan_directory(dir_entry.path, dir_relative, extension, known_mtimes, scanned_mtimes)
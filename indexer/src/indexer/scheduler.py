@@ -0,0 +1,61 @@
+from typing import Iterable, List, Optional, Tuple
+
+from indexer.manifest import ManifestEntry
+
+
+class ScheduledTask:
+    __slots__ = ['task', 'file_size', 'index_time', 'index_memory']
+
+    def __init__(self, task: Tuple, file_size: int, manifest_entry: Optional[ManifestEntry]):
+        self.task: Tuple = task
+        self.file_size: int = file_size
+        self.index_time: Optional[int] = manifest_entry.index_time if manifest_entry is not None else None
+        self.index_memory: Optional[int] = manifest_entry.index_memory if manifest_entry is not None else None
+
+
+def get_time_per_byte(manifest_entries: Iterable[ManifestEntry]) -> float:
+    """
+    Returns the average indexing time per byte of file size over all entries that have a recorded indexing time.
+
+    :param manifest_entries:
+    :return:
+    """
+
+    total_time = 0
+    total_size = 0
+    for manifest_entry in manifest_entries:
+        if not manifest_entry.index_time or not manifest_entry.file_size:
+            continue
+        total_time += manifest_entry.index_time
+        total_size += manifest_entry.file_size
+
+    if not total_size:
+        return 1.0
+
+    return total_time / total_size
+
+
+def order_longest_first(scheduled_tasks: List[ScheduledTask], time_per_byte: float) -> List[Tuple]:
+    """
+    Returns tasks ordered by their expected cost, most expensive first.
+
+    Queueing the longest tasks first (LPT scheduling) keeps a few large files from being picked up at the end of a
+    run and leaving a single worker busy while the others are idle. The cost is the indexing time recorded for the
+    entry during a previous run, or one estimated from the file size if there is none. Peak memory use breaks ties.
+
+    :param scheduled_tasks:
+    :param time_per_byte:
+    :return:
+    """
+
+    def cost(scheduled_task: ScheduledTask) -> Tuple[float, int]:
+        if scheduled_task.index_time is not None:
+            index_time = scheduled_task.index_time
+        else:
+            index_time = scheduled_task.file_size * time_per_byte
+
+        return index_time, scheduled_task.index_memory or 0
+
+    scheduled_tasks.sort(key=cost, reverse=True)
+
+    return [scheduled_task.task for scheduled_task in scheduled_tasks]
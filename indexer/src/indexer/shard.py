@@ -0,0 +1,75 @@
+from hashlib import blake2b
+
+
+def get_shard_index(collection: str, path: str, count: int) -> int:
+    """
+    Returns the zero-based index of the shard that a file belongs to.
+
+    The index is derived from a hash of the collection name and the file's path inside the collection, so that every
+    node assigns a file to the same shard regardless of platform, Python version or the order in which files are found.
+
+    :param collection:
+    :param path: Path of the file relative to the collection, with forward slashes.
+    :param count: Total number of shards.
+    :return:
+    """
+
+    digest = blake2b('{}/{}'.format(collection, path).encode('utf8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') % count
+
+
+class Shard:
+    """
+    One of a number of disjoint parts of the files in all collections. Numbered from 1 up to and including count.
+    """
+
+    __slots__ = ['number', 'count']
+
+    def __init__(self, number: int, count: int):
+        if count < 1:
+            raise ValueError('Shard count must be at least 1.')
+        if number < 1 or number > count:
+            raise ValueError('Shard number must be between 1 and {}.'.format(count))
+
+        self.number: int = number
+        self.count: int = count
+
+    @staticmethod
+    def parse(text: str):
+        """
+        Parses a shard from text in the form "number/count", like "2/4".
+
+        :param text:
+        :return:
+        """
+
+        number, separator, count = text.partition('/')
+        if not separator:
+            raise ValueError('Shard "{}" must be in the form number/count.'.format(text))
+
+        try:
+            return Shard(int(number), int(count))
+        except ValueError as e:
+            raise ValueError('Invalid shard "{}": {}'.format(text, e))
+
+    def contains(self, collection: str, path: str) -> bool:
+        return get_shard_index(collection, path, self.count) == self.number - 1
+
+    def get_journal_path(self, path: str) -> str:
+        """
+        Returns the path of the journal for this shard, derived from the path of the journal of an unsharded run.
+
+        Each shard keeps its own journal, so that nodes sharing a log directory do not overwrite each other's.
+
+        :param path:
+        :return:
+        """
+
+        base, dot, extension = path.rpartition('.')
+        if not dot or '/' in extension:
+            return '{}.shard-{}-of-{}'.format(path, self.number, self.count)
+
+        return '{}.shard-{}-of-{}.{}'.format(base, self.number, self.count, extension)
+
+    def __str__(self) -> str:
+        return '{}/{}'.format(self.number, self.count)
@@ -42,3 +42,9 @@ class Storage:
 
     def transaction_start(self):
         self._db.transaction_start()
+
+    def transaction_rollback(self):
+        self._db.transaction_rollback()
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,134 @@
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils.inotify import Inotify, IN_CLOSE_WRITE, IN_CREATE, IN_DELETE_SELF, IN_IGNORED, IN_ISDIR, IN_MODIFY, \
+    IN_MOVE_SELF, IN_MOVED_TO, IN_ONLYDIR, IN_Q_OVERFLOW
+from utils.logger import Logger
+
+
+WATCH_MASK: int = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MODIFY | IN_CREATE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+
+# A file changed in a collection, as a collection name and a path relative to that collection.
+ChangedFile = Tuple[str, Path]
+
+
+class CollectionWatcher:
+    """
+    Watches every directory of the collections for changed files that need to be indexed.
+
+    A changed archive is reported once no events arrived for it during the debounce time, so that an archive that is
+    still being written is not indexed before it is complete. A changed text file causes the archive next to it to be
+    reported, because the text file is indexed along with that archive.
+
+    If the kernel drops events because too many arrived at once, the changes can no longer be known. The needs_rescan
+    attribute is then set, and the collections should be scanned completely.
+    """
+
+    def __init__(self, logger: Logger, collections: Dict[str, str], debounce_time: float, extension: str = '.zip'):
+        self.logger: Logger = logger
+        self.collections: Dict[str, str] = collections
+        self.debounce_time: float = debounce_time
+        self.extension: str = extension
+
+        self.inotify: Inotify = Inotify()
+        self.watches: Dict[int, Tuple[str, Path]] = {}
+        self.pending: Dict[ChangedFile, float] = {}
+        self.needs_rescan: bool = False
+
+        for collection, path_collection in collections.items():
+            self._watch_tree(collection, Path(path_collection))
+        self.logger.info('Watching {} directories.'.format(len(self.watches)))
+
+    def _watch_tree(self, collection: str, path: Path, report_files: bool = False):
+        """
+        Watches a directory and all of its subdirectories.
+
+        :param collection:
+        :param path:
+        :param report_files: Report archives found in the directories. Used for directories that were created while
+        being watched, where archives may have been written before the directory itself was watched.
+        :return:
+        """
+
+        try:
+            wd = self.inotify.add_watch(str(path), WATCH_MASK)
+        except OSError as e:
+            self.logger.warn('Unable to watch {}: {}'.format(path, e))
+            return
+
+        path_collection = Path(self.collections[collection])
+        self.watches[wd] = (collection, path.relative_to(path_collection))
+
+        try:
+            with os.scandir(path) as it:
+                dir_entries = list(it)
+        except OSError:
+            return
+
+        for dir_entry in dir_entries:
+            if dir_entry.is_dir(follow_symlinks=False):
+                self._watch_tree(collection, Path(dir_entry.path), report_files)
+            elif report_files:
+                self._add_change(collection, Path(dir_entry.path).relative_to(path_collection))
+
+    def _add_change(self, collection: str, path: Path):
+        if path.suffix == '.txt':
+            path = path.with_suffix(self.extension)
+            path_local = Path(self.collections[collection]) / path
+            if not path_local.is_file():
+                return
+        elif not path.name.endswith(self.extension) or path.name.startswith('.'):
+            return
+
+        self.pending[(collection, path)] = time.monotonic() + self.debounce_time
+
+    def poll(self, timeout: Optional[float]) -> List[ChangedFile]:
+        """
+        Waits for events and returns changed archives whose debounce time has passed.
+
+        :param timeout: Maximum time to wait for events, in seconds. Waits until the next archive is due if None.
+        :return:
+        """
+
+        now = time.monotonic()
+        if len(self.pending):
+            next_due = max(min(self.pending.values()) - now, 0.0)
+            if timeout is None or next_due < timeout:
+                timeout = next_due
+
+        for event in self.inotify.read(timeout):
+            if event.mask & IN_Q_OVERFLOW:
+                self.logger.warn('Filesystem events were lost, a full scan is needed.')
+                self.needs_rescan = True
+                continue
+
+            watch = self.watches.get(event.wd)
+            if watch is None:
+                continue
+            collection, path_directory = watch
+
+            if event.mask & IN_IGNORED:
+                del self.watches[event.wd]
+                continue
+
+            if not event.name:
+                continue
+
+            path = path_directory / event.name
+            if event.mask & IN_ISDIR:
+                if event.mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch_tree(collection, Path(self.collections[collection]) / path, True)
+            else:
+                self._add_change(collection, path)
+
+        now = time.monotonic()
+        due: List[ChangedFile] = [changed for changed, due_time in self.pending.items() if due_time <= now]
+        for changed in due:
+            del self.pending[changed]
+
+        return sorted(due)
+
+    def close(self):
+        self.inotify.close()
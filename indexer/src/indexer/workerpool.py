@@ -0,0 +1,393 @@
+import math
+import multiprocessing
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from collections import deque
+from multiprocessing import Process
+from multiprocessing.connection import Connection, wait
+from multiprocessing.context import BaseContext
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from utils.logger import Logger
+from utils.process_memory import get_rss
+
+
+# Messages sent from a worker process to the pool.
+MESSAGE_RESULT: str = 'result'
+MESSAGE_ERROR: str = 'error'
+MESSAGE_STATS: str = 'stats'
+
+# Sent by a worker that takes its tasks from a queue of its own instead of from the pool, when it starts one. The value
+# describes the task, and the task timeout applies from then on.
+MESSAGE_STARTED: str = 'started'
+
+# Carries output for the logger stream, so that workers do not write to the stream queue shared by all processes.
+MESSAGE_STREAM: str = 'stream'
+
+# Sent by a worker before it waits on a resource shared with other processes, such as the encode queue. Its task
+# deadline no longer applies after this, because killing it while it holds the resource would block the other
+# processes that use it.
+MESSAGE_WAITING: str = 'waiting'
+
+# Seconds to wait for a retiring worker to exit by itself before it is killed. This blocks the pool, so it is short.
+RETIRE_TIMEOUT: float = 5.0
+
+ResultHandler = Callable[[Tuple, any], None]
+FailureHandler = Callable[[Tuple, str], None]
+
+
+class Worker:
+    __slots__ = ['name', 'process', 'connection', 'task', 'deadline', 'task_count', 'is_retiring']
+
+    def __init__(self, name: str, process: Process, connection: Connection):
+        self.name: str = name
+        self.process: Process = process
+        self.connection: Connection = connection
+        self.task: Optional[Tuple] = None
+        self.deadline: float = 0.0
+        self.task_count: int = 0
+        self.is_retiring: bool = False
+
+
+def worker_init():
+    """
+    Prepares a worker process to be supervised. Must be called by the worker target before doing anything else.
+
+    Places the worker in its own process group, so that any child processes it starts are killed along with it. Also
+    makes the worker create its temporary files in a directory of its own, which is cleared first in case a killed
+    worker with the same name left files behind.
+    """
+
+    os.setpgrp()
+
+    path_temp = get_worker_temp_path(os.getppid(), multiprocessing.current_process().name)
+    shutil.rmtree(path_temp, ignore_errors=True)
+    os.makedirs(path_temp)
+    tempfile.tempdir = path_temp
+
+
+def get_worker_temp_path(pool_pid: int, name: str) -> str:
+    return os.path.join(tempfile.gettempdir(), 'indexer-{}-{}'.format(pool_pid, name))
+
+
+class WorkerStreamQueue:
+    """
+    Takes the place of the logger stream queue in a worker, and sends stream output to the pool over the worker's own
+    pipe. A worker killed while writing to a queue that other processes share could leave its lock held and block them
+    all, while a worker killed while writing to its own pipe only breaks that pipe.
+
+    Extractor threads can write stream output at the same time, so sending is serialized with a lock.
+    """
+
+    def __init__(self, connection: Connection):
+        self.connection: Connection = connection
+        self.lock: threading.Lock = threading.Lock()
+
+    def put(self, item: Tuple[str, str]):
+        with self.lock:
+            self.connection.send((MESSAGE_STREAM, item))
+
+
+class WorkerPool:
+    """
+    Supervises a fixed number of worker processes that each run one task at a time.
+
+    Every worker has its own pipe to the pool, over which it receives tasks and sends back a single result or error
+    message per task. A worker that takes longer than the task timeout is killed together with its child processes, and
+    a worker that exits unexpectedly is replaced, so that the pool stays at full strength. The tasks of these workers
+    are reported as failed.
+
+    Workers can also be recycled to keep memory use bounded. After completing max_tasks tasks, or once its resident
+    set size exceeds max_memory kilobytes, a worker is asked to exit and a fresh worker takes its place. A value of 0
+    disables either limit.
+
+    A worker can send a waiting message before its result, after which it is no longer killed for exceeding the task
+    timeout. Workers send their logger stream output over the pipe as well, through a WorkerStreamQueue, and the pool
+    passes it on to the stream queue of its own logger. The target function is called with args followed by the
+    worker's end of the pipe, and must call worker_init first.
+    After receiving None instead of a task, it may send a single stats message before exiting. Workers are started with
+    the given multiprocessing context, or the default one, and are named after the pool.
+
+    Workers can also take tasks from a queue of their own, such as the encode queue, instead of being handed them by
+    the pool. They send a started message for each task, after which it is timed and reported like any other task.
+    """
+
+    def __init__(self, size: int, target: Callable, args: Tuple, logger: Logger, task_timeout: float,
+                 on_result: ResultHandler, on_failure: FailureHandler, max_tasks: int = 0, max_memory: int = 0,
+                 context: Optional[BaseContext] = None, name: str = 'index'):
+        self.size: int = size
+        self.target: Callable = target
+        self.args: Tuple = args
+        self.logger: Logger = logger
+        self.task_timeout: float = task_timeout
+        self.on_result: ResultHandler = on_result
+        self.on_failure: FailureHandler = on_failure
+        self.max_tasks: int = max_tasks
+        self.max_memory: int = max_memory
+        self.context: BaseContext = context if context is not None else multiprocessing.get_context()
+        self.name: str = name
+
+        self.workers: List[Worker] = []
+        self.pending: Deque[Tuple] = deque()
+        self.stats: List[any] = []
+
+        # Set while stopping, after which workers that exit after sending their stats are no longer replaced.
+        self.is_stopping: bool = False
+
+    def start(self):
+        for index in range(self.size):
+            self.workers.append(self._spawn('{}-{:02}'.format(self.name, index + 1)))
+
+    def _spawn(self, name: str) -> Worker:
+        connection, worker_connection = self.context.Pipe()
+        process = self.context.Process(target=self.target, args=self.args + (worker_connection,), name=name)
+        process.start()
+        worker_connection.close()
+
+        return Worker(name, process, connection)
+
+    def submit(self, task: Tuple):
+        self.pending.append(task)
+
+    @property
+    def free_count(self) -> int:
+        """
+        The number of tasks that can be submitted before every worker is busy.
+        """
+
+        count = 0
+        for worker in self.workers:
+            if worker.task is None and not worker.is_retiring:
+                count += 1
+
+        return max(count - len(self.pending), 0)
+
+    @property
+    def is_idle(self) -> bool:
+        if len(self.pending):
+            return False
+
+        for worker in self.workers:
+            if worker.task is not None or worker.is_retiring:
+                return False
+
+        return True
+
+    def poll(self, timeout: Optional[float] = None):
+        """
+        Hands pending tasks to idle workers, then waits for and handles messages from workers.
+
+        :param timeout: Maximum time to wait for messages, in seconds. Waits until the next task deadline if None.
+        :return:
+        """
+
+        for worker in self.workers:
+            if worker.task is None and not worker.is_retiring and len(self.pending):
+                self._dispatch(worker, self.pending.popleft())
+
+        # Wake up in time to enforce the earliest deadline.
+        now = time.monotonic()
+        wait_time = timeout
+        for worker in self.workers:
+            if worker.task is None or worker.deadline == math.inf:
+                continue
+            remaining = max(worker.deadline - now, 0.0)
+            if wait_time is None or remaining < wait_time:
+                wait_time = remaining
+
+        by_connection: Dict[Connection, Worker] = {worker.connection: worker for worker in self.workers}
+        by_sentinel: Dict[int, Worker] = {worker.process.sentinel: worker for worker in self.workers}
+        ready = wait(list(by_connection.keys()) + list(by_sentinel.keys()), wait_time)
+
+        for item in ready:
+            if item in by_connection:
+                self._receive(by_connection[item])
+
+        # Workers are only checked for having exited after their pending messages were received.
+        for item in ready:
+            if item in by_sentinel:
+                worker = by_sentinel[item]
+                if worker in self.workers and not worker.process.is_alive():
+                    if worker.is_retiring:
+                        self._replace(worker)
+                    else:
+                        self._replace(worker, 'worker exited with code {}'.format(worker.process.exitcode))
+
+        now = time.monotonic()
+        for worker in list(self.workers):
+            if worker.task is not None and now >= worker.deadline:
+                self._replace(worker, 'timed out after {} seconds'.format(self.task_timeout))
+
+    def _dispatch(self, worker: Worker, task: Tuple):
+        worker.task = task
+        worker.deadline = time.monotonic() + self.task_timeout
+        worker.connection.send(task)
+
+    def _receive(self, worker: Worker):
+        if worker not in self.workers:
+            return
+
+        try:
+            message, value = worker.connection.recv()
+        except (EOFError, OSError):
+            return
+
+        # A worker sends its stats just before it exits, after it was asked to retire or its own queue was stopped.
+        if message == MESSAGE_STATS:
+            self.stats.append(value)
+            worker.is_retiring = True
+            self._replace(worker)
+            return
+
+        if self._handle(worker, message, value):
+            self._check_retire(worker)
+
+    def _handle(self, worker: Worker, message: str, value: any) -> bool:
+        """
+        Handles a message other than stats from a worker.
+
+        :param worker:
+        :param message:
+        :param value:
+        :return: Whether the message completed the task of the worker.
+        """
+
+        if message == MESSAGE_STREAM:
+            self._stream(value)
+            return False
+
+        if message == MESSAGE_STARTED:
+            worker.task = value
+            worker.deadline = time.monotonic() + self.task_timeout
+            return False
+
+        if message == MESSAGE_WAITING:
+            if worker.task is not None:
+                worker.deadline = math.inf
+            return False
+
+        task = worker.task
+        worker.task = None
+        if task is None:
+            return False
+
+        worker.task_count += 1
+        if message == MESSAGE_RESULT:
+            self.on_result(task, value)
+        elif message == MESSAGE_ERROR:
+            self.on_failure(task, value)
+
+        return True
+
+    def _stream(self, item: Tuple[str, str]):
+        if self.logger.stream_queue is not None:
+            self.logger.stream_queue.put(item)
+
+    def _check_retire(self, worker: Worker):
+        """
+        Asks a worker to exit after its current task if it exceeded one of the recycling limits.
+
+        :param worker:
+        :return:
+        """
+
+        reason: Optional[str] = None
+        if self.max_tasks and worker.task_count >= self.max_tasks:
+            reason = 'completed {} tasks'.format(worker.task_count)
+        elif self.max_memory:
+            rss = get_rss(worker.process.pid)
+            if rss is not None and rss >= self.max_memory:
+                reason = 'resident set size is {} MB'.format(rss // 1024)
+
+        if reason is None:
+            return
+
+        self.logger.info('Recycling worker {}: {}.'.format(worker.name, reason))
+        worker.is_retiring = True
+        worker.connection.send(None)
+
+    def _replace(self, worker: Worker, reason: Optional[str] = None):
+        """
+        Replaces a worker with a new one. If a reason is given, the worker is killed and its current task fails. While
+        stopping, a worker that exits without a reason is removed instead.
+
+        :param worker:
+        :param reason:
+        :return:
+        """
+
+        if reason is not None:
+            self.logger.error('Replacing worker {}: {}.'.format(worker.name, reason))
+        else:
+            worker.process.join(RETIRE_TIMEOUT)
+            if worker.process.is_alive():
+                self.logger.warn('Worker {} did not exit in time.'.format(worker.name))
+        self._kill(worker)
+
+        if self.is_stopping and reason is None:
+            self.workers.remove(worker)
+            return
+
+        index = self.workers.index(worker)
+        self.workers[index] = self._spawn(worker.name)
+
+        if worker.task is not None and reason is not None:
+            self.on_failure(worker.task, reason)
+
+    @staticmethod
+    def _kill(worker: Worker):
+        if worker.process.is_alive():
+            try:
+                os.killpg(worker.process.pid, signal.SIGKILL)
+            except OSError:
+                worker.process.kill()
+
+        worker.process.join()
+        worker.connection.close()
+
+        shutil.rmtree(get_worker_temp_path(os.getpid(), worker.name), ignore_errors=True)
+
+    def stop(self) -> List[any]:
+        """
+        Stops all workers after their current task and waits for them to exit.
+
+        :return: The stats sent by each worker before exiting.
+        """
+
+        while not self.is_idle:
+            self.poll()
+
+        self.is_stopping = True
+        for worker in self.workers:
+            worker.connection.send(None)
+
+        # Workers that take tasks from a queue of their own can still be working through it. Each message they send
+        # must arrive within the task timeout.
+        stats: List[any] = self.stats
+        for worker in self.workers:
+            try:
+                while worker.connection.poll(self.task_timeout):
+                    message, value = worker.connection.recv()
+                    if message == MESSAGE_STATS:
+                        stats.append(value)
+                        break
+                    self._handle(worker, message, value)
+            except (EOFError, OSError):
+                pass
+
+            worker.process.join(RETIRE_TIMEOUT)
+            if worker.process.is_alive():
+                self.logger.warn('Worker {} did not exit in time.'.format(worker.name))
+            self._kill(worker)
+
+            if worker.task is not None:
+                self.on_failure(worker.task, 'did not finish while stopping')
+
+        self.workers = []
+        self.stats = []
+
+        return stats
@@ -0,0 +1,29 @@
+import os
+import tempfile
+from pathlib import Path
+
+
+def write_atomic(path: Path, data: bytes):
+    """
+    Writes data to a file so that other processes see either no file or the complete file, never a partial one.
+
+    The data is written to a temporary file in the same directory, which is then renamed over the destination. If
+    several processes write the same file at once, one of their complete copies remains.
+
+    :param path:
+    :param data:
+    :return:
+    """
+
+    fd, path_temp = tempfile.mkstemp(dir=path.parent, prefix='.{}.'.format(path.name), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(path_temp, 0o644)
+        os.replace(path_temp, path)
+    except BaseException:
+        try:
+            os.unlink(path_temp)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,31 @@
+from hashlib import blake2b
+from pathlib import Path
+
+
+HASH_DIGEST_SIZE: int = 16
+HASH_BUFFER_SIZE: int = 1024 * 1024
+
+
+def file_hash(path: Path) -> bytes:
+    """
+    Returns a BLAKE2b digest of the contents of a file.
+
+    The file is read in large unbuffered chunks into a single reused buffer, which is much cheaper than extracting
+    the file's contents.
+
+    :param path:
+    :return:
+    """
+
+    digest = blake2b(digest_size=HASH_DIGEST_SIZE)
+    buffer = bytearray(HASH_BUFFER_SIZE)
+    view = memoryview(buffer)
+
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            digest.update(view[:size])
+
+    return digest.digest()
@@ -0,0 +1,43 @@
+import shutil
+import tempfile
+from io import BytesIO
+from typing import IO
+from zipfile import ZipFile, ZipInfo
+
+
+# Default size in bytes up to which files are decompressed into memory.
+MEMORY_LIMIT_DEFAULT: int = 64 * 1024 * 1024
+
+COPY_SIZE: int = 1024 * 1024
+
+
+def inflate_zip_file(zip_file: ZipFile, info: ZipInfo, memory_limit: int = MEMORY_LIMIT_DEFAULT) -> IO[bytes]:
+    """
+    Decompresses a file from a ZIP archive once, into a file that can be read from at any position.
+
+    The file objects that ZipFile.open returns decompress their data as it is read. Seeking backwards in them starts
+    decompressing again from the start of the file, which makes reading the lumps of a WAD in such a file very slow.
+
+    Files up to memory_limit bytes are decompressed into memory. Larger files are decompressed into an anonymous
+    temporary file, which is removed once it is closed. A ZipExtFile never returns more data than the size that the
+    archive lists for the file, so that size decides where the data goes before decompressing it.
+
+    :param zip_file:
+    :param info:
+    :param memory_limit:
+    :return:
+    """
+
+    with zip_file.open(info) as source:
+        if info.file_size <= memory_limit:
+            return BytesIO(source.read())
+
+        file = tempfile.TemporaryFile()
+        try:
+            shutil.copyfileobj(source, file, COPY_SIZE)
+        except BaseException:
+            file.close()
+            raise
+
+    file.seek(0)
+    return file
@@ -0,0 +1,143 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+from typing import List, Optional
+
+
+IN_ACCESS: int = 0x00000001
+IN_MODIFY: int = 0x00000002
+IN_ATTRIB: int = 0x00000004
+IN_CLOSE_WRITE: int = 0x00000008
+IN_CLOSE_NOWRITE: int = 0x00000010
+IN_OPEN: int = 0x00000020
+IN_MOVED_FROM: int = 0x00000040
+IN_MOVED_TO: int = 0x00000080
+IN_CREATE: int = 0x00000100
+IN_DELETE: int = 0x00000200
+IN_DELETE_SELF: int = 0x00000400
+IN_MOVE_SELF: int = 0x00000800
+
+IN_UNMOUNT: int = 0x00002000
+IN_Q_OVERFLOW: int = 0x00004000
+IN_IGNORED: int = 0x00008000
+
+IN_ONLYDIR: int = 0x01000000
+IN_DONT_FOLLOW: int = 0x02000000
+IN_ISDIR: int = 0x40000000
+
+IN_NONBLOCK: int = 0x00000800
+IN_CLOEXEC: int = 0x00080000
+
+S_EVENT = struct.Struct('iIII')
+
+READ_SIZE: int = 64 * 1024
+
+
+_libc: Optional[ctypes.CDLL] = None
+
+
+def _get_libc() -> ctypes.CDLL:
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+
+        _libc.inotify_init1.argtypes = [ctypes.c_int]
+        _libc.inotify_init1.restype = ctypes.c_int
+        _libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        _libc.inotify_add_watch.restype = ctypes.c_int
+        _libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        _libc.inotify_rm_watch.restype = ctypes.c_int
+
+    return _libc
+
+
+def _raise_errno(message: str):
+    errno = ctypes.get_errno()
+    raise OSError(errno, '{}: {}'.format(message, os.strerror(errno)))
+
+
+class InotifyEvent:
+    __slots__ = ['wd', 'mask', 'cookie', 'name']
+
+    def __init__(self, wd: int, mask: int, cookie: int, name: str):
+        self.wd: int = wd
+        self.mask: int = mask
+        self.cookie: int = cookie
+        self.name: str = name
+
+    @property
+    def is_dir(self) -> bool:
+        return bool(self.mask & IN_ISDIR)
+
+
+class Inotify:
+    """
+    Minimal binding to the Linux inotify API, which reports changes to files in watched directories.
+    """
+
+    def __init__(self):
+        self.fd: int = _get_libc().inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            _raise_errno('Unable to initialize inotify')
+
+    def add_watch(self, path: str, mask: int) -> int:
+        """
+        Watches a file or directory for events. Watching the same path again replaces its mask.
+
+        :param path:
+        :param mask:
+        :return: The watch descriptor that events for this path are reported with.
+        """
+
+        wd = _get_libc().inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            _raise_errno('Unable to watch {}'.format(path))
+
+        return wd
+
+    def remove_watch(self, wd: int):
+        if _get_libc().inotify_rm_watch(self.fd, wd) < 0:
+            _raise_errno('Unable to remove watch {}'.format(wd))
+
+    def read(self, timeout: Optional[float] = None) -> List[InotifyEvent]:
+        """
+        Waits for and returns events.
+
+        :param timeout: Maximum time to wait for events, in seconds. Waits indefinitely if None.
+        :return: The events that were read. Empty if none arrived in time.
+        """
+
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not len(ready):
+            return []
+
+        try:
+            data = os.read(self.fd, READ_SIZE)
+        except BlockingIOError:
+            return []
+
+        events: List[InotifyEvent] = []
+        offset = 0
+        while offset + S_EVENT.size <= len(data):
+            wd, mask, cookie, name_length = S_EVENT.unpack_from(data, offset)
+            offset += S_EVENT.size
+
+            # The name is padded with null bytes.
+            name = os.fsdecode(data[offset:offset + name_length].rstrip(b'\0'))
+            offset += name_length
+
+            events.append(InotifyEvent(wd, mask, cookie, name))
+
+        return events
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def close(self):
+        if self.fd < 0:
+            return
+
+        os.close(self.fd)
+        self.fd = -1
@@ -0,0 +1,55 @@
+import resource
+from typing import Optional
+
+
+def _read_status_value(key: str, pid: Optional[int] = None) -> Optional[int]:
+    path = '/proc/{}/status'.format(pid if pid is not None else 'self')
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                if line.startswith(key):
+                    return int(line[len(key):].split()[0])
+    except (OSError, ValueError, IndexError):
+        pass
+
+    return None
+
+
+def get_peak_rss() -> int:
+    """
+    Returns the peak resident set size of the current process in kilobytes.
+
+    :return:
+    """
+
+    peak = _read_status_value('VmHWM:')
+    if peak is None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return peak
+
+
+def get_rss(pid: int) -> Optional[int]:
+    """
+    Returns the current resident set size of a process in kilobytes, or None if it cannot be determined.
+
+    :param pid:
+    :return:
+    """
+
+    return _read_status_value('VmRSS:', pid)
+
+
+def reset_peak_rss():
+    """
+    Resets the peak resident set size of the current process to its current resident set size, if the platform
+    supports it. Otherwise the peak remains the peak over the lifetime of the process.
+
+    :return:
+    """
+
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
@@ -0,0 +1,85 @@
+import re
+from functools import lru_cache
+from typing import Pattern, Tuple
+
+
+# Characters that are always matched literally by a regular expression. Only ASCII characters are used, because
+# case-insensitive matching folds some of the others in ways that lowercasing does not.
+LITERAL_CHARACTERS: str = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-/ \'"!@%&=,;:<>~`'
+
+# Characters that make the character before them optional or repeated.
+QUANTIFIER_CHARACTERS: str = '*?{'
+
+REGEXP_CACHE_SIZE: int = 256
+
+
+@lru_cache(maxsize=REGEXP_CACHE_SIZE)
+def compile_regexp(regexp: str) -> Tuple[Pattern, str]:
+    """
+    Compiles a regular expression for case-insensitive matching against file names, and determines its literal prefix.
+
+    :param regexp:
+    :return: The compiled expression, and the lowercase prefix that every string it matches from the start begins with
+    case-insensitively. The prefix is empty if there is none.
+    """
+
+    return re.compile(regexp, re.IGNORECASE), get_literal_prefix(regexp)
+
+
+def get_literal_prefix(regexp: str) -> str:
+    """
+    Returns the lowercase literal text that a regular expression starts with. Text followed by a quantifier is not
+    included. Returns an empty string if the expression has alternatives at its top level, because those need not
+    start with the same text.
+
+    :param regexp:
+    :return:
+    """
+
+    if has_top_level_alternatives(regexp):
+        return ''
+
+    start = 1 if regexp.startswith('^') else 0
+    end = start
+    while end < len(regexp) and regexp[end] in LITERAL_CHARACTERS:
+        end += 1
+
+    # The last literal character is not required if a quantifier follows it.
+    if end < len(regexp) and regexp[end] in QUANTIFIER_CHARACTERS:
+        end -= 1
+
+    return regexp[start:max(start, end)].lower()
+
+
+def has_top_level_alternatives(regexp: str) -> bool:
+    depth = 0
+    in_class = False
+
+    index = 0
+    while index < len(regexp):
+        char = regexp[index]
+        if char == '\\':
+            index += 2
+            continue
+
+        if in_class:
+            if char == ']':
+                in_class = False
+        elif char == '[':
+            in_class = True
+
+            # A closing bracket right at the start of a class is part of the class.
+            if regexp[index + 1:index + 2] == '^':
+                index += 1
+            if regexp[index + 1:index + 2] == ']':
+                index += 1
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return True
+
+        index += 1
+
+    return False
@@ -1,6 +1,5 @@
 import subprocess
 from enum import Enum
-from io import BytesIO
 from os.path import basename, normpath
 from pathlib import Path
 from typing import Dict, List, Optional
@@ -23,7 +22,7 @@ class SZArchive:
         self._read_info()
 
     def _read_info(self):
-        proc = subprocess.Popen(['7z', 'l', '-slt', '-so', '-sccUTF-8', self.path.as_posix()], stdout=subprocess.PIPE)
+        proc = subprocess.Popen(['7z', 'l', '-slt', '-so', '-sccUTF-8', self.path.as_posix()], stdout=subprocess.PIPE, encoding='utf-8', errors='replace')
 
         mode = SZParseMode.NONE
         file: Optional[SZFile] = None
@@ -67,12 +66,40 @@ class SZArchive:
                     file.packed_size = int(parts[1])
                 elif parts[0] == 'Method':
                     file.method = parts[1]
+                elif parts[0] == 'Folder':
+                    file.is_dir = parts[1] == '+'
+                elif parts[0] == 'Attributes':
+                    file.is_dir = file.is_dir or parts[1].startswith('D')
 
         if file:
             self.file_names[file.path] = len(self.files)
             self.files.append(file)
 
         proc.stdout.close()
+        proc.wait()
+
+    def extract(self, directory: Path, paths: Optional[List[str]] = None) -> bool:
+        """
+        Extracts files in the archive into a directory, with a single 7zip process.
+
+        :param directory:
+        :param paths: Paths of the files to extract. All files are extracted if None.
+        :return: Whether 7zip extracted the files without errors.
+        """
+
+        args = ['7z', 'x', '-y', '-bd', '-sccUTF-8', '-o{}'.format(directory.as_posix())]
+
+        # Match the paths literally, instead of as wildcards.
+        if paths is not None:
+            args.append('-spd')
+
+        args.append('--')
+        args.append(self.path.as_posix())
+        if paths is not None:
+            args.extend(paths)
+
+        result = subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return result.returncode == 0
 
     def get_file(self, filename: str):
         if filename in self.file_names:
@@ -80,10 +107,6 @@ class SZArchive:
 
         return None
 
-    def close(self):
-        for file in self.files:
-            file.close()
-
     def __repr__(self):
         return '{}: {}'.format(self.path, self.type)
 
@@ -98,23 +121,7 @@ class SZFile:
         self.size: Optional[int] = None
         self.packed_size: Optional[int] = None
         self.method: Optional[str] = None
-
-        self._data: Optional[BytesIO] = None
-
-    def get_data(self) -> BytesIO:
-        if self._data:
-            return self._data
-
-        proc = subprocess.Popen(['7z', 'e', '-so', '-sccUTF-8', self.archive.path, self.path], stdout=subprocess.PIPE)
-        data = proc.stdout.read()
-        proc.stdout.close()
-
-        self._data = BytesIO(data)
-        return self._data
-
-    def close(self):
-        if self._data:
-            self._data.close()
+        self.is_dir: bool = False
 
     def __repr__(self):
         return '{}: {} bytes, {} bytes packed with {}'.format(self.path, self.size, self.packed_size, self.method)
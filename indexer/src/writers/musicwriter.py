@@ -2,6 +2,7 @@ import gzip
 from pathlib import Path
 
 from extractors.extractedinfo import ExtractedInfo, MusicType
+from utils.atomic_write import write_atomic
 from writers.writerbase import WriterBase
 
 
@@ -22,7 +23,7 @@ class MusicWriter(WriterBase):
             else:
                 continue
 
+            # Music is stored by hash, so the same file can be written by several processes or nodes at once.
             path_file = base_path / '{}.{}.gz'.format(music.hash.hex(), extension)
             if not path_file.exists():
-                with open(path_file, 'wb') as f:
-                    f.write(gzip.compress(music.data))
+                write_atomic(path_file, gzip.compress(music.data))